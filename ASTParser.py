@@ -2,22 +2,49 @@
 ### Parses input and builds an AST representation for it
 
 #### Parsing follows the grammar structure
-## Every grammar production rule has a get_<rule name> method
-# the method's only argument is the tokens to be parsed
+## Every grammar production rule has a get_<rule name> method, but for
+# the levels of the expressions, all parsed by get_expression
+# the methods share one token array (self.tokens) and a cursor into it
+# (self.pos); parsing starts at the current position
+## The token types are checked on the kinds array of the TokenBuffer
+# (self.kinds); Token objects are only built for the nodes of the tree
 ## The method attempts to build the components of the RHS of the grammar
 # rule i.e. the sequence of terminals and non-terminals
-## Upon success, returns the subtree with the components and the rest of
-# the input; upon failure, returns None and the input unchanged
+## Upon success, returns the subtree with the components and leaves the
+# cursor after them; upon failure, returns None and restores the cursor
+# so backtracking never copies the token sequence
+## A suite of several statements is one Block node holding the list of
+# statements, so the depth of the tree does not grow with the length of
+# the program
 ## Because of the return "mechanics", the methods start by trying to
 # parse the rules which are easier to rule out i.e. the ones with more
 # distinct keywords in them;
+## get_stmt does not try the kinds of statement in turn: it picks the one
+# that can start with the current token, from the table that
+# grammar/ll1Grammar.py generates from grammar.txt (parseTable.py)
 
 ### Evaluates the tree by recursively evaluating the nodes
+## A stop, jumpover or halt is signaled by setting self.signal to its
+# token (and self.halted to the value of a halt); the Blocks and loops the
+# Resolver found can not run one (node.signals is False) never look at it
+## A return only matters if it reaches the end of the program, where it
+# was used out of scope; it sets self.returned and evaluates to RETURNED
+## Arithmetic and comparison nodes record the types of their operands;
+# the ones that keep seeing ints (or floats) are quickened into nodes
+# that skip the type checks, until they see other types
 
-from scanner import Scanner, Char
-from tokenizer import Tokenizer, Token
+from lexer import Lexer
+from tokenizer import Token
+from tokenBuffer import Kind, KIND, KINDS
+from parseTable import PREDICT
 from errorSystem import *
+from channels import ConsoleReader, ConsoleWriter
+from runtime import Fault, Halt
+from arrays import Array, FUNCTIONS
+import arrays
 from sys import exit
+from time import perf_counter
+import operator
 
 ### Grammar
 ## check the grammar.txt file
@@ -36,6 +63,11 @@ class Node(object):
             for child in children:
                 child.parent = self
         
+    def children(self):
+        """Returns the list of the child nodes"""
+        return [child for child in [self.left, self.right]
+                                    if child is not None]
+        
     def __str__(self):
         """Override __str__ method for a more detailed representation"""
         if self.left is None:
@@ -71,8 +103,11 @@ class Node(object):
 class UnOp(Node):
     """Node implemented for Unary Operators like 'not'"""
     def __init__(self, token, parent=None, child=None):
-        children = [child] if child else []
-        Node.__init__(self, token, parent, children)
+        # Node.__init__, inlined as the parser builds lots of these
+        self.token = token
+        self.parent = parent
+        if child:
+            child.parent = self
         self.left = child
         self.right = None
         
@@ -90,43 +125,96 @@ class BinOp(Node):
     """Node implemented for ordinary binary operators like ;"""
     def __init__(self, token, parent=None,
                                 left_child=None, right_child=None):
-        children = []
+        # Node.__init__, inlined as the parser builds lots of these
+        self.token = token
+        self.parent = parent
         if left_child:
-            children.append(left_child)
+            left_child.parent = self
         if right_child:
-            children.append(right_child)
-        Node.__init__(self, token, parent, children)
+            right_child.parent = self
         self.left = left_child
         self.right = right_child
         
 class BoolBinOp(BinOp):
     """Node implemented for boolean binary operators like 'and'"""
-    def __init__(self, token, parent=None,
-                                left_child=None, right_child=None):
-        BinOp.__init__(self, token, parent, left_child, right_child)
+    pass
         
 class CompBinOp(BoolBinOp):
     """Node implemented for binary comparison operators like '=='"""
-    def __init__(self, token, parent=None,
-                                left_child=None, right_child=None):
-        BoolBinOp.__init__(self, token, parent, left_child, right_child)
+    # type feedback for the Interpreter, see Interpreter.feedback; a node
+    # gets its own values when it starts recording
+    seen = None
+    count = 0
+    feedback = True
         
 class ArithBinOp(BinOp):
     """Node implemented for arithmetic binary operators like +"""
-    def __init__(self, token, parent=None,
-                                left_child=None, right_child=None):
-        BinOp.__init__(self, token, parent, left_child, right_child)
+    # type feedback for the Interpreter, see Interpreter.feedback; a node
+    # gets its own values when it starts recording
+    seen = None
+    count = 0
+    feedback = True
+        
+### Quickened nodes
+## The Interpreter rewrites (by changing their class) the ArithBinOp and
+# CompBinOp nodes that only ever saw int, or float, operands into one of
+# these; they compute the operation without any type checks as long as
+# the operands are of the expected type (self.operand) and are turned back
+# into their generic class otherwise
+
+class IntArithBinOp(ArithBinOp):
+    """ArithBinOp quickened for int operands"""
+    operand = int
+    generic = ArithBinOp
+    
+class FloatArithBinOp(ArithBinOp):
+    """ArithBinOp quickened for float operands"""
+    operand = float
+    generic = ArithBinOp
+    
+class IntCompBinOp(CompBinOp):
+    """CompBinOp quickened for int operands"""
+    operand = int
+    generic = CompBinOp
+    
+class FloatCompBinOp(CompBinOp):
+    """CompBinOp quickened for float operands"""
+    operand = float
+    generic = CompBinOp
+    
+QUICK_CLASSES = {(ArithBinOp, int): IntArithBinOp,
+                (ArithBinOp, float): FloatArithBinOp,
+                (CompBinOp, int): IntCompBinOp,
+                (CompBinOp, float): FloatCompBinOp}
+                
+# the function computing each operator in a quickened node
+OPERATIONS = {Token.PLUS: operator.add,
+            Token.MINUS: operator.sub,
+            Token.PRODUCT: operator.mul,
+            Token.DIVISION: operator.truediv,
+            Token.POWER: pow,
+            Token.EQUALITY: operator.eq,
+            Token.INEQUALITY: operator.ne,
+            Token.GREATER: operator.gt,
+            Token.LESSER: operator.lt,
+            Token.GREATEREQUAL: operator.ge,
+            Token.LESSEREQUAL: operator.le}
+            
+# a node is quickened after this many executions with the same types
+QUICKEN_AFTER = 8
         
 class Literal(Node):
     """Node implemented to hold any literal, like strings or integers"""
     def __init__(self, token, parent=None):
-        Node.__init__(self, token, parent, [])
+        self.token = token
+        self.parent = parent
         self.left = self.right = None
        
 class Variable(Node):
     """Node implemented to represent any user-defined variable"""
     def __init__(self, token, parent=None):
-        Node.__init__(self, token, parent, [])
+        self.token = token
+        self.parent = parent
         self.left = self.right = None
         
 class CompStmt(Node):
@@ -141,6 +229,99 @@ class CompStmt(Node):
         Node.__init__(self, token, parent, children)
         self.left = left_child
         self.right = right_child
+        # set by the Resolver, see Interpreter.visit_CompStmt
+        self.signals = True
+        
+class Block(Node):
+    """Node implemented to represent a suite of statements; its token is
+    the first separator"""
+    def __init__(self, token, parent=None, statements=None):
+        statements = statements if statements is not None else []
+        Node.__init__(self, token, parent,
+                        [stmt for stmt in statements if stmt is not None])
+        self.statements = statements
+        self.left = self.right = None
+        # set by the Resolver, see Interpreter.visit_Block
+        self.signals = True
+        
+    def __str__(self):
+        return "Block[ {} ]: {} statements".format(str(self.token),
+                                                len(self.statements))
+        
+    def children(self):
+        return [stmt for stmt in self.statements if stmt is not None]
+        
+    def get_strings(self):
+        return [" > " + str(self.token)] + [stmt.get_strings()
+                                            for stmt in self.children()]
+        
+class ArrayLiteral(Node):
+    """Node implemented to represent an array literal, like [1, 2]; its
+    token is the '['"""
+    def __init__(self, token, parent=None, items=None):
+        items = items if items is not None else []
+        Node.__init__(self, token, parent, items)
+        self.items = items
+        self.left = self.right = None
+        
+    def __str__(self):
+        return "{}[ {} ]: {} items".format(type(self).__name__,
+                                        str(self.token), len(self.items))
+        
+    def children(self):
+        return list(self.items)
+        
+    def get_strings(self):
+        return [" > " + str(self.token)] + [item.get_strings()
+                                            for item in self.items]
+        
+class Call(ArrayLiteral):
+    """Node implemented to represent a call of a built-in function, like
+    sum(a); its token is the name of the function and its items the
+    arguments"""
+    pass
+        
+class Index(BinOp):
+    """Node implemented to represent indexing, like a[0]; its token is
+    the '[', the array is the left child and the index the right one"""
+    pass
+
+### Expressions
+## Parser.get_expression climbs the binding powers of the binary operators
+# instead of having one method per level of grammar.txt; every operator is
+# left associative, like the loops of the grammar, and builds the node of
+# its class
+## An operand may be followed by trailers: an index in brackets or, if the
+# operand is a name, the arguments of a built-in function (see arrays.py)
+INFIX = [None] * len(KINDS)
+for power, cls, kinds in [(1, BoolBinOp, [Kind.OR]),
+                        (2, BoolBinOp, [Kind.AND]),
+                        (4, CompBinOp, [Kind.EQUALITY, Kind.INEQUALITY,
+                                        Kind.GREATER, Kind.LESSER,
+                                        Kind.GREATEREQUAL, Kind.LESSEREQUAL]),
+                        (5, ArithBinOp, [Kind.PLUS, Kind.MINUS]),
+                        (6, ArithBinOp, [Kind.PRODUCT, Kind.DIVISION]),
+                        (7, ArithBinOp, [Kind.POWER])]:
+    for kind in kinds:
+        INFIX[kind] = (power, cls)
+# 'not' binds looser than the comparisons and tighter than 'and'
+NOT_POWER = 3
+# the operations of Parser.get_operation that wait for an operand, besides
+# the binary operators, whose frames start with the class of their node
+NOT_FRAME, GROUP_FRAME = "not", "group"
+# the node class of the tokens that are a whole operand by themselves
+LEAVES = [None] * len(KINDS)
+for kind in [Kind.BOOL, Kind.INTEGER, Kind.FLOAT, Kind.NULL, Kind.STRING]:
+    LEAVES[kind] = Literal
+LEAVES[Kind.USER_VAR] = Variable
+# the tokens that go on an operand: indexing, and the arguments of a call
+TRAILERS = (Kind.LBRACKET, Kind.LGROUP)
+# the trailers bind tighter than every binary operator
+TRAILER_POWER = 8
+# what binds to an operand on its right
+AFTER_OPERAND = list(INFIX)
+for kind in TRAILERS:
+    AFTER_OPERAND[kind] = (TRAILER_POWER, None)
 
 class Parser(object):
     """Implement a recursive-descent parser;
@@ -148,246 +329,273 @@ class Parser(object):
     Its only argument is the string to be parsed; Upon success, it will
         store the AST's root (the EOF Node) in self.root.
     The show() method provides pretty tree-like printing for debugging"""
-    def __init__(self, expression):
-        """Initialize the parser by generating the token sequence"""
-        self.sc = Scanner(expression)
-        self.tok = Tokenizer(self.sc)
-        self.tokens = None
-        self.tokens = self.get_token_sequence()
+    def __init__(self, expression, optimize=True, positions=False):
+        """Initialize the parser by generating the token sequence;
+        optimize tells if the tree goes through the Optimizer and
+        positions if the statements are given the number of the source
+        line they start on (as node.line)"""
+        self.optimize = optimize
+        self.positions = positions
+        self.optimizer = None
+        # wall time of the lex, parse and optimize phases
+        self.timings = {}
+        start = perf_counter()
+        self.lexer = Lexer(expression)
+        self.tokens = self.lexer.tokenize()
+        self.kinds = self.tokens.kinds
+        self.timings["lex"] = perf_counter() - start
+        self.pos = 0
         self.root = None
         
     def get_token_sequence(self):
-        """Generate the whole token sequence for the given program"""
-        # prevent redundant calls
-        if self.tokens is not None:
-            return self.tokens[::]
-            
-        self.tokens = []
-        
-        self.tokens.append(self.tok.get_next_token())
-        while self.tokens[-1].get_type() != Token.EOF:
-            self.tokens.append(self.tok.get_next_token())
-            
+        """Returns the whole token sequence for the given program, as a
+        list of Token objects"""
         return self.tokens[::]
     
     def get_program(self):
         """Entry point to the parser; The method will raise an error
             if it is not able to build an AST Tree for the program"""
-        token_list = self.tokens[::]
-        subtree, token_list = self.get_suite(token_list)
+        start = perf_counter()
+        self.pos = 0
+        subtree = self.get_suite()
         if subtree is None:
             raise ParserException("Could not parse the program correctly")
         
-        if token_list[0].get_type() != Token.EOF:
+        if self.kinds[self.pos] != Kind.EOF:
             raise ParserException("Could not parse the program")
         else:
-            eof = token_list[0]
+            eof = self.tokens[self.pos]
             self.root = UnOp(eof, parent=None, child=subtree)
+        self.timings["parse"] = perf_counter() - start
             
-    def get_suite(self, token_list):
-        tokens = token_list[::]
-        subtree, token_list = self.get_stmt(token_list)
-        
-        while token_list and token_list[0].get_type() is Token.SEPARATOR:
-            tok = token_list[0]
-            token_list = token_list[1:]
-            if token_list[0].get_type() is Token.EOF:
+        if self.optimize:
+            # imported here as the optimizer needs the Node classes
+            from optimizer import Optimizer
+            start = perf_counter()
+            self.optimizer = Optimizer()
+            self.root = self.optimizer.optimize(self.root)
+            self.timings["optimize"] = perf_counter() - start
+            
+    def get_suite(self):
+        start = self.pos
+        subtree = self.get_stmt()
+        
+        kinds = self.kinds
+        # the first statement may be missing, as in ';'
+        statements = [subtree]
+        separator = None
+        while kinds[self.pos] == Kind.SEPARATOR:
+            if separator is None:
+                separator = self.tokens[self.pos]
+            self.pos += 1
+            if kinds[self.pos] == Kind.EOF:
                 right = Literal(Token(Token.NULL, "Null"), parent=None)
             else:
-                right, token_list = self.get_stmt(token_list)
+                right = self.get_stmt()
                 
             if right is None:
                 break
-            subtree = BinOp(tok, parent=None, left_child=subtree,
-                                                right_child=right)
+            statements.append(right)
 
+        if len(statements) > 1:
+            return Block(separator, parent=None, statements=statements)
         if subtree is None:
-            return None, tokens
-        return subtree, token_list
-        
-    def get_stmt(self, token_list):
-        tokens = token_list[::]
-        subtree, token_list = self.get_io_stmt(token_list)
-        
-        if subtree is None:
-            # could not get an IO statement, try a control
-            subtree, token_list = self.get_control(token_list)
-        if subtree is None:
-            # could not get a control statement, try an assignment
-            subtree, token_list = self.get_assignment(token_list)
-        if subtree is None:
-            # could not get an assignment, try a compound stmt
-            subtree, token_list = self.get_compound(token_list)
-        if subtree is None:
-            # could not get a compound stmt, try an expression
-            subtree, token_list = self.get_expression(token_list)
+            self.pos = start
+        return subtree
+        
+    def get_stmt(self):
+        start = self.pos
+        kind = self.kinds[start]
+        if kind == Kind.USER_VAR:
+            # the LL(1) conflict of stmt: assignments and expressions
+            # start with a variable, only an assignment has a '=' next
+            subtree = None
+            if self.kinds[start + 1] == Kind.ASSIGNMENT:
+                subtree = self.get_assignment()
+            if subtree is None:
+                subtree = self.get_expression()
+        else:
+            rule = STMT_RULES.get(kind)
+            subtree = None if rule is None else rule(self)
         if subtree is None:
-            return None, tokens
+            self.pos = start
+            return None
         
-        return subtree, token_list
+        if self.positions:
+            subtree.line, _ = self.lexer.position(self.tokens.offsets[start])
+        return subtree
         
-    def get_io_stmt(self, token_list):
-        tokens = token_list[::]
+    def get_io_stmt(self):
+        start = self.pos
         
-        subtree, token_list = self.get_in_stmt(token_list)
+        subtree = self.get_in_stmt()
         if subtree is None:
-            subtree, token_list = self.get_out_stmt(token_list)
+            subtree = self.get_out_stmt()
         if subtree is None:
-            return None, tokens
+            self.pos = start
+            return None
             
-        return subtree, token_list
-        
-    def get_control(self, token_list):
-        tokens = token_list[::]
-        
-        if token_list[0].get_type() not in [Token.STOP, Token.RETURN,
-                                    Token.JUMPOVER, Token.HALT]:
-            return None, tokens
-        tok = token_list[0]
-        token_list = token_list[1:]
+        return subtree
+        
+    def get_control(self):
+        if self.kinds[self.pos] not in [Kind.STOP, Kind.RETURN,
+                                    Kind.JUMPOVER, Kind.HALT]:
+            return None
+        tok = self.tokens[self.pos]
+        self.pos += 1
         if tok.get_type() in [Token.STOP, Token.JUMPOVER]:
             sub = Literal(Token(Token.NULL, "Null"))
         else:
-            sub, token_list = self.get_expression(token_list)
+            sub = self.get_expression()
             if sub is None:
                 sub = Literal(Token(Token.NULL, "Null"))
                 
-        return Control(tok, parent=None, child=sub), token_list
+        return Control(tok, parent=None, child=sub)
         
-    def get_in_stmt(self, token_list):
-        tokens = token_list[::]
-        
-        if token_list[0].get_type() in [Token.READ, Token.READINT,
-                                    Token.READFLOAT, Token.READBOOL]:
-            in_tok = token_list[0]
-            token_list = token_list[1:]
+    def get_in_stmt(self):
+        if self.kinds[self.pos] in [Kind.READ, Kind.READINT,
+                                    Kind.READFLOAT, Kind.READBOOL]:
+            in_tok = self.tokens[self.pos]
+            self.pos += 1
         else:
-            return None, tokens
+            return None
             
-        if token_list[0].get_type() == Token.USER_VAR:
-            var_tok = token_list[0]
-            var_node = Variable(var_tok)
-            token_list = token_list[1:]
+        if self.kinds[self.pos] == Kind.USER_VAR:
+            var_node = Variable(self.tokens[self.pos])
+            self.pos += 1
         else:
             self.error("After READ a user variable is expected")
             
-        subtree = IOOp(in_tok, parent=None, child=var_node)
-        return subtree, token_list
+        return IOOp(in_tok, parent=None, child=var_node)
         
-    def get_out_stmt(self, token_list):
-        tokens = token_list[::]
+    def get_out_stmt(self):
+        start = self.pos
         
-        if token_list[0].get_type() == Token.OUT:
-            out_tok = token_list[0]
-            token_list = token_list[1:]
-            subtree, token_list = self.get_expression(token_list)
+        if self.kinds[self.pos] == Kind.OUT:
+            out_tok = self.tokens[self.pos]
+            self.pos += 1
+            subtree = self.get_expression()
             if subtree is None:
                 self.error("Could not parse an 'out' statement")
         else:
-            return None, tokens
+            self.pos = start
+            return None
             
-        subtree = IOOp(out_tok, parent=None, child=subtree)
-        return subtree, token_list
+        return IOOp(out_tok, parent=None, child=subtree)
     
-    def get_assignment(self, token_list):
-        tokens = token_list[::]
+    def get_assignment(self):
+        start = self.pos
         
-        if token_list[0].get_type() != Token.USER_VAR:
-            return None, tokens
+        if self.kinds[self.pos] != Kind.USER_VAR:
+            return None
         # create the variable node
-        var_node = Variable(token_list[0], parent=None)
+        var_node = Variable(self.tokens[self.pos], parent=None)
         # found a user_var, check for a Token.ASSIGNMENT
-        token_list = token_list[1:]
-        if token_list[0].get_type() != Token.ASSIGNMENT:
-            return None, tokens
-        tok = token_list[0]
-        token_list = token_list[1:]
+        self.pos += 1
+        if self.kinds[self.pos] != Kind.ASSIGNMENT:
+            self.pos = start
+            return None
+        tok = self.tokens[self.pos]
+        self.pos += 1
         
         # get the right node; is it another assignment?
-        right, token_list = self.get_assignment(token_list)
+        right = self.get_assignment()
         if right is None:
-            right, token_list = self.get_expression(token_list)
+            right = self.get_expression()
         if right is None:
-            return None, tokens
+            self.pos = start
+            return None
         return BinOp(tok, parent=None, left_child=var_node,
-                                    right_child=right), token_list
+                                    right_child=right)
                                     
-    def get_compound(self, token_list):
-        tokens = token_list[::]
+    def get_compound(self):
+        start = self.pos
         
         # try to get a while compound
-        subtree, token_list = self.get_while(token_list)
+        subtree = self.get_while()
         if subtree is None:
-            subtree, token_list = self.get_if(token_list)
+            subtree = self.get_if()
         if subtree is None:
-            return None, tokens
-        return subtree, token_list
+            self.pos = start
+            return None
+        return subtree
             
-    def get_while(self, token_list):
-        tokens = token_list[::]
+    def get_while(self):
+        start = self.pos
         
-        if token_list[0].get_type() != Token.WHILE:
-            return None, tokens
+        if self.kinds[self.pos] != Kind.WHILE:
+            return None
+        tok = self.tokens[self.pos]
             
-        tok = token_list[0]
-        token_list = token_list[1:]
-        expression, token_list = self.get_expression(token_list)
+        self.pos += 1
+        expression = self.get_expression()
         if expression is None:
-            return None, tokens
+            self.pos = start
+            return None
             
-        if token_list[0].get_type() != Token.DO:
-            return None, tokens
-        token_list = token_list[1:]
-        suite, token_list = self.get_suite(token_list)
+        if self.kinds[self.pos] != Kind.DO:
+            self.pos = start
+            return None
+        self.pos += 1
+        suite = self.get_suite()
         if suite is None:
-            return None, tokens
+            self.pos = start
+            return None
             
-        if token_list[0].get_type() != Token.END:
-            return None, tokens
-        token_list = token_list[1:]
+        if self.kinds[self.pos] != Kind.END:
+            self.pos = start
+            return None
+        self.pos += 1
         
         return CompStmt(tok, parent=None, left_child=expression,
-                                        right_child=suite), token_list
+                                        right_child=suite)
                                         
-    def get_if(self, token_list):
-        tokens = token_list[::]
+    def get_if(self):
+        start = self.pos
         
-        if token_list[0].get_type() != Token.IF:
-            return None, tokens
+        if self.kinds[self.pos] != Kind.IF:
+            return None
+        if_tok = self.tokens[self.pos]
             
-        if_tok = token_list[0]
-        token_list = token_list[1:]
-        expression, token_list = self.get_expression(token_list)
+        self.pos += 1
+        expression = self.get_expression()
         if expression is None:
-            return None, tokens
+            self.pos = start
+            return None
             
-        if token_list[0].get_type() != Token.DO:
-            return None, tokens
-        token_list = token_list[1:]
-        if_suite, token_list = self.get_suite(token_list)
+        if self.kinds[self.pos] != Kind.DO:
+            self.pos = start
+            return None
+        self.pos += 1
+        if_suite = self.get_suite()
         if if_suite is None:
-            return None, tokens
+            self.pos = start
+            return None
             
-        if token_list[0].get_type() != Token.END:
-            return None, tokens
-        token_list = token_list[1:]
+        if self.kinds[self.pos] != Kind.END:
+            self.pos = start
+            return None
+        self.pos += 1
         
-        if token_list[0].get_type() != Token.ELSE:
+        if self.kinds[self.pos] != Kind.ELSE:
             else_tok = None
         else:
-            else_tok = token_list[0]
-            token_list = token_list[1:]
-            if token_list[0].get_type() != Token.DO:
-                return None, tokens
-            token_list = token_list[1:]
+            else_tok = self.tokens[self.pos]
+            self.pos += 1
+            if self.kinds[self.pos] != Kind.DO:
+                self.pos = start
+                return None
+            self.pos += 1
             
-            else_suite, token_list = self.get_suite(token_list)
+            else_suite = self.get_suite()
             if else_suite is None:
-                return None, tokens
+                self.pos = start
+                return None
             
-            if token_list[0].get_type() != Token.END:
-                return None, tokens
-            token_list = token_list[1:]
+            if self.kinds[self.pos] != Kind.END:
+                self.pos = start
+                return None
+            self.pos += 1
             
         if else_tok is None:
             else_tok = Token(Token.ELSE, "else")
@@ -399,179 +607,197 @@ class Parser(object):
                             
         if_node = CompStmt(if_tok, parent=None,
                         left_child=expression, right_child=else_node)
-        return if_node, token_list
+        return if_node
 
-    def get_expression(self, token_list):
-        tokens = token_list[::]
-        subtree, token_list = self.get_or_test(token_list)
-        
-        if subtree is None:
-            return None, tokens
-        return subtree, token_list
-        
-    def get_or_test(self, token_list):
-        tokens = token_list[::]
-        subtree, token_list = self.get_and_test(token_list)
-        
-        if subtree is None:
-            return None, tokens
-        
-        while token_list[0].get_type() == Token.OR:
-            tok = token_list[0]
-            token_list = token_list[1:]
-            right, token_list = self.get_and_test(token_list)
-            if right is None:
-                return None, tokens
-            else:
-                subtree = BoolBinOp(tok, parent=None, left_child=subtree,
-                                                    right_child=right)
-                                                    
-        return subtree, token_list
-        
-    def get_and_test(self, token_list):
-        tokens = token_list[::]
-        subtree, token_list = self.get_not_test(token_list)
-        
+    def get_expression(self):
+        """Parse an expression by precedence climbing: one routine for all
+        the binary operators, driven by their binding powers (INFIX)"""
+        start = self.pos
+        subtree = self.get_operation(0)
         if subtree is None:
-            return None, tokens
-        
-        while token_list[0].get_type() == Token.AND:
-            tok = token_list[0]
-            token_list = token_list[1:]
-            right, token_list = self.get_not_test(token_list)
-            if right is None:
-                return None, tokens
+            self.pos = start
+        return subtree
+        
+    def get_operation(self, min_power):
+        """Parse an operand followed by the operators that bind at least
+        as tight as min_power; returns None if anything is missing"""
+        kinds = self.kinds
+        token = self.tokens.token
+        # the operations waiting for an operand, what would be the calls
+        # of a recursive parser: the RHS of a binary operator, the operand
+        # of 'not' and the expression in a group. Each keeps the min_power
+        # of the operation it is part of, so deep nesting needs no stack
+        frames = []
+        pos = self.pos
+        while True:
+            kind = kinds[pos]
+            leaf = LEAVES[kind]
+            if leaf is not None:
+                subtree = leaf(token(pos))
+                pos += 1
+                if kinds[pos] in TRAILERS:
+                    self.pos = pos
+                    subtree = self.get_trailers(subtree)
+                    if subtree is None:
+                        return None
+                    pos = self.pos
+            elif kind == Kind.NEGATION:
+                # 'not' only starts a not_test, which comparisons and
+                # arithmetic operators do not take as operand
+                if min_power > NOT_POWER:
+                    return None
+                frames.append((NOT_FRAME, min_power, token(pos)))
+                pos += 1
+                min_power = NOT_POWER
+                continue
             else:
-                subtree = BoolBinOp(tok, parent=None, left_child=subtree,
-                                                    right_child=right)
-                                                    
-        return subtree, token_list
-    
-    def get_not_test(self, token_list):
-        if token_list[0].get_type() != Token.NEGATION:
-            return self.get_comparison(token_list)
-        
-        tokens = token_list[::]
-        tok = token_list[0]
-        token_list = token_list[1:]
-        subtree, token_list = self.get_not_test(token_list)
-        if subtree is None:
-            return None, tokens
+                # the signs in front of a group apply to the whole group
+                first = pos
+                while kinds[pos] == Kind.PLUS or kinds[pos] == Kind.MINUS:
+                    pos += 1
+                if kinds[pos] == Kind.LGROUP:
+                    signs = [token(i) for i in range(first, pos)]
+                    frames.append((GROUP_FRAME, min_power, signs))
+                    pos += 1
+                    min_power = 0
+                    continue
+                self.pos = first
+                subtree = self.get_atom()
+                if subtree is None:
+                    return None
+                pos = self.pos
+                
+            while True:
+                infix = INFIX[kinds[pos]]
+                if infix is not None and infix[0] >= min_power:
+                    power, cls = infix
+                    op = token(pos)
+                    pos += 1
+                    leaf = LEAVES[kinds[pos]]
+                    after = AFTER_OPERAND[kinds[pos + 1]] \
+                                            if leaf is not None else None
+                    if leaf is not None and (after is None or
+                                                    after[0] <= power):
+                        # a variable or literal that nothing binds
+                        # tighter to; the most common RHS, built right
+                        # away
+                        subtree = cls(op, None, subtree, leaf(token(pos)))
+                        pos += 1
+                        continue
+                    # every operator is left associative, so its RHS only
+                    # takes the operators that bind tighter
+                    frames.append((cls, min_power, subtree, op))
+                    min_power = power + 1
+                    break
+                # the operand of the innermost waiting operation is whole
+                if not frames:
+                    self.pos = pos
+                    return subtree
+                frame = frames.pop()
+                min_power = frame[1]
+                if frame[0] is NOT_FRAME:
+                    subtree = UnOp(frame[2], parent=None, child=subtree)
+                elif frame[0] is GROUP_FRAME:
+                    if kinds[pos] != Kind.RGROUP:
+                        return None
+                    pos += 1
+                    if kinds[pos] in TRAILERS:
+                        self.pos = pos
+                        subtree = self.get_trailers(subtree)
+                        if subtree is None:
+                            return None
+                        pos = self.pos
+                    for tok in reversed(frame[2]):
+                        subtree = UnOp(tok, parent=None, child=subtree)
+                else:
+                    subtree = frame[0](frame[3], None, frame[2], subtree)
+                                            
+    def get_atom(self):
+        """Parse a variable, literal or array, with its trailers and the
+        signs in front of it; the groups are parsed by get_operation"""
+        kinds = self.kinds
+        # the signs in front of the atom apply to it, innermost last
+        signs = []
+        while kinds[self.pos] == Kind.PLUS or kinds[self.pos] == Kind.MINUS:
+            signs.append(self.tokens[self.pos])
+            self.pos += 1
+        kind = kinds[self.pos]
+        
+        if LEAVES[kind] is not None:
+            subtree = LEAVES[kind](self.tokens[self.pos])
+            self.pos += 1
+        elif kind == Kind.LBRACKET:
+            tok = self.tokens[self.pos]
+            self.pos += 1
+            items = self.get_items(Kind.RBRACKET)
+            if items is None:
+                return None
+            subtree = ArrayLiteral(tok, parent=None, items=items)
         else:
-            return UnOp(tok, parent=None, child=subtree), token_list
-            
-    def get_comparison(self, token_list):
-        tokens = token_list[::]
-        subtree, token_list = self.get_arith(token_list)
-        
-        if subtree is None:
-            return None, tokens
-            
-        comp_ops = [Token.EQUALITY, Token.INEQUALITY, Token.GREATER,
-                    Token.LESSER, Token.GREATEREQUAL, Token.LESSEREQUAL]
-        while token_list[0].get_type() in comp_ops:
-            op = token_list[0]
-            token_list = token_list[1:]
-            right, token_list = self.get_arith(token_list)
-            if right is None:
-                return None, tokens
-            else:
-                subtree = CompBinOp(op, parent=None, left_child=subtree,
-                                                    right_child=right)
-                                                    
-        return subtree, token_list
-        
-    def get_arith(self, token_list):
-        tokens = token_list[::]
-        subtree, token_list = self.get_term(token_list)
-        
-        if subtree is None:
-            return None, tokens
-            
-        while token_list[0].get_type() in [Token.PLUS, Token.MINUS]:
-            op = token_list[0]
-            token_list = token_list[1:]
-            right, token_list = self.get_term(token_list)
-            if right is None:
-                return None, tokens
-            else:
-                subtree = ArithBinOp(op, parent=None, left_child=subtree,
-                                                    right_child=right)
-                                                    
-        return subtree, token_list
-        
-    def get_term(self, token_list):
-        tokens = token_list[::]
-        subtree, token_list = self.get_factor(token_list)
-        
-        if subtree is None:
-            return None, tokens
-            
-        while token_list[0].get_type() in [Token.PRODUCT, Token.DIVISION]:
-            op = token_list[0]
-            token_list = token_list[1:]
-            right, token_list = self.get_factor(token_list)
-            if right is None:
-                return None, tokens
-            else:
-                subtree = ArithBinOp(op, parent=None, left_child=subtree,
-                                                    right_child=right)
-                                                    
-        return subtree, token_list
-        
-    def get_factor(self, token_list):
-        tokens = token_list[::]
-        subtree, token_list = self.get_atom(token_list)
-        
-        if subtree is None:
-            return None, tokens
-            
-        while token_list[0].get_type() == Token.POWER:
-            op = token_list[0]
-            token_list = token_list[1:]
-            right, token_list = self.get_atom(token_list)
-            if right is None:
-                return None, tokens
-            else:
-                subtree = ArithBinOp(op, parent=None, left_child=subtree,
-                                                    right_child=right)
-                                                    
-        return subtree, token_list
-        
-    def get_atom(self, token_list): 
-        tokens = token_list[::]
-        
-        literals = [Token.BOOL, Token.INTEGER, Token.FLOAT,
-                    Token.NULL, Token.STRING, Token.BOOL]
-        
-        if token_list[0].get_type() in [Token.PLUS, Token.MINUS]:
-            op = token_list[0]
-            token_list = token_list[1:]
-            subtree, token_list = self.get_atom(token_list)
+            return None
+        if kinds[self.pos] in TRAILERS:
+            subtree = self.get_trailers(subtree)
             if subtree is None:
-                return None, tokens
-            else:
-                return UnOp(op, parent=None, child=subtree), token_list
-                
-        elif token_list[0].get_type() in literals:
-            return Literal(token_list[0]), token_list[1:]
-            
-        elif token_list[0].get_type() == Token.USER_VAR:
-            return Variable(token_list[0]), token_list[1:]
+                return None
             
-        elif token_list[0].get_type() == Token.LGROUP:
-            subtree, token_list = self.get_expression(token_list[1:])
-            if subtree is None or token_list[0].get_type() != Token.RGROUP:
-                return None, tokens
+        for tok in reversed(signs):
+            subtree = UnOp(tok, parent=None, child=subtree)
+        return subtree
+        
+    def get_trailers(self, subtree):
+        """Parse the indexing that follows the operand subtree, or the
+        arguments if it is the name of a function"""
+        kinds = self.kinds
+        while True:
+            kind = kinds[self.pos]
+            if kind == Kind.LBRACKET:
+                tok = self.tokens[self.pos]
+                self.pos += 1
+                index = self.get_operation(0)
+                if index is None or kinds[self.pos] != Kind.RBRACKET:
+                    return None
+                self.pos += 1
+                subtree = Index(tok, None, subtree, index)
+            elif kind == Kind.LGROUP and type(subtree) is Variable:
+                # the only place a name is followed by a '('
+                tok = subtree.token
+                self.pos += 1
+                items = self.get_items(Kind.RGROUP)
+                if items is None:
+                    return None
+                if tok.value not in FUNCTIONS:
+                    self.error("Unknown function '{}'".format(tok.value))
+                _, least, most = FUNCTIONS[tok.value]
+                if not least <= len(items) <= most:
+                    self.error("{} takes {} arguments, not {}".format(
+                        tok.value, least if least == most else
+                        "{} or {}".format(least, most), len(items)))
+                subtree = Call(tok, parent=None, items=items)
             else:
-                return subtree, token_list[1:]
+                return subtree
                 
-        else:
-            return None, token_list
+    def get_items(self, closing):
+        """Parse the expressions separated by commas up to the closing
+        token, of kind closing; returns the list of their subtrees"""
+        kinds = self.kinds
+        items = []
+        if kinds[self.pos] == closing:
+            self.pos += 1
+            return items
+        while True:
+            item = self.get_operation(0)
+            if item is None:
+                return None
+            items.append(item)
+            if kinds[self.pos] == closing:
+                self.pos += 1
+                return items
+            if kinds[self.pos] != Kind.COMMA:
+                return None
+            self.pos += 1
         
     def error(self, msg):
-        print(msg)
-        exit()
+        raise ParserException(msg)
         
     def show(self):
         strings = self.root.get_strings()
@@ -587,6 +813,10 @@ class Parser(object):
             
         print(simplify(strings, 0))
         
+# the get_ method of the statement that starts with each token kind
+STMT_RULES = {KIND[typ]: getattr(Parser, "get_" + rules[0])
+                for typ, rules in PREDICT["stmt"].items() if len(rules) == 1}
+        
 class NodeVisitor(object):
     """Implement the Visitor pattern for the interpreter"""
     def __init__(self):
@@ -605,35 +835,104 @@ class NodeVisitor(object):
         
     def no_visit(self, node):
         """Generic error-signaling visit_ method"""
-        print("There is no visit_ method for " + str(node))
-        exit()
+        raise Fault("There is no visit_ method for " + str(node))
+        
+# the value of the variables that were not assigned yet
+UNDEFINED = object()
+# marks an operand that was not evaluated yet
+NOT_EVALUATED = object()
+# the value of a 'return' statement
+RETURNED = object()
         
 class Interpreter(NodeVisitor):
     """Implement the Interpreter;
-    Its only argument is a parser. Interprets the program by recursively
-        traversing the tree the parser provides."""
-    def __init__(self, parser):
+    Its argument is a parser. Interprets the program by recursively
+        traversing the tree the parser provides. The read and out
+        statements use the reader and the writer given (see channels.py),
+        by default the console."""
+    def __init__(self, parser, reader=None, writer=None):
         NodeVisitor.__init__(self)
         self.parser = parser
-        self.variables = {}
-        
-    def evaluate(self):
-        """Entry point to the recursive evaluation of the program"""
+        self.reader = reader if reader is not None else ConsoleReader()
+        self.writer = writer if writer is not None else ConsoleWriter()
+        self.resolver = None
+        # the values of the variables, indexed by their slot
+        self.frame = []
+        # the token of the stop, jumpover or halt being run, if any, the
+        # value of the last halt and of the last return
+        self.signal = None
+        self.halted = None
+        self.returned = None
+        # number of nodes quickened and turned back into generic nodes
+        self.quickened = 0
+        self.deoptimized = 0
+        
+    def resolve(self):
+        """Build the tree, if needed, and assign the variables their
+        slots in the frame, only once"""
         # ensure we have generated a tree
         if self.parser.root is None:
             self.parser.get_program()
-            
-        return self.visit(self.parser.root)
+        if self.resolver is None:
+            # imported here as the resolver needs the Node classes
+            from resolver import Resolver
+            self.resolver = Resolver()
+            self.resolver.resolve(self.parser.root)
+            self.frame = [UNDEFINED] * len(self.resolver.names)
+        return self.resolver
+        
+    def execute(self, variables=None):
+        """Run the program with fresh variables, or the ones given, and
+        return the value of its last statement; errors are raised as
+        RojExceptions (a Fault, or a Halt for 'halt')"""
+        self.resolve()
+        self.frame = [UNDEFINED] * len(self.frame)
+        self.signal = None
+        if variables:
+            self.variables = variables
+        try:
+            return self.visit(self.parser.root)
+        finally:
+            self.writer.flush()
+        
+    def evaluate(self):
+        """Entry point to the recursive evaluation of the program; prints
+        the value of the program, or the error, and exits on errors"""
+        try:
+            value = self.execute()
+        except Fault as e:
+            print(e.msg)
+            exit()
+        print("program terminated; return value <{}>".format(value))
+        
+    @property
+    def variables(self):
+        """The values of the variables, indexed by name"""
+        if self.resolver is None:
+            return {}
+        return {name: value for name, value in
+                    zip(self.resolver.names, self.frame)
+                        if value is not UNDEFINED}
+    
+    @variables.setter
+    def variables(self, values):
+        """Set the values of the variables the program uses; the other
+        values are not looked at, so values can be a large environment"""
+        slots = self.resolve().slots
+        for name, slot in slots.items():
+            if name in values:
+                self.frame[slot] = values[name]
         
     def visit_Variable(self, node):
         """Handle evaluation of a variable"""
         # This only gets called if we need the variable in an expression
         # Assignment is directly taken care by the BinOp assignment
-        name = node.token.value
-        if name not in self.variables.keys():
-            self.error("Undefined variable '{}'".format(name))
+        value = self.frame[node.slot]
+        # the Resolver tells which reads can not fail
+        if node.checked and value is UNDEFINED:
+            self.error("Undefined variable '{}'".format(node.token.value))
         else:
-            return self.variables[name]
+            return value
         
     def visit_Literal(self, node):
         """Handle the evaluation of a literal"""
@@ -646,14 +945,20 @@ class Interpreter(NodeVisitor):
         if tok.get_type() is Token.WHILE:
             expr = node.left
             suite = node.right
+            if not node.signals:
+                while self.visit(expr):
+                    self.visit(suite)
+                return None
             while self.visit(expr):
-                # we may execute a stop or halt statement, check for that
-                r = self.visit(suite)
-                if isinstance(r, Token):
-                    if r.get_type() == Token.STOP:
+                self.visit(suite)
+                # we may execute a stop, jumpover or halt statement
+                signal = self.signal
+                if signal is not None:
+                    if signal.get_type() is Token.HALT:
+                        return None
+                    self.signal = None
+                    if signal.get_type() is Token.STOP:
                         break
-                    elif r.get_type() == Token.HALT:
-                        return r
                 
         elif tok.get_type() is Token.IF:
             condition = node.left
@@ -670,23 +975,25 @@ class Interpreter(NodeVisitor):
         tok = node.token
         left = self.visit(node.left)
         if tok.get_type() is Token.EOF:
-            ### we may have returned a halt/stop/return/jumpover
-            # all the way here; act accordingly
-            if isinstance(left, Token):
-                if left.get_type() == Token.HALT:
-                    self.error("program halted: {}".format(left.value))
+            ### a halt/stop/jumpover may have been signaled or a return
+            # may have gotten all the way here; act accordingly
+            signal = self.signal
+            if signal is not None:
+                self.signal = None
+                if signal.get_type() is Token.HALT:
+                    raise Halt(self.halted)
                 # if one of these control stmts got here it was misused
-                elif left.get_type() in [Token.JUMPOVER, Token.STOP,
-                                        Token.RETURN]:
-                    self.error("{} used out of scope".format(left.value))
-            print("program terminated; return value <{}>".format(left))
+                self.error("{} used out of scope".format(signal.value))
+            if left is RETURNED:
+                self.error("{} used out of scope".format(self.returned))
+            return left
         elif tok.get_type() is Token.MINUS:
-            if type(left) not in [int, float]:
+            if type(left) not in [int, float, Array]:
                 self.error("- did not expect value of type {}".format(
                                                 type(left).__name__))
             return -1 * (left)
         elif tok.get_type() is Token.PLUS:
-            if type(left) not in [int, float]:
+            if type(left) not in [int, float, Array]:
                 self.error("+ did not expect value of type {}".format(
                                                 type(left).__name__))
             return left
@@ -703,7 +1010,7 @@ class Interpreter(NodeVisitor):
         tok = node.token
         if tok.get_type() in [Token.READINT, Token.READFLOAT,
                             Token.READBOOL, Token.READ]:
-            inp = input("[in]: ")
+            inp = self.reader.read()
             # readint, readfloat and readbool require type conversion
             if tok.get_type() is Token.READINT:
                 try:
@@ -720,13 +1027,12 @@ class Interpreter(NodeVisitor):
                     inp = eval(inp)
                 else:
                     self.error("Could not read a boolean")
-            var_name = node.left.token.value
-            self.variables[var_name] = inp
+            self.frame[node.left.slot] = inp
             return inp
             
         elif tok.get_type() == Token.OUT:
             val = self.visit(node.left)
-            print("[out]:", val)
+            self.writer.write(val)
             return val
             
         else:
@@ -736,32 +1042,38 @@ class Interpreter(NodeVisitor):
         """Handle the evaluation of control operators"""
         tok = node.token
         if tok.get_type() in [Token.STOP, Token.JUMPOVER]:
-            return tok
-        elif tok.get_type() in [Token.HALT, Token.RETURN]:
-            # they may be returning a result; save it
-            tok.value = self.visit(node.left)
-            return tok
+            self.signal = tok
+        elif tok.get_type() is Token.HALT:
+            self.halted = self.visit(node.left)
+            self.signal = tok
+        elif tok.get_type() is Token.RETURN:
+            self.returned = self.visit(node.left)
+            return RETURNED
         else:
             self.error("Unknown control operator{}".format(tok))
             
+    def visit_Block(self, node):
+        """Handle the evaluation of a suite of statements"""
+        visit = self.visit
+        r = None
+        if not node.signals:
+            for stmt in node.statements:
+                r = visit(stmt)
+            return r
+        for stmt in node.statements:
+            r = visit(stmt)
+            # a signaled stop/jumpover/halt is left for the loop or the
+            # end of the program to handle
+            if self.signal is not None:
+                return None
+        return r
+            
     def visit_BinOp(self, node):
         """Handle the evaluation of generic binary operators"""
         tok = node.token
-        if tok.get_type() is Token.SEPARATOR:
-            # we may get a control token; these must be passed up
-            # on the recursive calls to stop the program/alter the
-            # flow of a loop construct
-            r = self.visit(node.left)
-            if isinstance(r, Token):
-                if r.get_type() in [Token.JUMPOVER, Token.STOP,
-                                    Token.HALT]:
-                    return r
-                    
-            return self.visit(node.right)
-        elif tok.get_type() is Token.ASSIGNMENT:
-            var_name = node.left.token.value
-            self.variables[var_name] = self.visit(node.right)
-            return self.variables[var_name]
+        if tok.get_type() is Token.ASSIGNMENT:
+            value = self.frame[node.left.slot] = self.visit(node.right)
+            return value
         else:
             raise InterpreterException(
                     "Unknown binary operator{}".format(tok))
@@ -787,9 +1099,25 @@ class Interpreter(NodeVisitor):
             
     def visit_CompBinOp(self, node):
         """Handle the evaluation of comparison operators"""
-        tok = node.token
+        return self.compare(node, self.visit(node.left),
+                                    self.visit(node.right))
+        
+    def visit_QuickCompBinOp(self, node):
+        """Handle the evaluation of quickened comparison operators"""
         left = self.visit(node.left)
         right = self.visit(node.right)
+        if type(left) is node.operand and type(right) is node.operand:
+            return node.operation(left, right)
+        self.deoptimize(node)
+        return self.compare(node, left, right)
+        
+    visit_IntCompBinOp = visit_FloatCompBinOp = visit_QuickCompBinOp
+        
+    def compare(self, node, left, right):
+        """Evaluate the comparison node given the values of its sides"""
+        tok = node.token
+        if node.feedback:
+            self.feedback(node, left, right)
         
         # does not need type checking
         if tok.get_type() is Token.EQUALITY:
@@ -798,10 +1126,10 @@ class Interpreter(NodeVisitor):
             return left != right
         
         # cannot compare strings or booleans with these operators
-        if type(left) not in [int, float]:
+        if type(left) not in [int, float, Array]:
             raise TypeException("LHS of {} operator cannot be of type {}".format(
                         tok.value, type(left).__name__))
-        if type(right) not in [int, float]:
+        if type(right) not in [int, float, Array]:
             raise TypeException("RHS of {} operator cannot be of type {}".format(
                         tok.value, type(right).__name__))
         if tok.get_type() is Token.GREATER:
@@ -817,24 +1145,45 @@ class Interpreter(NodeVisitor):
             
     def visit_ArithBinOp(self, node):
         """Handle the evaluation of arithmetic binary operators"""
+        return self.arith(node, self.visit(node.left))
+        
+    def visit_QuickArithBinOp(self, node):
+        """Handle the evaluation of quickened arithmetic operators"""
+        left = self.visit(node.left)
+        if type(left) is not node.operand:
+            self.deoptimize(node)
+            return self.arith(node, left)
+        right = self.visit(node.right)
+        if type(right) is not node.operand:
+            self.deoptimize(node)
+            return self.arith(node, left, right)
+        return node.operation(left, right)
+        
+    visit_IntArithBinOp = visit_FloatArithBinOp = visit_QuickArithBinOp
+        
+    def arith(self, node, left, right=NOT_EVALUATED):
+        """Evaluate the arithmetic node given the value of its LHS and,
+        if it was already evaluated, of its RHS"""
         tok = node.token
         # do some type checking to enforce correct expressions
-        left = self.visit(node.left)
-        if type(left) not in [int, float, str]:
+        if type(left) not in [int, float, str, Array]:
             raise TypeException("LHS of {} operator cannot be of type {}".format(
                         tok.value, type(left).__name__))
-        right = self.visit(node.right)
-        if type(right) not in [int, float, str]:
+        if right is NOT_EVALUATED:
+            right = self.visit(node.right)
+        if type(right) not in [int, float, str, Array]:
             raise TypeException("RHS of {} operator cannot be of type {}".format(
                         tok.value, type(right).__name__))
+        if node.feedback:
+            self.feedback(node, left, right)
         if tok.get_type() is Token.PLUS:
             return left + right
             
         # Token.PLUS is the only one to handle anything beyond numbers
-        if type(left) not in [int, float]:
+        if type(left) not in [int, float, Array]:
             raise TypeException("LHS of {} operator cannot be of type {}".format(
                         tok.value, type(left).__name__))
-        if type(right) not in [int, float]:
+        if type(right) not in [int, float, Array]:
             raise TypeException("RHS of {} operator cannot be of type {}".format(
                         tok.value, type(right).__name__))
         if tok.get_type() is Token.MINUS:
@@ -848,9 +1197,46 @@ class Interpreter(NodeVisitor):
         else:
             self.error("Unknown arithmetic binary operator{}".format(tok))
             
+    def visit_ArrayLiteral(self, node):
+        """Handle the evaluation of array literals"""
+        return arrays.build([self.visit(item) for item in node.items])
+        
+    def visit_Index(self, node):
+        """Handle the evaluation of indexing"""
+        value = self.visit(node.left)
+        return arrays.index(value, self.visit(node.right))
+        
+    def visit_Call(self, node):
+        """Handle the calls of the built-in functions (arrays.py)"""
+        function = FUNCTIONS[node.token.value][0]
+        return function(*[self.visit(item) for item in node.items])
+            
+    def feedback(self, node, left, right):
+        """Record the types of the operands of node; once it has seen
+        QUICKEN_AFTER times in a row two ints, or two floats, the node
+        is quickened"""
+        typ = type(left)
+        if typ is not type(right) or (typ is not int and typ is not float):
+            node.seen = None
+            node.count = 0
+        elif node.seen is typ:
+            node.count += 1
+            if node.count >= QUICKEN_AFTER:
+                node.__class__ = QUICK_CLASSES[(type(node), typ)]
+                node.operation = OPERATIONS[node.token.get_type()]
+                self.quickened += 1
+        else:
+            node.seen = typ
+            node.count = 1
+            
+    def deoptimize(self, node):
+        """Turn a quickened node back into its generic class, for good"""
+        node.__class__ = node.generic
+        node.feedback = False
+        self.deoptimized += 1
+            
     def error(self, msg):
-        print(msg)
-        exit()
+        raise Fault(msg)
 
 if __name__ == "__main__":
     while True:
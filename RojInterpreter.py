@@ -1,27 +1,189 @@
 s = """Roj Interpreter [v1.0.1]
 by Rodrigo Girao Serrao"""
 
+import argparse
 from ASTParser import Parser, Interpreter
+from bytecodeVM import VMInterpreter
+from closureCompiler import ClosureInterpreter
+from pyTranspiler import PythonInterpreter
+from stackEvaluator import StackInterpreter
+from resolver import Resolver
+from profiler import ProfilingInterpreter
+from runStats import RunStats, CountingInterpreter
+from programCache import ProgramCache
+from channels import FileReader, BufferedWriter
+from errorSystem import RojException
+from runtime import finish
+from time import perf_counter
+
+# the engines that can run a program; all take a Parser and execute()
+ENGINES = {"tree": Interpreter,
+            "vm": VMInterpreter,
+            "closure": ClosureInterpreter,
+            "python": PythonInterpreter,
+            "stack": StackInterpreter}
+
+arg_parser = argparse.ArgumentParser(description="Roj interpreter")
+arg_parser.add_argument("--engine", choices=sorted(ENGINES), default="tree",
+                    help="tree walks the AST, vm compiles it to bytecode, "
+                        "closure compiles it to Python closures, "
+                        "python translates it to Python source, "
+                        "stack walks the AST without recursing into "
+                        "expressions")
+arg_parser.add_argument("--no-optimize", action="store_true",
+                    help="run the tree as parsed, without constant folding "
+                        "and dead branch elimination")
+arg_parser.add_argument("--optimizer-report", action="store_true",
+                    help="print what the optimizer removed from each program")
+arg_parser.add_argument("--warnings", action="store_true",
+                    help="report the variables that are read before being "
+                        "assigned, before running each program")
+arg_parser.add_argument("--profile", action="store_true",
+                    help="time every line of the programs and print the "
+                        "most expensive ones (tree engine only)")
+arg_parser.add_argument("--stats", action="store_true",
+                    help="print the time spent in each phase and the size "
+                        "of each program after running it")
+arg_parser.add_argument("--input", default=None,
+                    help="answer the read statements with the lines of this "
+                        "file instead of asking for them")
+arg_parser.add_argument("--buffer-output", type=int, default=0, metavar="N",
+                    help="write the outputs of the programs in batches of "
+                        "N lines instead of one line at a time")
+arg_parser.add_argument("--cache-dir", default=None,
+                    help="keep the parsed trees of the executed files in "
+                        "this directory and reuse them while the files do "
+                        "not change")
+arg_parser.add_argument("--cache-size", type=int, default=64,
+                    help="size limit of the cache, in megabytes")
+args = arg_parser.parse_args()
+if args.profile and args.engine != "tree":
+    arg_parser.error("--profile needs the tree engine")
+Engine = ENGINES[args.engine]
+optimize = not args.no_optimize
+report = args.optimizer_report
+warnings = args.warnings
+profile = args.profile
+stats = args.stats
+if profile:
+    Engine = ProfilingInterpreter
+elif stats and Engine is Interpreter:
+    Engine = CountingInterpreter
+reader = writer = None
+if args.input is not None:
+    reader = FileReader(open(args.input, "r"))
+if args.buffer_output > 0:
+    writer = BufferedWriter(max_lines=args.buffer_output)
+cache = None
+if args.cache_dir is not None:
+    cache = ProgramCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+## The session: every input is parsed on its own and run with the values
+# the variables got from the inputs before it, kept in env by name; only
+# the variables of the new input are looked up and stored, so an input
+# takes as long as it would in a fresh session
+env = {}
+# print the time to parse and run each input (:time)
+timing = False
+# the python engine infers the types of the variables from the program
+# alone, so it can not start from the values of the session
+persistent = args.engine != "python"
+
+def run(source, from_file):
+    """Parse and run one program, typed or read from a file, in the
+    session"""
+    # the cached trees have no line numbers for the profiler
+    cached = cache is not None and from_file and not profile
+    tree = None
+    if cached:
+        tree = cache.load(source, optimize)
+    start = perf_counter()
+    if tree is None:
+        tree = Parser(source, optimize=optimize, positions=profile)
+        if cached:
+            cache.store(source, tree, optimize)
+    interpreter = Engine(tree, reader, writer)
+    if report or warnings or stats or timing:
+        # so that building the tree is not timed as evaluation
+        tree.get_program()
+    parsed = perf_counter() - start
+    if report and tree.optimizer is not None:
+        print(tree.optimizer.report())
+    if warnings:
+        resolver = Resolver()
+        resolver.resolve(tree.root)
+        for warning in resolver.warnings(env if persistent else ()):
+            print("warning:", warning)
+    start = perf_counter()
+    try:
+        if persistent:
+            finish(interpreter.execute(env))
+        else:
+            finish(interpreter.execute())
+    finally:
+        # also when the program ended with an error, as the variables it
+        # assigned before it keep their values
+        elapsed = perf_counter() - start
+        if persistent:
+            env.update(interpreter.variables)
+        if timing:
+            print("parsed in {:.3f} ms, ran in {:.3f} ms".format(
+                                            parsed * 1e3, elapsed * 1e3))
+        if profile:
+            print(interpreter.report())
+        if stats:
+            run_stats = RunStats()
+            run_stats.record_parser(tree)
+            run_stats.record_interpreter(interpreter, elapsed)
+            print(run_stats.report())
+            if cache is not None:
+                print(cache.report())
+
+def command(inp):
+    """Run one of the commands of the session"""
+    global timing
+    if inp == ":reset":
+        env.clear()
+        print("the variables were cleared")
+    elif inp == ":vars":
+        for name in sorted(env):
+            print("{} = {!r}".format(name, env[name]))
+        if not env:
+            print("no variables")
+    elif inp == ":time":
+        timing = not timing
+        print("timing is {}".format("on" if timing else "off"))
+    else:
+        print("Unknown command; the commands are :reset, :vars and :time")
 
 print(s)
+if not persistent:
+    print("the python engine does not keep the variables between inputs")
 
 inp = None
 
 inp = input(">> ")
 while inp != "quit":
-    if inp.startswith("execute"):
+    from_file = False
+    if inp.startswith(":"):
+        command(inp.strip())
+        inp = ""
+    elif inp.startswith("execute"):
         args = inp.split()
         filename = args[1]
         try:
             with open(filename, "r") as f:
                 inp = f.read()
+            from_file = True
         except FileNotFoundError:
             print("File not found")
             inp = ""
-            
+
     if inp:
-        tree = Parser(inp)
-        interpreter = Interpreter(tree)
-        print(interpreter.evaluate())
-    
-    inp = input(">> ")
\ No newline at end of file
+        try:
+            run(inp, from_file)
+        except RojException as e:
+            # the program could not be parsed, or its evaluation failed
+            print("{}: {}".format(e.name, "; ".join(e.args)))
+
+    inp = input(">> ")
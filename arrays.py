@@ -0,0 +1,232 @@
+### The array values of Roj: sequences of numbers (or booleans) whose
+### operators apply to every item at once
+
+## An Array keeps its items in a list of Python ints, floats or bools, all
+# of the same type (kind); a BoolArray is what comparing arrays gives.
+# array.array was tried: it is smaller, but every item read from it is a
+# new Python object, which makes the reductions three times slower
+## The Python operators are overloaded to work item by item, with an array
+# or a number on the other side, so the engines compute a + b and a == b
+# for arrays with the code they have for numbers; the loop over the items
+# is a map over the storage, which runs in C instead of as Roj statements
+## The engines type check the operands before they reach these operators:
+# a BoolArray is not a number, so it is rejected by arithmetic and by
+# ordering comparisons, like a bool is
+## NumPy is not used: its fixed size ints wrap around where the ints of
+# Roj grow, and it divides by zero without an error, so arrays would not
+# compute what the same operations on their items compute
+## The built-in functions are called by name (see FUNCTIONS); the parser
+# checks the name and the number of arguments of every call
+
+from itertools import repeat
+from errorSystem import *
+import operator
+
+def fault(msg):
+    """Returns the Fault for a runtime error of the program"""
+    # imported here as runtime needs the Array classes
+    from runtime import Fault
+    return Fault(msg)
+
+class Array(object):
+    """An array of ints or floats; items is its storage and kind the type
+    of its items"""
+    __slots__ = ("items", "kind")
+
+    def __init__(self, items, kind):
+        self.items = items
+        self.kind = kind
+
+    def values(self):
+        """Returns the items as Roj values"""
+        return list(self.items)
+
+    def __str__(self):
+        return "[{}]".format(", ".join(map(str, self.values())))
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __bool__(self):
+        # every array would be true otherwise, 'while a > 0 do' would
+        # never end
+        raise TypeException("An array cannot be used as a condition")
+
+    def __add__(self, other):
+        return arith(operator.add, "+", self, other)
+
+    def __radd__(self, other):
+        return arith(operator.add, "+", other, self)
+
+    def __sub__(self, other):
+        return arith(operator.sub, "-", self, other)
+
+    def __rsub__(self, other):
+        return arith(operator.sub, "-", other, self)
+
+    def __mul__(self, other):
+        return arith(operator.mul, "*", self, other)
+
+    def __rmul__(self, other):
+        return arith(operator.mul, "*", other, self)
+
+    def __truediv__(self, other):
+        return arith(operator.truediv, "/", self, other)
+
+    def __rtruediv__(self, other):
+        return arith(operator.truediv, "/", other, self)
+
+    def __pow__(self, other):
+        return arith(pow, "^", self, other)
+
+    def __rpow__(self, other):
+        return arith(pow, "^", other, self)
+
+    # the engines only let numbers and Arrays get to the ordering ones
+    def __eq__(self, other):
+        return compare(operator.eq, self, other)
+
+    def __ne__(self, other):
+        return compare(operator.ne, self, other)
+
+    def __lt__(self, other):
+        return compare(operator.lt, self, other)
+
+    def __gt__(self, other):
+        return compare(operator.gt, self, other)
+
+    def __le__(self, other):
+        return compare(operator.le, self, other)
+
+    def __ge__(self, other):
+        return compare(operator.ge, self, other)
+
+class BoolArray(Array):
+    """An array of booleans"""
+    __slots__ = ()
+
+    def __init__(self, items):
+        Array.__init__(self, items, bool)
+
+ARRAYS = (Array, BoolArray)
+
+def build(values):
+    """Returns the array of the list of values; ints and floats together
+    make an array of floats"""
+    types = set(map(type, values))
+    if types <= {int}:
+        return Array(values, int)
+    elif types == {float}:
+        return Array(values, float)
+    elif types == {int, float}:
+        return Array(list(map(float, values)), float)
+    elif types == {bool}:
+        return BoolArray(values)
+    others = types - {int, float, bool}
+    if others:
+        raise TypeException("An array cannot hold values of type {}".format(
+                                    min(typ.__name__ for typ in others)))
+    raise TypeException("An array cannot hold both booleans and numbers")
+
+def operands(left, right):
+    """Returns the sequences of items an elementwise operator combines;
+    one of left and right is an array"""
+    if type(left) not in ARRAYS:
+        return repeat(left), right.items
+    if type(right) not in ARRAYS:
+        return left.items, repeat(right)
+    if len(left.items) != len(right.items):
+        raise fault("Arrays of different lengths, {} and {}".format(
+                                    len(left.items), len(right.items)))
+    return left.items, right.items
+
+def arith(op, symbol, left, right):
+    """Apply the arithmetic operator op to the items of left and right"""
+    # + is the only operator the engines let strings get to
+    if type(left) is str:
+        raise TypeException("LHS of {} operator cannot be of type str"
+                                                            .format(symbol))
+    if type(right) is str:
+        raise TypeException("RHS of {} operator cannot be of type str"
+                                                            .format(symbol))
+    l, r = operands(left, right)
+    if op is pow:
+        # an int to a negative power is a float
+        return build(list(map(op, l, r)))
+    floats = getattr(left, "kind", type(left)) is float or \
+                getattr(right, "kind", type(right)) is float
+    kind = float if floats or op is operator.truediv else int
+    return Array(list(map(op, l, r)), kind)
+
+def compare(op, left, right):
+    """Apply the comparison operator op to the items of left and right"""
+    l, r = operands(left, right)
+    return BoolArray(list(map(op, l, r)))
+
+def index(value, i):
+    """Returns the item i of the array value"""
+    if type(value) not in ARRAYS:
+        raise TypeException("Cannot index a value of type {}".format(
+                                                    type(value).__name__))
+    if type(i) is not int:
+        raise TypeException("An array index must be an int, not a {}"
+                                                .format(type(i).__name__))
+    if not 0 <= i < len(value.items):
+        raise fault("Index {} out of range for an array of {} items".format(
+                                                    i, len(value.items)))
+    return value.items[i]
+
+def argument(name, value):
+    """Returns the storage of the array passed to the function name"""
+    if type(value) not in ARRAYS:
+        raise TypeException("{} expects an array, not a {}".format(name,
+                                                    type(value).__name__))
+    return value.items
+
+### The built-in functions
+
+# the value of array(n), which has no second argument
+NOT_GIVEN = object()
+
+def new(size, value=NOT_GIVEN):
+    """array(n) is the ints 0 to n-1, array(n, v) is n times v"""
+    if type(size) is not int:
+        raise TypeException("The size of an array must be an int, not a {}"
+                                            .format(type(size).__name__))
+    if size < 0:
+        raise fault("The size of an array cannot be negative")
+    if value is NOT_GIVEN:
+        return Array(list(range(size)), int)
+    return repeated(build([value]), size)
+
+def repeated(one, size):
+    """Returns the array of size copies of the only item of one"""
+    if type(one) is BoolArray:
+        return BoolArray(one.items * size)
+    return Array(one.items * size, one.kind)
+
+def length(value):
+    return len(argument("len", value))
+
+def total(value):
+    items = argument("sum", value)
+    return sum(items, 0.0) if value.kind is float else sum(items)
+
+def smallest(value):
+    items = argument("min", value)
+    if not len(items):
+        raise fault("min of an empty array")
+    return min(items)
+
+def largest(value):
+    items = argument("max", value)
+    if not len(items):
+        raise fault("max of an empty array")
+    return max(items)
+
+# name -> (function, least and most arguments)
+FUNCTIONS = {"array": (new, 1, 2),
+            "len": (length, 1, 1),
+            "sum": (total, 1, 1),
+            "min": (smallest, 1, 1),
+            "max": (largest, 1, 1)}
@@ -0,0 +1,147 @@
+### Runs one Roj program over many input sets with a pool of processes
+
+## Usage:
+#   python batchRunner.py program.roj inputs.jsonl [-o results.jsonl]
+#                   [-j N] [--engine tree] [--chunksize 64] [--no-optimize]
+## Every line of the inputs file is a JSON list with the answers to the
+# read statements of one run of the program. The program is parsed (and
+# optimized) once; its tree is sent to the workers, which rebuild it once
+# and run it for every record they are given with a fresh set of variables
+## One JSON line is written per record, in the order of the inputs:
+#   {"record": <line number>, "outputs": [<value of every out>],
+#    "error": null or the error message}
+# and the number of records, of errors and the throughput go to stderr
+
+import argparse
+import json
+import marshal
+import multiprocessing
+import os
+import sys
+from time import perf_counter
+from ASTParser import Parser, Interpreter
+from bytecodeVM import VMInterpreter
+from closureCompiler import ClosureInterpreter
+from pyTranspiler import PythonInterpreter
+from stackEvaluator import StackInterpreter
+from programCache import CachedProgram, dump_tree, load_tree
+from channels import IterReader, ListWriter
+from errorSystem import RojException
+import runtime
+
+ENGINES = {"tree": Interpreter,
+            "vm": VMInterpreter,
+            "closure": ClosureInterpreter,
+            "python": PythonInterpreter,
+            "stack": StackInterpreter}
+
+class Worker(object):
+    """Runs the program for one record at a time; the engine, with its
+    compiled program, and the channels are reused for every record"""
+    def __init__(self, tree, engine):
+        program = CachedProgram(load_tree(marshal.loads(tree)), None, {})
+        self.reader = IterReader([])
+        self.writer = ListWriter()
+        self.engine = ENGINES[engine](program, self.reader, self.writer)
+
+    def run(self, record):
+        """Returns the result of running the program with the inputs of
+        the record, a (line number, JSON line) pair"""
+        number, line = record
+        result = {"record": number, "outputs": [], "error": None}
+        try:
+            inputs = json.loads(line)
+            if not isinstance(inputs, list):
+                raise ValueError("the inputs are not a JSON list")
+        except ValueError as e:
+            result["error"] = "bad record: {}".format(e)
+            return result
+
+        self.reader.lines = iter(inputs)
+        self.writer.values = result["outputs"]
+        try:
+            self.engine.execute()
+        except runtime.Fault as e:
+            result["error"] = e.msg
+        except EOFError:
+            result["error"] = "not enough inputs"
+        except RojException as e:
+            result["error"] = "{}: {}".format(e.name, "; ".join(e.args))
+        except Exception as e:
+            # errors the engines do not catch, like "a" + 1
+            result["error"] = "{}: {}".format(type(e).__name__, e)
+        return result
+
+# the Worker of each process of the pool
+worker = None
+
+def init_worker(tree, engine):
+    global worker
+    worker = Worker(tree, engine)
+
+def run_record(record):
+    return worker.run(record)
+
+def records(file):
+    """Yields (line number, line) for the non-empty lines of file"""
+    for number, line in enumerate(file, 1):
+        if line.strip():
+            yield number, line
+
+def run_batch(source, inputs, output, jobs=None, engine="tree",
+                                    chunksize=64, optimize=True):
+    """Run the program in source for every record of the file inputs and
+    write the results to the file output; returns (records, errors)"""
+    parser = Parser(source, optimize=optimize)
+    parser.get_program()
+    tree = marshal.dumps(dump_tree(parser.root))
+
+    count = errors = 0
+    if jobs == 1:
+        init_worker(tree, engine)
+        results = map(run_record, records(inputs))
+        pool = None
+    else:
+        pool = multiprocessing.Pool(jobs, init_worker, (tree, engine))
+        results = pool.imap(run_record, records(inputs), chunksize)
+    try:
+        for result in results:
+            output.write(json.dumps(result, default=str) + "\n")
+            count += 1
+            if result["error"] is not None:
+                errors += 1
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return count, errors
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+                description="Run a Roj program over many input sets")
+    arg_parser.add_argument("program")
+    arg_parser.add_argument("inputs",
+                help="JSONL file, one list of read answers per line")
+    arg_parser.add_argument("-o", "--output", default=None,
+                help="where to write the results, stdout by default")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                help="number of worker processes")
+    arg_parser.add_argument("--engine", choices=sorted(ENGINES),
+                                                            default="tree")
+    arg_parser.add_argument("--chunksize", type=int, default=64,
+                help="number of records sent to a worker at a time")
+    arg_parser.add_argument("--no-optimize", action="store_true")
+    args = arg_parser.parse_args()
+
+    with open(args.program, "r") as f:
+        source = f.read()
+    output = sys.stdout if args.output is None else open(args.output, "w")
+    start = perf_counter()
+    with open(args.inputs, "r") as inputs:
+        count, errors = run_batch(source, inputs, output, args.jobs,
+                        args.engine, args.chunksize, not args.no_optimize)
+    elapsed = perf_counter() - start
+    if output is not sys.stdout:
+        output.close()
+    print("{} records, {} errors, {:.3f}s, {:.1f} records/s".format(
+            count, errors, elapsed, count / elapsed if elapsed else 0),
+                                                        file=sys.stderr)
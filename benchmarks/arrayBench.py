@@ -0,0 +1,83 @@
+### Measures the bulk operations of the arrays (arrays.py) against the
+### 'while' loops that compute the same values one item at a time
+
+## Usage: python arrayBench.py [--size 1000000] [--engine tree ...]
+# every workload is run by every engine, as an array program and as a
+# loop; both print the same value, which is checked
+## Building an array and every elementwise operator is one pass over the
+# items, in C; the reductions (sum, min, max) of a million items take
+# milliseconds, what "build" takes is the part of the other workloads
+# spent on array(N). The loops of the python engine are Python code, so
+# the arrays save it little
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                    ".."))
+
+from ASTParser import Parser, Interpreter
+from bytecodeVM import VMInterpreter
+from closureCompiler import ClosureInterpreter
+from pyTranspiler import PythonInterpreter
+from stackEvaluator import StackInterpreter
+from channels import ListWriter
+
+ENGINES = {"tree": Interpreter,
+            "vm": VMInterpreter,
+            "closure": ClosureInterpreter,
+            "python": PythonInterpreter,
+            "stack": StackInterpreter}
+
+# name: (array program, loop program), with N for the number of items
+WORKLOADS = {
+    "build": ("a = array(N); out len(a);",
+            "i = 0; while i < N do i = i + 1; end; out i;"),
+    "sum": ("a = array(N); out sum(a);",
+            "i = 0; s = 0; while i < N do s = s + i; i = i + 1; end; out s;"),
+    "elementwise": ("a = array(N); out max(a * 3 - a / 2);",
+            "i = 0; m = 0; while i < N do x = i * 3 - i / 2;\n"
+            "if x > m do m = x; end; i = i + 1; end; out m;"),
+    "count": ("a = array(N); out sum(a > N / 2);",
+            "i = 0; c = 0; while i < N do if i > N / 2 do c = c + 1; end;\n"
+            "i = i + 1; end; out c;"),
+}
+
+def time_program(source, Engine):
+    """Returns the value the program printed and its evaluation time"""
+    parser = Parser(source)
+    parser.get_program()
+    writer = ListWriter()
+    interpreter = Engine(parser, writer=writer)
+    gc.disable()
+    start = time.perf_counter()
+    interpreter.execute()
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    return writer.values[-1], elapsed
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+                description="time array operations against while loops")
+    arg_parser.add_argument("--size", type=int, default=1000000)
+    arg_parser.add_argument("--engine", nargs="*", choices=sorted(ENGINES),
+                                                    default=sorted(ENGINES))
+    args = arg_parser.parse_args()
+
+    print("{:>12} {:>8} {:>10} {:>10} {:>9}".format("workload", "engine",
+                                        "array ms", "loop ms", "speedup"))
+    for name, (array_program, loop_program) in WORKLOADS.items():
+        for engine in args.engine:
+            Engine = ENGINES[engine]
+            value, fast = time_program(
+                        array_program.replace("N", str(args.size)), Engine)
+            expected, slow = time_program(
+                        loop_program.replace("N", str(args.size)), Engine)
+            if value != expected:
+                print("{}: the array program printed {}, the loop {}".format(
+                                                    name, value, expected))
+            print("{:>12} {:>8} {:>10.1f} {:>10.1f} {:>8.0f}x".format(name,
+                            engine, fast * 1e3, slow * 1e3, slow / fast))
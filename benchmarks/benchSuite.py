@@ -0,0 +1,233 @@
+### Times every phase of running a Roj program (tokenizing, parsing,
+### optimizing and evaluating) on a fixed set of workloads
+
+## Usage:
+#   python benchSuite.py run [-o results.json] [--engine tree]
+#                                   [--repeat 5] [--warmup 1] [workload ...]
+#   python benchSuite.py compare old.json new.json [--threshold 0.1]
+# 'run' writes the best and mean time of each phase of each workload to a
+# JSON file; 'compare' prints the ratio between two such files and exits
+# with status 1 if some phase got slower by more than the threshold
+## The evaluate phase includes the compilation done by the engine
+## The programs that read input get it from a script instead of the
+# keyboard, and everything the programs print is thrown away
+
+import argparse
+import builtins
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                    ".."))
+sys.setrecursionlimit(10000)
+
+from scanner import Scanner
+from tokenizer import Tokenizer, Token
+from lexer import Lexer
+from ASTParser import Parser, Interpreter
+from bytecodeVM import VMInterpreter
+from closureCompiler import ClosureInterpreter
+from pyTranspiler import PythonInterpreter
+from stackEvaluator import StackInterpreter
+from optimizer import Optimizer
+
+SNIPPETS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                    "..", "snippets")
+
+ENGINES = {"tree": Interpreter,
+            "vm": VMInterpreter,
+            "closure": ClosureInterpreter,
+            "python": PythonInterpreter,
+            "stack": StackInterpreter}
+
+PHASES = ["tokenize", "lex", "parse", "optimize", "evaluate"]
+
+def snippet(name):
+    with open(os.path.join(SNIPPETS, name)) as f:
+        return f.read()
+
+def deep_expression(depth):
+    """A loop evaluating an expression nested depth parentheses deep"""
+    expr = "1"
+    for i in range(depth):
+        expr = "({} + {} * x)".format(expr, i % 7)
+    return "x = 1; i = 0; while i < 50 do y = {}; i = i + 1; end".format(
+                                                                        expr)
+
+def straight_line(n):
+    """A program with n statements and no loops"""
+    lines = ["a0 = 1;"]
+    for i in range(1, n):
+        lines.append("a{} = a{} + {} * 2 - 1;".format(i, i - 1, i % 10))
+    lines.append("out a{};".format(n - 1))
+    return "\n".join(lines)
+
+# name: (source, inputs)
+WORKLOADS = {
+    "factorial": (snippet("factorial.txt"), ["300"]),
+    "testJump": (snippet("testJump.txt"), []),
+    "areaRetangulo": (snippet("areaRetangulo.txt"), ["3.5", "2"]),
+    "long_loop": ("i = 0; s = 0;\n"
+                    "while i < 50000 do s = s + i * 2; i = i + 1; end;\n"
+                    "out s;", []),
+    "deep_expression": (deep_expression(150), []),
+    "string_concat": ("s = \"\"; i = 0;\n"
+                    "while i < 20000 do s = s + \"ab\"; i = i + 1; end;\n"
+                    "out i;", []),
+    "straight_line": (straight_line(3000), []),
+}
+
+@contextlib.contextmanager
+def scripted(inputs):
+    """Answer input() with the given inputs and discard the output"""
+    answers = iter(inputs)
+    real_input = builtins.input
+    builtins.input = lambda prompt="": next(answers)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        builtins.input = real_input
+
+def timed(function, setup):
+    """Time function(setup()); setup is not timed"""
+    arg = setup()
+    gc.disable()
+    start = time.perf_counter()
+    function(arg)
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    return elapsed
+
+def legacy_tokenize(source):
+    tokenizer = Tokenizer(Scanner(source))
+    while tokenizer.get_next_token().get_type() != Token.EOF:
+        pass
+
+def phases(source, inputs, Engine):
+    """Returns the (function, setup) pair of each phase"""
+    def unparsed():
+        return Parser(source, optimize=False)
+    def parsed():
+        parser = Parser(source, optimize=False)
+        parser.get_program()
+        return parser
+    def optimized():
+        parser = Parser(source)
+        parser.get_program()
+        return Engine(parser)
+    def evaluate(interpreter):
+        with scripted(inputs):
+            interpreter.evaluate()
+    return {"tokenize": (legacy_tokenize, lambda: source),
+            "lex": (lambda text: Lexer(text).tokenize(), lambda: source),
+            "parse": (lambda parser: parser.get_program(), unparsed),
+            "optimize": (lambda parser: Optimizer().optimize(parser.root),
+                                                                    parsed),
+            "evaluate": (evaluate, optimized)}
+
+def run_workload(name, Engine, repeat, warmup):
+    source, inputs = WORKLOADS[name]
+    results = {}
+    for phase, (function, setup) in phases(source, inputs, Engine).items():
+        for _ in range(warmup):
+            timed(function, setup)
+        runs = [timed(function, setup) for _ in range(repeat)]
+        results[phase] = {"best": min(runs),
+                            "mean": sum(runs) / len(runs),
+                            "runs": runs}
+    return results
+
+def run(args):
+    names = args.workloads or sorted(WORKLOADS)
+    for name in names:
+        if name not in WORKLOADS:
+            sys.exit("Unknown workload {}".format(name))
+    Engine = ENGINES[args.engine]
+
+    results = {}
+    for name in names:
+        results[name] = run_workload(name, Engine, args.repeat, args.warmup)
+        print("{:<16}".format(name) + " ".join("{}={:.4f}s".format(
+                phase, results[name][phase]["best"]) for phase in PHASES))
+
+    data = {"meta": {"engine": args.engine,
+                    "repeat": args.repeat,
+                    "warmup": args.warmup,
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "date": time.strftime("%Y-%m-%d %H:%M:%S")},
+            "results": results}
+    with open(args.output, "w") as f:
+        json.dump(data, f, indent=2)
+    print("results written to {}".format(args.output))
+
+def compare(args):
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+    if old["meta"]["engine"] != new["meta"]["engine"]:
+        print("warning: comparing the {} engine against the {} engine".format(
+                            old["meta"]["engine"], new["meta"]["engine"]))
+    old, new = old["results"], new["results"]
+
+    regressions = 0
+    print("{:<16} {:<9} {:>10} {:>10} {:>7}".format("workload", "phase",
+                                                "old", "new", "ratio"))
+    for name in sorted(set(old) & set(new)):
+        for phase in PHASES:
+            if phase not in old[name] or phase not in new[name]:
+                continue
+            before = old[name][phase]["best"]
+            after = new[name][phase]["best"]
+            ratio = after / before if before else float("inf")
+            flag = ""
+            if max(before, after) < args.min_time:
+                # too short to be measured reliably
+                flag = ""
+            elif ratio > 1 + args.threshold:
+                flag = "REGRESSION"
+                regressions += 1
+            elif ratio < 1 - args.threshold:
+                flag = "faster"
+            print("{:<16} {:<9} {:>10.4f} {:>10.4f} {:>7.2f} {}".format(
+                            name, phase, before, after, ratio, flag))
+    print("{} regressions beyond {:.0%}".format(regressions, args.threshold))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Roj benchmark suite")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the workloads")
+    run_parser.add_argument("workloads", nargs="*",
+                    help="workloads to run, all of them by default: " +
+                                                ", ".join(sorted(WORKLOADS)))
+    run_parser.add_argument("-o", "--output", default="results.json")
+    run_parser.add_argument("--engine", choices=sorted(ENGINES),
+                                                        default="tree")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--warmup", type=int, default=1)
+
+    compare_parser = commands.add_parser("compare",
+                    help="compare two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--threshold", type=float, default=0.1,
+                    help="relative slowdown reported as a regression")
+    compare_parser.add_argument("--min-time", type=float, default=0.001,
+                    help="phases shorter than this (in seconds) are never "
+                        "reported as regressions")
+
+    args = arg_parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
@@ -0,0 +1,90 @@
+### Measures how the evaluation time of an expression grows with its depth,
+### for the recursive Interpreter and the StackInterpreter
+
+## Usage: python depthBench.py [--shape chain|nested] [depth ...]
+# defaults to the chain shape and depths of 10 to 100k levels
+## chain is x + 1 * x + 2 * x + ..., a left-deep tree, and nested is
+# x - (x - (x - ... 1)), a right-deep tree; the parser builds both without
+# recursion. The default recursion limit is kept, as in RojInterpreter.py
+## Every program evaluates its expression 20 times in a loop; the time per
+# level should not depend on the depth. The engines that overflow the
+# Python stack are reported as such
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                    ".."))
+
+from ASTParser import Parser, Interpreter
+from stackEvaluator import StackInterpreter
+from channels import ListWriter
+
+ENGINES = {"tree": Interpreter,
+            "stack": StackInterpreter}
+
+LOOPS = 20
+
+def chain(depth):
+    return "x" + "".join(" + {} * x".format(i % 7) for i in range(depth))
+
+def nested(depth):
+    return "(x - " * depth + "1" + ")" * depth
+
+SHAPES = {"chain": chain, "nested": nested}
+
+def program(expression):
+    return "x = 1; i = 0; while i < {} do y = {}; i = i + 1; end".format(
+                                                        LOOPS, expression)
+
+def time_engine(Engine, source, repeat=3):
+    """Returns the best time to run the program, or None if the engine
+    overflowed the stack"""
+    parser = Parser(source)
+    parser.get_program()
+    best = None
+    for _ in range(repeat):
+        interpreter = Engine(parser, None, ListWriter())
+        gc.disable()
+        start = time.perf_counter()
+        try:
+            interpreter.execute()
+        except RecursionError:
+            return None
+        finally:
+            gc.enable()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+                description="time expressions of growing depth")
+    arg_parser.add_argument("depths", nargs="*", type=int)
+    arg_parser.add_argument("--shape", choices=sorted(SHAPES),
+                                                        default="chain")
+    args = arg_parser.parse_args()
+    depths = args.depths or [10, 100, 1000, 10000, 100000]
+
+    print("{:>8} ".format("depth") + " ".join("{:>12} {:>9}".format(
+                            name + " s", "ns/level") for name in ENGINES))
+    for depth in depths:
+        try:
+            source = program(SHAPES[args.shape](depth))
+            Parser(source).get_program()
+        except RecursionError:
+            print("{:>8} the parser overflows the stack".format(depth))
+            continue
+        row = "{:>8} ".format(depth)
+        for name, Engine in ENGINES.items():
+            elapsed = time_engine(Engine, source)
+            if elapsed is None:
+                row += "{:>22} ".format("RecursionError")
+            else:
+                row += "{:>12.4f} {:>9.1f} ".format(elapsed,
+                                        elapsed / (depth * LOOPS) * 1e9)
+        print(row)
@@ -0,0 +1,67 @@
+### Measures how long incrementalParser.IncrementalParser takes to bring the
+### tree of a long program up to date after small edits, against a full parse
+
+## Usage: python editBench.py [--lines 50000] [--edits 200]
+# the program is the unit of parserBench.py repeated; every edit is made at
+# a random place and then undone, and both are timed
+## The edits change a number, add a statement to a loop and add spaces;
+# their time should not grow with the length of the program
+
+import argparse
+import gc
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                    ".."))
+
+from incrementalParser import IncrementalParser
+from parserBench import UNIT
+
+# the text each kind of edit looks for, and what it puts in its place
+EDITS = {"number": (r"\+ (2)", "27"),
+        "statement": (r"(stop;)", "y = 1; stop;"),
+        "spaces": (r"(\n)", "  \n")}
+
+def time_edits(parser, pattern, replacement, n, rng):
+    """Returns the times of n random edits and of their undoing"""
+    places = [m.start(1) for m in re.finditer(pattern, parser.text)]
+    length = len(re.search(pattern, parser.text).group(1))
+    times = []
+    for offset in rng.sample(places, min(n, len(places))):
+        old = parser.text[offset:offset + length]
+        for removed, inserted in [(length, replacement),
+                                    (len(replacement), old)]:
+            gc.disable()
+            start = time.perf_counter()
+            parser.edit(offset, removed, inserted)
+            times.append(time.perf_counter() - start)
+            gc.enable()
+    return sorted(times)
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+                description="time incremental reparsing of a long program")
+    arg_parser.add_argument("--lines", type=int, default=50000)
+    arg_parser.add_argument("--edits", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    text = UNIT * max(1, args.lines // UNIT.count("\n"))
+    parser = IncrementalParser(text)
+    start = time.perf_counter()
+    parser.get_program()
+    full = time.perf_counter() - start
+    print("{} lines, {} tokens; full parse {:.3f} s".format(
+                        text.count("\n"), len(parser.tokens), full))
+
+    rng = random.Random(0)
+    print("{:>10} {:>10} {:>10} {:>10}".format("edit", "median ms",
+                                                "max ms", "speedup"))
+    for name, (pattern, replacement) in EDITS.items():
+        times = time_edits(parser, pattern, replacement, args.edits, rng)
+        median = times[len(times) // 2]
+        print("{:>10} {:>10.3f} {:>10.3f} {:>9.0f}x".format(name,
+                                median * 1e3, times[-1] * 1e3, full / median))
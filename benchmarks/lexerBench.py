@@ -0,0 +1,68 @@
+### Compares the throughput, in MB/s, of the regex based lexer.Lexer
+### against the Scanner + Tokenizer pipeline it replaces
+
+## Usage: python lexerBench.py [n_kilobytes ...]
+# defaults to 10, 100 and 1000 KB of source code; the Tokenizer is only
+# timed on the sizes below OLD_LIMIT as it is much slower
+
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                    ".."))
+
+from scanner import Scanner
+from tokenizer import Tokenizer, Token
+from lexer import Lexer
+
+# a small chunk of Roj code with every kind of token
+UNIT = """$ a comment $
+i = i + 1;
+while i < 10 do
+    x = (x + 2.5) * 3 ^ 2 - -i;
+    if x >= 100 and i != 3 do out "big"; stop; end else do jumpover; end;
+end;
+"""
+
+OLD_LIMIT = 100 * 1024
+
+def old_tokenize(text):
+    tokenizer = Tokenizer(Scanner(text))
+    tokens = [tokenizer.get_next_token()]
+    while tokens[-1].get_type() != Token.EOF:
+        tokens.append(tokenizer.get_next_token())
+    return tokens
+
+def new_tokenize(text):
+    return Lexer(text).tokenize()
+
+def time_lexer(tokenize, text, repeat=3):
+    """Returns the best time taken to tokenize the text"""
+    best = None
+    for _ in range(repeat):
+        gc.disable()
+        start = time.perf_counter()
+        tokenize(text)
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]]
+    if not sizes:
+        sizes = [10, 100, 1000]
+
+    print("{:>10} {:>14} {:>14}".format("KB", "Tokenizer MB/s", "Lexer MB/s"))
+    for size in sizes:
+        text = UNIT * max(1, size * 1024 // len(UNIT))
+        mb = len(text) / 1e6
+        if len(text) <= OLD_LIMIT:
+            old = "{:.3f}".format(mb / time_lexer(old_tokenize, text, 1))
+        else:
+            old = "-"
+        new = mb / time_lexer(new_tokenize, text)
+        print("{:>10} {:>14} {:>14.3f}".format(len(text) // 1024, old, new))
@@ -0,0 +1,79 @@
+### Measures how the parse time of ASTParser.Parser grows with the size
+### of the program; parse time should grow linearly with the number of tokens
+
+## Usage: python parserBench.py [--unit statements|expressions] [n_tokens ...]
+# defaults to 1k, 10k, 100k and 1M tokens of the statements unit; the
+# expressions unit is made of long expressions, like generated code
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                    ".."))
+sys.setrecursionlimit(10000)
+
+from ASTParser import Parser
+
+# a small chunk of Roj code that exercises most of the grammar
+UNIT = """i = i + 1;
+while i < 10 do
+    x = (x + 2) * 3 ^ 2 - -i;
+    if x >= 100 and i != 3 do out "big"; stop; end else do jumpover; end;
+end;
+"""
+
+# assignments of long expressions that use every level of precedence
+EXPRESSIONS = """x = (a + 2) * b - c / 4 ^ 2 + (d - e) * f - -g;
+y = a < b + 1 and c >= d * 2 or e == 3 and f != g - 1;
+z = -(a * b + c) / (d - -e) ^ 2 + ((f + g) * (h - i) - j) / k;
+w = a + b + c + d + e + f + g + h + i + j + k * l * m * n - o / p;
+"""
+
+UNITS = {"statements": UNIT, "expressions": EXPRESSIONS}
+
+def build_parser(n_tokens, unit=UNIT):
+    """Build a Parser whose token sequence has (about) n_tokens tokens.
+    Tokenizing a huge program would dominate the run time of this
+        benchmark, so the unit is tokenized once and its tokens repeated"""
+    parser = Parser(unit, optimize=False)
+    tokens = parser.tokens
+    reps = max(1, n_tokens // (len(tokens) - 1))
+    # repeat everything but the EOF token
+    for name in ["kinds", "values", "offsets"]:
+        column = getattr(tokens, name)
+        setattr(tokens, name, column[:-1] * reps + column[-1:])
+    parser.kinds = tokens.kinds
+    return parser
+
+def time_parse(n_tokens, repeat=3, unit=UNIT):
+    """Returns the number of tokens parsed and the best parse time"""
+    parser = build_parser(n_tokens, unit)
+    best = None
+    for _ in range(repeat):
+        # like timeit, keep the garbage collector out of the measurement
+        gc.disable()
+        start = time.perf_counter()
+        parser.get_program()
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        if best is None or elapsed < best:
+            best = elapsed
+    return len(parser.tokens), best
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+                description="time the parser on programs of growing size")
+    arg_parser.add_argument("sizes", nargs="*", type=int)
+    arg_parser.add_argument("--unit", choices=sorted(UNITS),
+                                                    default="statements")
+    args = arg_parser.parse_args()
+    sizes = args.sizes or [1000, 10000, 100000, 1000000]
+
+    print("{:>10} {:>12} {:>14}".format("tokens", "seconds", "us/token"))
+    for size in sizes:
+        n, elapsed = time_parse(size, unit=UNITS[args.unit])
+        print("{:>10} {:>12.4f} {:>14.3f}".format(n, elapsed,
+                                                    elapsed / n * 1e6))
@@ -0,0 +1,595 @@
+### Compiles the AST built by ASTParser.Parser into bytecode and runs it
+### on a stack based virtual machine
+
+## The compiled program is a flat list of integers, every instruction
+# taking two slots: the opcode and its argument. The argument indexes
+# the constant pool, the variable slots, the operator tokens (kept for
+# the error messages) or is the absolute target of a jump
+## Every statement leaves its value on the stack and consecutive
+# statements pop the value of the previous one; this keeps the value of
+# the last statement around, as the tree walking interpreter does
+## 'stop' and 'jumpover' are compiled to jumps to the end/beginning of
+# the enclosing loop, so no control tokens travel through the program
+## The Interpreter type checks the LHS of arithmetic and boolean operators
+# before evaluating their RHS; instead of paying for that on every
+# operation, the compiler records which LHS checks are pending while each
+# instruction of a RHS runs and the VM performs them only if the
+# instruction fails
+
+from ASTParser import (Parser, UnOp, IOOp, Control, BinOp, BoolBinOp,
+                        CompBinOp, ArithBinOp, Literal, Variable, CompStmt,
+                        Block, ArrayLiteral, Call, Index)
+from resolver import statements
+from tokenizer import Token
+from errorSystem import *
+from channels import ConsoleReader, ConsoleWriter
+import runtime
+import arrays
+
+### Opcodes
+LOAD_CONST = 0
+LOAD_VAR = 1
+STORE_VAR = 2   # store the top of the stack, keep it there
+STORE_POP = 3   # store the top of the stack and pop it
+POP = 4
+ADD = 5
+SUB = 6
+MUL = 7
+DIV = 8
+POW = 9
+EQ = 10
+NE = 11
+GT = 12
+LT = 13
+GE = 14
+LE = 15
+AND = 16
+OR = 17
+UNARY = 18
+JUMP = 19
+JUMP_IF_FALSE = 20
+READ = 21
+OUT = 22
+HALT = 23
+RETURN = 24
+ERROR = 25      # report the error message in the constant pool
+END = 26
+# operators whose RHS is a literal; the literal is stored alongside the
+# operator token, in CodeObject.rhs
+ADD_CONST = 27
+SUB_CONST = 28
+MUL_CONST = 29
+GT_CONST = 30
+LT_CONST = 31
+GE_CONST = 32
+LE_CONST = 33
+# arrays: build one of the n values on top of the stack, index one and call
+# the built-in function whose name and number of arguments are in the
+# constant pool
+BUILD_ARRAY = 34
+INDEX = 35
+CALL = 36
+
+OPNAMES = ["LOAD_CONST", "LOAD_VAR", "STORE_VAR", "STORE_POP", "POP",
+            "ADD", "SUB", "MUL", "DIV", "POW", "EQ", "NE", "GT", "LT",
+            "GE", "LE", "AND", "OR", "UNARY", "JUMP", "JUMP_IF_FALSE",
+            "READ", "OUT", "HALT", "RETURN", "ERROR", "END",
+            "ADD_CONST", "SUB_CONST", "MUL_CONST", "GT_CONST", "LT_CONST",
+            "GE_CONST", "LE_CONST", "BUILD_ARRAY", "INDEX", "CALL"]
+
+ARITH_OPCODES = {Token.PLUS: ADD, Token.MINUS: SUB, Token.PRODUCT: MUL,
+                    Token.DIVISION: DIV, Token.POWER: POW}
+COMP_OPCODES = {Token.EQUALITY: EQ, Token.INEQUALITY: NE,
+                Token.GREATER: GT, Token.LESSER: LT,
+                Token.GREATEREQUAL: GE, Token.LESSEREQUAL: LE}
+BOOL_OPCODES = {Token.AND: AND, Token.OR: OR}
+CONST_OPCODES = {ADD: ADD_CONST, SUB: SUB_CONST, MUL: MUL_CONST,
+                    GT: GT_CONST, LT: LT_CONST, GE: GE_CONST, LE: LE_CONST}
+
+# marks a variable slot that was never assigned
+UNDEFINED = object()
+
+class CodeObject(object):
+    """Holds a compiled program: the instructions, the constant pool,
+    the names of the variable slots and the operator tokens"""
+    def __init__(self, code, consts, names, tokens, rhs, checks):
+        self.code = code
+        self.consts = consts
+        self.names = names
+        self.tokens = tokens
+        # literal RHS of the _CONST operators, indexed like the tokens
+        self.rhs = rhs
+        # pc -> ((token index, stack position of the LHS), ...)
+        self.checks = checks
+
+    def dis(self):
+        """Returns a human readable listing of the instructions"""
+        lines = []
+        for pc in range(0, len(self.code), 2):
+            op, arg = self.code[pc], self.code[pc+1]
+            if op in [LOAD_CONST, ERROR, CALL]:
+                desc = repr(self.consts[arg])
+            elif op in [LOAD_VAR, STORE_VAR, STORE_POP]:
+                desc = self.names[arg]
+            elif op in [JUMP, JUMP_IF_FALSE]:
+                desc = "to {}".format(arg)
+            elif op in [READ] + list(ARITH_OPCODES.values()) + \
+                    list(COMP_OPCODES.values()) + \
+                    list(BOOL_OPCODES.values()) + [UNARY]:
+                desc = str(self.tokens[arg])
+            elif op in CONST_OPCODES.values():
+                desc = "{} {!r}".format(self.tokens[arg], self.rhs[arg])
+            else:
+                desc = ""
+            lines.append("{:>6} {:<14} {:>4} {}".format(
+                                        pc, OPNAMES[op], arg, desc))
+        return "\n".join(lines)
+
+class Compiler(object):
+    """Translates the AST of a program into a CodeObject"""
+    def __init__(self):
+        self.code = []
+        self.consts = []
+        self.const_index = {}
+        self.names = []
+        self.name_index = {}
+        self.tokens = []
+        self.rhs = []
+        self.checks = {}
+        # LHS checks pending while the current RHS is compiled, and the
+        # stack depth the current expression starts at
+        self.pending = ()
+        self.depth = 0
+        # one entry per enclosing loop: [start pc, pcs of the jumps
+        # that have to be patched to point to the end of the loop]
+        self.loops = []
+
+    def compile(self, root):
+        """Compile the tree whose root is the EOF node"""
+        self.compile_suite(root.left, True)
+        self.emit(END)
+        return CodeObject(self.code, self.consts, self.names, self.tokens,
+                                                    self.rhs, self.checks)
+
+    def emit(self, op, arg=0):
+        """Append an instruction and return its position"""
+        if self.pending:
+            self.checks[len(self.code)] = self.pending
+        self.code.append(op)
+        self.code.append(arg)
+        return len(self.code) - 2
+
+    def patch(self, pc, target):
+        """Make the jump at pc go to target"""
+        self.code[pc+1] = target
+
+    def const(self, value):
+        # True == 1, so the type is part of the key
+        key = (type(value), value)
+        if key not in self.const_index:
+            self.const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return self.const_index[key]
+
+    def slot(self, name):
+        if name not in self.name_index:
+            self.name_index[name] = len(self.names)
+            self.names.append(name)
+        return self.name_index[name]
+
+    def token(self, tok, rhs=None):
+        self.tokens.append(tok)
+        self.rhs.append(rhs)
+        return len(self.tokens) - 1
+
+    def compile_suite(self, node, keep):
+        """Compile a sequence of statements; only the value of the last
+        one is kept, if keep is set"""
+        stmts = statements(node)
+        for stmt in stmts[:-1]:
+            self.compile_stmt(stmt, False)
+        self.compile_stmt(stmts[-1], keep)
+
+    def compile_stmt(self, node, keep):
+        """Compile a statement; its value is left on the stack if keep"""
+        if type(node) is BinOp:
+            typ = node.token.get_type()
+            if typ is Token.ASSIGNMENT and not keep:
+                self.compile_expr(node.right)
+                self.emit(STORE_POP, self.slot(node.left.token.value))
+                return
+        elif type(node) is Block:
+            self.compile_suite(node, keep)
+            return
+        elif type(node) is IOOp:
+            typ = node.token.get_type()
+            if typ in [Token.READ, Token.READINT, Token.READFLOAT,
+                                                    Token.READBOOL]:
+                self.emit(READ, self.token(node.token))
+                self.emit(STORE_VAR if keep else STORE_POP,
+                                        self.slot(node.left.token.value))
+                return
+        elif type(node) is Control:
+            self.compile_control(node, keep)
+            return
+        elif type(node) is CompStmt:
+            typ = node.token.get_type()
+            if typ is Token.WHILE:
+                self.compile_while(node, keep)
+                return
+            elif typ is Token.IF:
+                self.compile_if(node, keep)
+                return
+
+        self.compile_expr(node)
+        if not keep:
+            self.emit(POP)
+
+    def compile_control(self, node, keep):
+        typ = node.token.get_type()
+        if typ in [Token.STOP, Token.JUMPOVER]:
+            if not self.loops:
+                # it would travel all the way up to the end of the program
+                self.emit(ERROR, self.const(
+                            "{} used out of scope".format(node.token.value)))
+            elif typ is Token.STOP:
+                self.loops[-1][1].append(self.emit(JUMP))
+            else:
+                self.emit(JUMP, self.loops[-1][0])
+        elif typ is Token.HALT:
+            self.compile_expr(node.left)
+            self.emit(HALT)
+        elif typ is Token.RETURN:
+            self.compile_expr(node.left)
+            self.emit(RETURN)
+            if not keep:
+                self.emit(POP)
+        else:
+            self.emit(ERROR, self.const(
+                        "Unknown control operator{}".format(node.token)))
+
+    def compile_while(self, node, keep):
+        start = len(self.code)
+        self.compile_expr(node.left)
+        exits = [self.emit(JUMP_IF_FALSE)]
+        self.loops.append([start, exits])
+        self.compile_suite(node.right, False)
+        self.loops.pop()
+        self.emit(JUMP, start)
+        end = len(self.code)
+        for pc in exits:
+            self.patch(pc, end)
+        # a while statement always evaluates to None
+        if keep:
+            self.emit(LOAD_CONST, self.const(None))
+
+    def compile_if(self, node, keep):
+        self.compile_expr(node.left)
+        to_else = self.emit(JUMP_IF_FALSE)
+        self.compile_suite(node.right.left, keep)
+        to_end = self.emit(JUMP)
+        self.patch(to_else, len(self.code))
+        if node.right.right is not None:
+            self.compile_suite(node.right.right, keep)
+        elif keep:
+            self.emit(LOAD_CONST, self.const(None))
+        self.patch(to_end, len(self.code))
+
+    def compile_expr(self, node):
+        """Compile an expression; its value is left on the stack"""
+        typ = None if node is None else node.token.get_type()
+        if type(node) is Literal:
+            self.emit(LOAD_CONST, self.const(node.token.value))
+        elif type(node) is Variable:
+            self.emit(LOAD_VAR, self.slot(node.token.value))
+        elif type(node) is ArithBinOp and typ in ARITH_OPCODES:
+            self.compile_binary(node, ARITH_OPCODES[typ], True)
+        elif type(node) is CompBinOp and typ in COMP_OPCODES:
+            self.compile_binary(node, COMP_OPCODES[typ], False)
+        elif type(node) is BoolBinOp and typ in BOOL_OPCODES:
+            self.compile_binary(node, BOOL_OPCODES[typ], True)
+        elif type(node) is UnOp:
+            self.compile_expr(node.left)
+            self.emit(UNARY, self.token(node.token))
+        elif type(node) is BinOp and typ is Token.ASSIGNMENT:
+            self.compile_expr(node.right)
+            self.emit(STORE_VAR, self.slot(node.left.token.value))
+        elif type(node) is IOOp and typ is Token.OUT:
+            self.compile_expr(node.left)
+            self.emit(OUT)
+        elif type(node) is ArrayLiteral:
+            self.compile_items(node.items)
+            self.emit(BUILD_ARRAY, len(node.items))
+        elif type(node) is Index:
+            self.compile_items([node.left, node.right])
+            self.emit(INDEX)
+        elif type(node) is Call:
+            self.compile_items(node.items)
+            self.emit(CALL, self.const((node.token.value, len(node.items))))
+        else:
+            # mimic NodeVisitor.no_visit
+            self.emit(ERROR, self.const(
+                            "There is no visit_ method for " + str(node)))
+
+    def compile_items(self, nodes):
+        """Compile the expressions, that are left on the stack one above
+        the other"""
+        depth = self.depth
+        for i, node in enumerate(nodes):
+            self.depth = depth + i
+            self.compile_expr(node)
+        self.depth = depth
+
+    def compile_binary(self, node, op, check_left):
+        """Compile both operands and the operator; if check_left is set,
+        the LHS is checked before the RHS is evaluated"""
+        depth = self.depth
+        if op in CONST_OPCODES and type(node.right) is Literal:
+            # a literal RHS can not fail, no need for the LHS check
+            self.compile_expr(node.left)
+            self.emit(CONST_OPCODES[op],
+                            self.token(node.token, node.right.token.value))
+            return
+
+        tok = self.token(node.token)
+        self.compile_expr(node.left)
+        self.depth = depth + 1
+        if check_left:
+            pending = self.pending
+            self.pending = pending + ((tok, depth),)
+            self.compile_expr(node.right)
+            self.pending = pending
+        else:
+            self.compile_expr(node.right)
+        self.depth = depth
+        self.emit(op, tok)
+
+class VirtualMachine(object):
+    """Runs a CodeObject"""
+    def __init__(self, code_object, reader, writer):
+        self.code_object = code_object
+        self.reader = reader
+        self.writer = writer
+        self.slots = [UNDEFINED] * len(code_object.names)
+
+    def run(self):
+        """Execute the instructions until END; returns the value of the
+        last statement of the program"""
+        co = self.code_object
+        code = co.code
+        consts = co.consts
+        tokens = co.tokens
+        rhs = co.rhs
+        names = co.names
+        slots = self.slots
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        arith = runtime.arith
+        compare = runtime.compare
+        pc = 0
+
+        try:
+            while True:
+                op = code[pc]
+                arg = code[pc+1]
+                pc += 2
+                # the most frequent instructions come first
+                if op == LOAD_VAR:
+                    value = slots[arg]
+                    if value is UNDEFINED:
+                        raise runtime.Fault("Undefined variable '{}'".format(
+                                                                names[arg]))
+                    push(value)
+                elif op == LOAD_CONST:
+                    push(consts[arg])
+                elif op == STORE_POP:
+                    slots[arg] = pop()
+                elif op == ADD_CONST:
+                    left = stack[-1]
+                    right = rhs[arg]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left + right
+                    else:
+                        stack[-1] = arith(tokens[arg], left, right)
+                elif op == SUB_CONST:
+                    left = stack[-1]
+                    right = rhs[arg]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left - right
+                    else:
+                        stack[-1] = arith(tokens[arg], left, right)
+                elif op == MUL_CONST:
+                    left = stack[-1]
+                    right = rhs[arg]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left * right
+                    else:
+                        stack[-1] = arith(tokens[arg], left, right)
+                elif op == LT_CONST:
+                    left = stack[-1]
+                    right = rhs[arg]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left < right
+                    else:
+                        stack[-1] = compare(tokens[arg], left, right)
+                elif op == GT_CONST:
+                    left = stack[-1]
+                    right = rhs[arg]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left > right
+                    else:
+                        stack[-1] = compare(tokens[arg], left, right)
+                elif op == JUMP_IF_FALSE:
+                    if not pop():
+                        pc = arg
+                elif op == JUMP:
+                    pc = arg
+                elif op == ADD:
+                    right = pop()
+                    left = stack[-1]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left + right
+                    else:
+                        stack[-1] = arith(tokens[arg], left, right)
+                elif op == SUB:
+                    right = pop()
+                    left = stack[-1]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left - right
+                    else:
+                        stack[-1] = arith(tokens[arg], left, right)
+                elif op == MUL:
+                    right = pop()
+                    left = stack[-1]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left * right
+                    else:
+                        stack[-1] = arith(tokens[arg], left, right)
+                elif op == LT:
+                    right = pop()
+                    left = stack[-1]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left < right
+                    else:
+                        stack[-1] = compare(tokens[arg], left, right)
+                elif op == GT:
+                    right = pop()
+                    left = stack[-1]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left > right
+                    else:
+                        stack[-1] = compare(tokens[arg], left, right)
+                elif op == LE:
+                    right = pop()
+                    left = stack[-1]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left <= right
+                    else:
+                        stack[-1] = compare(tokens[arg], left, right)
+                elif op == GE:
+                    right = pop()
+                    left = stack[-1]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left >= right
+                    else:
+                        stack[-1] = compare(tokens[arg], left, right)
+                elif op == EQ:
+                    right = pop()
+                    stack[-1] = stack[-1] == right
+                elif op == NE:
+                    right = pop()
+                    stack[-1] = stack[-1] != right
+                elif op == LE_CONST:
+                    left = stack[-1]
+                    right = rhs[arg]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left <= right
+                    else:
+                        stack[-1] = compare(tokens[arg], left, right)
+                elif op == GE_CONST:
+                    left = stack[-1]
+                    right = rhs[arg]
+                    if type(left) is int and type(right) is int:
+                        stack[-1] = left >= right
+                    else:
+                        stack[-1] = compare(tokens[arg], left, right)
+                elif op == POP:
+                    pop()
+                elif op == STORE_VAR:
+                    slots[arg] = stack[-1]
+                elif op == DIV or op == POW:
+                    right = pop()
+                    stack[-1] = arith(tokens[arg], stack[-1], right)
+                elif op == AND or op == OR:
+                    right = pop()
+                    stack[-1] = runtime.boolean(tokens[arg], stack[-1], right)
+                elif op == UNARY:
+                    stack[-1] = runtime.unary(tokens[arg], stack[-1])
+                elif op == OUT:
+                    self.writer.write(stack[-1])
+                elif op == READ:
+                    push(runtime.read(tokens[arg].get_type(), self.reader))
+                elif op == RETURN:
+                    stack[-1] = runtime.ReturnValue(stack[-1])
+                elif op == INDEX:
+                    right = pop()
+                    stack[-1] = arrays.index(stack[-1], right)
+                elif op == BUILD_ARRAY:
+                    items = stack[len(stack) - arg:]
+                    del stack[len(stack) - arg:]
+                    push(arrays.build(items))
+                elif op == CALL:
+                    name, n = consts[arg]
+                    items = stack[len(stack) - n:]
+                    del stack[len(stack) - n:]
+                    push(arrays.FUNCTIONS[name][0](*items))
+                elif op == HALT:
+                    raise runtime.Halt(pop())
+                elif op == ERROR:
+                    raise runtime.Fault(consts[arg])
+                elif op == END:
+                    return pop()
+                else:
+                    raise InterpreterException("Unknown opcode {}".format(op))
+        except Exception:
+            # the instruction that failed may belong to the RHS of some
+            # operators whose LHS the Interpreter would have checked first
+            for tok, pos in co.checks.get(pc - 2, ()):
+                runtime.check_left(tokens[tok], stack[pos])
+            raise
+
+class VMInterpreter(object):
+    """Drop-in replacement for ASTParser.Interpreter that compiles the
+    tree to bytecode before running it on the VirtualMachine"""
+    def __init__(self, parser, reader=None, writer=None):
+        self.parser = parser
+        self.reader = reader if reader is not None else ConsoleReader()
+        self.writer = writer if writer is not None else ConsoleWriter()
+        self.code_object = None
+        self.vm = None
+
+    def compile(self):
+        """Build the bytecode for the program, only once"""
+        # ensure we have generated a tree
+        if self.parser.root is None:
+            self.parser.get_program()
+        if self.code_object is None:
+            self.code_object = Compiler().compile(self.parser.root)
+        return self.code_object
+
+    def execute(self, variables=None):
+        """Run the program with fresh variables, or the ones given, and
+        return the value of its last statement; errors are raised"""
+        self.vm = VirtualMachine(self.compile(), self.reader, self.writer)
+        if variables:
+            for i, name in enumerate(self.code_object.names):
+                if name in variables:
+                    self.vm.slots[i] = variables[name]
+        try:
+            return runtime.result(self.vm.run())
+        finally:
+            self.writer.flush()
+
+    def evaluate(self):
+        """Entry point to the execution of the program"""
+        try:
+            value = self.execute()
+        except runtime.Fault as e:
+            runtime.error(e.msg)
+        runtime.finish(value)
+
+    @property
+    def variables(self):
+        """The values of the variables, indexed by name"""
+        if self.vm is None:
+            return {}
+        return {name: value for name, value in
+                    zip(self.code_object.names, self.vm.slots)
+                        if value is not UNDEFINED}
+
+if __name__ == "__main__":
+    import sys
+    with open(sys.argv[1], "r") as f:
+        text = f.read()
+    print(VMInterpreter(Parser(text)).compile().dis())
@@ -0,0 +1,105 @@
+### Input and output channels for the 'read' and 'out' statements
+
+## Every engine reads with reader.read(), which returns the line typed for
+# a read statement (without the newline), and writes the value of every
+# 'out' statement with writer.write(value); writer.flush() is called when
+# the program ends, and before an error or the final message is printed,
+# so that they come after the outputs of the program
+## The defaults, ConsoleReader and ConsoleWriter, behave like the
+# interactive interpreter always did: they prompt with "[in]: " and print
+# "[out]: " lines. For batch runs:
+#   - BufferedWriter joins the output lines and writes them in a few large
+#     writes, when max_lines lines or max_bytes characters are pending
+#   - ListWriter keeps the values in a list, with no prefixes
+#   - FileReader, IterReader and BufferReader answer the read statements
+#     from a file, from any iterable of lines or from one string, with no
+#     prompts
+## A reader with no more lines raises EOFError, as input() does
+
+import sys
+
+class ConsoleReader(object):
+    """Asks the user for every value"""
+    def read(self):
+        return input("[in]: ")
+
+class FileReader(object):
+    """Reads one line of a text file for every value"""
+    def __init__(self, file):
+        self.file = file
+
+    def read(self):
+        line = self.file.readline()
+        if not line:
+            raise EOFError("no more input")
+        return line[:-1] if line.endswith("\n") else line
+
+class IterReader(object):
+    """Takes the values from an iterable of strings"""
+    def __init__(self, lines):
+        self.lines = iter(lines)
+
+    def read(self):
+        for line in self.lines:
+            return str(line)
+        raise EOFError("no more input")
+
+class BufferReader(object):
+    """Takes the values from the lines of a string, split once"""
+    def __init__(self, text):
+        self.lines = text.splitlines()
+        self.pos = 0
+
+    def read(self):
+        if self.pos >= len(self.lines):
+            raise EOFError("no more input")
+        self.pos += 1
+        return self.lines[self.pos - 1]
+
+class ConsoleWriter(object):
+    """Prints every value as soon as it is written"""
+    def write(self, value):
+        print("[out]:", value)
+
+    def flush(self):
+        pass
+
+class BufferedWriter(object):
+    """Writes the values to stream (sys.stdout by default), one per line
+    after prefix, in batches of at most max_lines lines or max_bytes
+    characters; max_lines=1 writes every value immediately"""
+    def __init__(self, stream=None, prefix="[out]: ", max_lines=4096,
+                                                    max_bytes=1 << 20):
+        self.stream = stream
+        self.prefix = prefix
+        self.max_lines = max_lines
+        self.max_bytes = max_bytes
+        self.pending = []
+        self.size = 0
+
+    def write(self, value):
+        line = "{}{}\n".format(self.prefix, value)
+        self.pending.append(line)
+        self.size += len(line)
+        if len(self.pending) >= self.max_lines or self.size >= self.max_bytes:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            # sys.stdout is looked up now, in case it was redirected
+            stream = self.stream or sys.stdout
+            stream.write("".join(self.pending))
+            stream.flush()
+            self.pending = []
+            self.size = 0
+
+class ListWriter(object):
+    """Keeps the values written in self.values"""
+    def __init__(self):
+        self.values = []
+
+    def write(self, value):
+        self.values.append(value)
+
+    def flush(self):
+        pass
@@ -0,0 +1,415 @@
+### Turns the AST built by ASTParser.Parser into a tree of Python closures
+
+## Every node is compiled, once, into a closure specialized for its node
+# type and operator; running the program is then a series of direct
+# calls, with no visit_ method lookups and no token type checks
+## Statements return their value, like the visit_ methods do; 'stop' and
+# 'jumpover' return one of two markers that the enclosing suite passes up
+# to the loop. The compiler knows which statements can return a marker,
+# so the suites only check the values of those
+## 'halt', and 'stop'/'jumpover' outside of a loop, always end the program;
+# they raise a Fault right away
+
+from ASTParser import (UnOp, IOOp, Control, BinOp, BoolBinOp, CompBinOp,
+                        ArithBinOp, Literal, Variable, CompStmt, Block,
+                        ArrayLiteral, Call, Index)
+from resolver import statements
+from tokenizer import Token
+from errorSystem import *
+from channels import ConsoleReader, ConsoleWriter
+import runtime
+import arrays
+
+# markers returned by 'stop' and 'jumpover' statements
+STOP = object()
+JUMPOVER = object()
+# marks a variable slot that was never assigned
+UNDEFINED = object()
+
+class ClosureCompiler(object):
+    """Compiles the AST of a program into a closure that runs it"""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        # shared by all the closures that read or write variables;
+        # ClosureInterpreter resets it before each run
+        self.frame = []
+        self.names = []
+        self.name_index = {}
+        self.loop_depth = 0
+
+    def compile(self, root):
+        """Compile the tree whose root is the EOF node; returns a closure
+        that evaluates to the value of the last statement"""
+        program, _ = self.compile_suite(root.left)
+        return program
+
+    def slot(self, name):
+        if name not in self.name_index:
+            self.name_index[name] = len(self.names)
+            self.names.append(name)
+            self.frame.append(UNDEFINED)
+        return self.name_index[name]
+
+    ### Statements
+    ## each compile_ method returns the closure and a flag telling if it
+    # may return the STOP or JUMPOVER markers
+
+    def compile_suite(self, node):
+        stmts = [self.compile_stmt(stmt) for stmt in statements(node)]
+        may_signal = any(signals for _, signals in stmts)
+        if len(stmts) == 1:
+            return stmts[0]
+
+        last = stmts[-1][0]
+        if not may_signal:
+            init = tuple(stmt for stmt, _ in stmts[:-1])
+            def suite():
+                for stmt in init:
+                    stmt()
+                return last()
+        else:
+            init = tuple(stmts[:-1])
+            def suite():
+                for stmt, signals in init:
+                    if signals:
+                        r = stmt()
+                        if r is STOP or r is JUMPOVER:
+                            return r
+                    else:
+                        stmt()
+                return last()
+        return suite, may_signal
+
+    def compile_stmt(self, node):
+        typ = None if node is None else node.token.get_type()
+        if type(node) is Block:
+            return self.compile_suite(node)
+        elif type(node) is IOOp and typ in [Token.READ, Token.READINT,
+                                        Token.READFLOAT, Token.READBOOL]:
+            return self.compile_read(node), False
+        elif type(node) is Control:
+            return self.compile_control(node)
+        elif type(node) is CompStmt and typ is Token.WHILE:
+            return self.compile_while(node), False
+        elif type(node) is CompStmt and typ is Token.IF:
+            return self.compile_if(node)
+        else:
+            return self.compile_expr(node), False
+
+    def compile_read(self, node):
+        typ = node.token.get_type()
+        i = self.slot(node.left.token.value)
+        frame = self.frame
+        read = runtime.read
+        reader = self.reader
+        def read_stmt():
+            value = frame[i] = read(typ, reader)
+            return value
+        return read_stmt
+
+    def compile_control(self, node):
+        tok = node.token
+        typ = tok.get_type()
+        if typ in [Token.STOP, Token.JUMPOVER]:
+            if not self.loop_depth:
+                msg = "{} used out of scope".format(tok.value)
+                def misused():
+                    raise runtime.Fault(msg)
+                return misused, False
+            marker = STOP if typ is Token.STOP else JUMPOVER
+            return (lambda: marker), True
+        elif typ is Token.HALT:
+            expr = self.compile_expr(node.left)
+            def halt():
+                raise runtime.Halt(expr())
+            return halt, False
+        elif typ is Token.RETURN:
+            expr = self.compile_expr(node.left)
+            ReturnValue = runtime.ReturnValue
+            def return_stmt():
+                return ReturnValue(expr())
+            return return_stmt, False
+        else:
+            return self.compile_error(
+                        "Unknown control operator{}".format(tok)), False
+
+    def compile_while(self, node):
+        cond = self.compile_expr(node.left)
+        self.loop_depth += 1
+        body, signals = self.compile_suite(node.right)
+        self.loop_depth -= 1
+        if signals:
+            def loop():
+                while cond():
+                    if body() is STOP:
+                        break
+        else:
+            def loop():
+                while cond():
+                    body()
+        return loop
+
+    def compile_if(self, node):
+        cond = self.compile_expr(node.left)
+        then, signals = self.compile_suite(node.right.left)
+        if node.right.right is None:
+            def branch():
+                if cond():
+                    return then()
+            return branch, signals
+        other, other_signals = self.compile_suite(node.right.right)
+        def branch():
+            if cond():
+                return then()
+            else:
+                return other()
+        return branch, signals or other_signals
+
+    ### Expressions
+
+    def compile_expr(self, node):
+        typ = None if node is None else node.token.get_type()
+        if type(node) is Literal:
+            value = node.token.value
+            return lambda: value
+        elif type(node) is Variable:
+            return self.compile_variable(node)
+        elif type(node) is ArithBinOp:
+            return self.compile_arith(node)
+        elif type(node) is CompBinOp:
+            return self.compile_comparison(node)
+        elif type(node) is BoolBinOp:
+            return self.compile_boolean(node)
+        elif type(node) is UnOp:
+            return self.compile_unary(node)
+        elif type(node) is BinOp and typ is Token.ASSIGNMENT:
+            return self.compile_assignment(node)
+        elif type(node) is IOOp and typ is Token.OUT:
+            expr = self.compile_expr(node.left)
+            write = self.writer.write
+            def out():
+                value = expr()
+                write(value)
+                return value
+            return out
+        elif type(node) is ArrayLiteral:
+            return self.compile_array(node)
+        elif type(node) is Index:
+            return self.compile_index(node)
+        elif type(node) is Call:
+            return self.compile_call(node)
+        else:
+            # mimic NodeVisitor.no_visit
+            return self.compile_error(
+                            "There is no visit_ method for " + str(node))
+
+    def compile_error(self, msg):
+        def error():
+            raise runtime.Fault(msg)
+        return error
+
+    def compile_variable(self, node):
+        name = node.token.value
+        i = self.slot(name)
+        frame = self.frame
+        def load():
+            value = frame[i]
+            if value is UNDEFINED:
+                raise runtime.Fault("Undefined variable '{}'".format(name))
+            return value
+        return load
+
+    def compile_assignment(self, node):
+        i = self.slot(node.left.token.value)
+        frame = self.frame
+        expr = self.compile_expr(node.right)
+        def assign():
+            value = frame[i] = expr()
+            return value
+        return assign
+
+    def compile_array(self, node):
+        items = [self.compile_expr(item) for item in node.items]
+        build = arrays.build
+        def array():
+            return build([item() for item in items])
+        return array
+
+    def compile_index(self, node):
+        left = self.compile_expr(node.left)
+        right = self.compile_expr(node.right)
+        index = arrays.index
+        def item():
+            value = left()
+            return index(value, right())
+        return item
+
+    def compile_call(self, node):
+        items = [self.compile_expr(item) for item in node.items]
+        function = arrays.FUNCTIONS[node.token.value][0]
+        def call():
+            return function(*[item() for item in items])
+        return call
+
+    def compile_operands(self, node, check_left):
+        """Returns a closure evaluating both operands of a binary node;
+        if check_left is set, the LHS is type checked before an error
+        in the RHS is reported, as the Interpreter checks it first"""
+        left = self.compile_expr(node.left)
+        tok = node.token
+        if type(node.right) is Literal:
+            value = node.right.token.value
+            def operands():
+                return left(), value
+        elif check_left:
+            right = self.compile_expr(node.right)
+            check = runtime.check_left
+            def operands():
+                l = left()
+                try:
+                    return l, right()
+                except Exception:
+                    check(tok, l)
+                    raise
+        else:
+            right = self.compile_expr(node.right)
+            def operands():
+                return left(), right()
+        return operands
+
+    def compile_arith(self, node):
+        tok = node.token
+        typ = tok.get_type()
+        operands = self.compile_operands(node, True)
+        arith = runtime.arith
+        if typ is Token.PLUS:
+            def op():
+                l, r = operands()
+                if type(l) is int and type(r) is int:
+                    return l + r
+                return arith(tok, l, r)
+        elif typ is Token.MINUS:
+            def op():
+                l, r = operands()
+                if type(l) is int and type(r) is int:
+                    return l - r
+                return arith(tok, l, r)
+        elif typ is Token.PRODUCT:
+            def op():
+                l, r = operands()
+                if type(l) is int and type(r) is int:
+                    return l * r
+                return arith(tok, l, r)
+        else:
+            def op():
+                l, r = operands()
+                return arith(tok, l, r)
+        return op
+
+    def compile_comparison(self, node):
+        tok = node.token
+        typ = tok.get_type()
+        operands = self.compile_operands(node, False)
+        compare = runtime.compare
+        if typ is Token.EQUALITY:
+            def op():
+                l, r = operands()
+                return l == r
+        elif typ is Token.INEQUALITY:
+            def op():
+                l, r = operands()
+                return l != r
+        elif typ is Token.LESSER:
+            def op():
+                l, r = operands()
+                if type(l) is int and type(r) is int:
+                    return l < r
+                return compare(tok, l, r)
+        elif typ is Token.GREATER:
+            def op():
+                l, r = operands()
+                if type(l) is int and type(r) is int:
+                    return l > r
+                return compare(tok, l, r)
+        else:
+            def op():
+                l, r = operands()
+                return compare(tok, l, r)
+        return op
+
+    def compile_boolean(self, node):
+        tok = node.token
+        operands = self.compile_operands(node, True)
+        boolean = runtime.boolean
+        def op():
+            l, r = operands()
+            return boolean(tok, l, r)
+        return op
+
+    def compile_unary(self, node):
+        tok = node.token
+        expr = self.compile_expr(node.left)
+        unary = runtime.unary
+        if tok.get_type() is Token.MINUS:
+            def op():
+                value = expr()
+                if type(value) is int:
+                    return -value
+                return unary(tok, value)
+        else:
+            def op():
+                return unary(tok, expr())
+        return op
+
+class ClosureInterpreter(object):
+    """Drop-in replacement for ASTParser.Interpreter that compiles the
+    tree to closures before running it"""
+    def __init__(self, parser, reader=None, writer=None):
+        self.parser = parser
+        self.reader = reader if reader is not None else ConsoleReader()
+        self.writer = writer if writer is not None else ConsoleWriter()
+        self.compiler = None
+        self.program = None
+
+    def compile(self):
+        """Build the closures for the program, only once"""
+        # ensure we have generated a tree
+        if self.parser.root is None:
+            self.parser.get_program()
+        if self.program is None:
+            self.compiler = ClosureCompiler(self.reader, self.writer)
+            self.program = self.compiler.compile(self.parser.root)
+        return self.program
+
+    def execute(self, variables=None):
+        """Run the program with fresh variables, or the ones given, and
+        return the value of its last statement; errors are raised"""
+        program = self.compile()
+        frame = self.compiler.frame
+        frame[:] = [UNDEFINED] * len(frame)
+        if variables:
+            for name, i in self.compiler.name_index.items():
+                if name in variables:
+                    frame[i] = variables[name]
+        try:
+            return runtime.result(program())
+        finally:
+            self.writer.flush()
+
+    def evaluate(self):
+        """Entry point to the execution of the program"""
+        try:
+            value = self.execute()
+        except runtime.Fault as e:
+            runtime.error(e.msg)
+        runtime.finish(value)
+
+    @property
+    def variables(self):
+        """The values of the variables, indexed by name"""
+        if self.compiler is None:
+            return {}
+        return {name: value for name, value in
+                    zip(self.compiler.names, self.compiler.frame)
+                        if value is not UNDEFINED}
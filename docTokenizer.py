@@ -1,18 +1,16 @@
 # ask for a file name
-# read it
+# read it, in chunks, through a memory map
 # tokenize it
 
-from tokenizer import Tokenizer, Token
-from scanner import Scanner
+import mmap
+from lexer import StreamLexer
 
 n = input(">> ")
-with open(n, "r") as f:
-    text = f.read()
-    
-sc = Scanner(text)
-tok = Tokenizer(sc)
-
-t = tok.get_next_token()
-while t.get_type() != Token.EOF:
-    print(t)
-    t = tok.get_next_token()
\ No newline at end of file
+with open(n, "rb") as f:
+    try:
+        source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        # empty files can not be mapped
+        source = f
+    for t in StreamLexer(source).tokens():
+        print(t)
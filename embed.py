@@ -0,0 +1,92 @@
+### Runs Roj programs from Python code
+
+## compile(source) parses (and optimizes) a program once and returns a
+# Program; program.run(inputs=..., env=...) runs it and returns a Result
+# with the value of the program, the values of its 'out' statements and
+# its variables. Nothing is printed and the process never exits:
+#   - a program that can not be parsed raises a ParserException or a
+#     SyntaticException from compile()
+#   - runtime errors raise a runtime.Fault, an InterpreterException, and
+#     'halt' raises a runtime.Halt, with the value halted with in .value
+#   - the errors the engines let through, like "a" + 1, which is a Python
+#     TypeError, are raised as an InterpreterException
+## A Program never changes after compile(): it keeps the tree as the flat
+# records of programCache.py, and every thread that runs it rebuilds its
+# own engine, with its own copy of the tree, the first time; every run
+# starts with fresh variables. So one Program can serve many threads
+
+import marshal
+import threading
+from ASTParser import Parser, Interpreter
+from bytecodeVM import VMInterpreter
+from closureCompiler import ClosureInterpreter
+from stackEvaluator import StackInterpreter
+from programCache import CachedProgram, dump_tree, load_tree
+from channels import IterReader, ListWriter
+from errorSystem import RojException, InterpreterException
+
+# the engines that can start a program with given variables
+ENGINES = {"tree": Interpreter,
+            "vm": VMInterpreter,
+            "closure": ClosureInterpreter,
+            "stack": StackInterpreter}
+
+class Result(object):
+    """What a run of a program left: the value of its last statement, the
+    values of its 'out' statements and its variables, by name"""
+    def __init__(self, value, outputs, variables):
+        self.value = value
+        self.outputs = outputs
+        self.variables = variables
+
+    def __repr__(self):
+        return "Result(value={!r}, outputs={!r}, variables={!r})".format(
+                                self.value, self.outputs, self.variables)
+
+class Program(object):
+    """A compiled program; see compile()"""
+    def __init__(self, source, records, engine):
+        if engine not in ENGINES:
+            raise ValueError("unknown engine {}".format(engine))
+        self.source = source
+        self.engine = engine
+        # marshal'ed, so that no one can change them
+        self.records = records
+        self.local = threading.local()
+
+    def instance(self):
+        """Returns the engine of the calling thread, with its channels"""
+        local = self.local
+        if not hasattr(local, "engine"):
+            tree = load_tree(marshal.loads(self.records))
+            local.reader = IterReader([])
+            local.writer = ListWriter()
+            local.engine = ENGINES[self.engine](CachedProgram(tree, None, {}),
+                                                local.reader, local.writer)
+        return local.engine, local.reader, local.writer
+
+    def run(self, inputs=(), env=None):
+        """Run the program and return its Result; inputs are the answers
+        to its read statements, env the initial values of its variables"""
+        engine, reader, writer = self.instance()
+        reader.lines = iter(inputs)
+        outputs = writer.values = []
+        try:
+            value = engine.execute(env)
+        except RojException:
+            raise
+        except EOFError:
+            raise InterpreterException("Not enough inputs")
+        except Exception as e:
+            raise InterpreterException(
+                        "{}: {}".format(type(e).__name__, e)) from e
+        finally:
+            reader.lines = iter(())
+        return Result(value, outputs, engine.variables)
+
+def compile(source, optimize=True, engine="tree"):
+    """Parse the Roj program in source and return it as a Program that
+    runs with the given engine (tree, vm, closure or stack)"""
+    parser = Parser(source, optimize=optimize)
+    parser.get_program()
+    return Program(source, marshal.dumps(dump_tree(parser.root)), engine)
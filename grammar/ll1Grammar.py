@@ -0,0 +1,306 @@
+### Computes the FIRST and FOLLOW sets of the rules of grammar.txt, reports
+### the conflicts that keep the grammar from being LL(1) and writes the
+### predictive parse table used by ASTParser.Parser
+
+## Usage: python ll1Grammar.py [grammar.txt] [--table ../parseTable.py]
+## The rules are read from the lines "name : rhs"; the rhs may use
+#   'x'          a terminal, written as in the source code
+#   NAME         a terminal that stands for a class of tokens (NUM, ...)
+#   name         a non-terminal
+#   ( ) | * ? +  grouping, alternatives and repetitions
+## Every group and repetition becomes a helper rule, named after the rule
+# it is in, so that the sets are computed on a plain BNF grammar; the
+# conflicts found in helper rules are reported with the text of the rhs
+# they come from
+## A conflict is two alternatives of a rule that can start with the same
+# token, or an alternative that can start with a token that may also
+# follow the rule when another alternative matches nothing
+## The table maps the terminals to the Token types the lexer gives them,
+# so the parser can look its entries up with the kind of a token
+
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                    ".."))
+
+from tokenizer import Token
+from lexer import OPERATORS, KEYWORDS
+
+GRAMMAR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                        "grammar.txt")
+
+SYMBOL = re.compile(r"'[^']*'|[A-Za-z_][A-Za-z0-9_]*|[()|*?+]")
+
+# the punctuation the lexer matches with groups of their own
+PUNCTUATION = {";": Token.SEPARATOR,
+                "(": Token.LGROUP,
+                ")": Token.RGROUP,
+                "[": Token.LBRACKET,
+                "]": Token.RBRACKET,
+                ",": Token.COMMA}
+
+# the terminals that stand for more than one Token type
+CLASSES = {"NUM": (Token.INTEGER, Token.FLOAT)}
+
+def join(symbols):
+    """Writes the symbols back as in the grammar file"""
+    text = " ".join(symbols)
+    for op in [")", "*", "?", "+"]:
+        text = text.replace(" " + op, op)
+    return text.replace("( ", "(")
+
+def is_terminal(symbol):
+    return symbol.startswith("'") or symbol.isupper()
+
+def token_types(terminal):
+    """Returns the Token types the lexer gives to the terminal"""
+    if terminal in CLASSES:
+        return CLASSES[terminal]
+    if not terminal.startswith("'"):
+        return (getattr(Token, terminal),)
+    text = terminal[1:-1]
+    if text in PUNCTUATION:
+        return (PUNCTUATION[text],)
+    if text in OPERATORS:
+        return (OPERATORS[text],)
+    return (KEYWORDS[text][0],)
+
+class Grammar(object):
+    """The rules of a grammar in BNF, with their FIRST and FOLLOW sets"""
+    def __init__(self, text):
+        # the alternatives of every rule, each one a tuple of symbols
+        self.rules = {}
+        # the rules as written in the file, in order
+        self.names = []
+        # the rule each helper rule comes from, and its text
+        self.origin = {}
+        for line in text.splitlines():
+            if " : " not in line:
+                continue
+            name, rhs = line.split(" : ", 1)
+            name = name.strip()
+            self.names.append(name)
+            self.symbols = SYMBOL.findall(rhs)
+            self.pos = 0
+            self.rules[name] = self.alternatives(name)
+            if self.pos != len(self.symbols):
+                raise ValueError("could not read the rule {}".format(name))
+        self.compute_first()
+        self.compute_follow()
+
+    ### Reading the rules; each method reads from self.symbols[self.pos:]
+
+    def alternatives(self, name):
+        alternatives = [self.sequence(name)]
+        while self.peek() == "|":
+            self.pos += 1
+            alternatives.append(self.sequence(name))
+        return alternatives
+
+    def sequence(self, name):
+        items = []
+        while self.peek() not in [None, "|", ")"]:
+            items.append(self.item(name))
+        return tuple(items)
+
+    def item(self, name):
+        start = self.pos
+        if self.peek() == "(":
+            self.pos += 1
+            group = self.alternatives(name)
+            if self.peek() != ")":
+                raise ValueError("unbalanced ( in the rule {}".format(name))
+            self.pos += 1
+            symbol = self.helper(name, group, start)
+        else:
+            symbol = self.symbols[self.pos]
+            self.pos += 1
+        # the repetitions apply to what was just read
+        while self.peek() in ["*", "?", "+"]:
+            op = self.symbols[self.pos]
+            self.pos += 1
+            if op == "?":
+                symbol = self.helper(name, [(symbol,), ()], start)
+            elif op == "*":
+                symbol = self.repetition(name, symbol, start)
+            else:
+                rest = self.repetition(name, symbol, start)
+                symbol = self.helper(name, [(symbol, rest)], start)
+        return symbol
+
+    def repetition(self, name, symbol, start):
+        helper = self.helper(name, [], start)
+        self.rules[helper] = [(symbol, helper), ()]
+        return helper
+
+    def helper(self, name, alternatives, start):
+        """Adds a helper rule for the symbols read since start"""
+        helper = "{}.{}".format(name, sum(1 for h in self.origin
+                                    if self.origin[h][0] == name) + 1)
+        self.rules[helper] = alternatives
+        self.origin[helper] = (name, join(self.symbols[start:self.pos]))
+        return helper
+
+    def peek(self):
+        if self.pos < len(self.symbols):
+            return self.symbols[self.pos]
+        return None
+
+    ### The sets
+
+    def first_of(self, symbols):
+        """Returns the FIRST set of a sequence of symbols and if the
+        sequence can match nothing"""
+        first = set()
+        for symbol in symbols:
+            if is_terminal(symbol):
+                first.add(symbol)
+                return first, False
+            first |= self.first[symbol]
+            if symbol not in self.nullable:
+                return first, False
+        return first, True
+
+    def compute_first(self):
+        self.first = {name: set() for name in self.rules}
+        self.nullable = set()
+        changed = True
+        while changed:
+            changed = False
+            for name, alternatives in self.rules.items():
+                for alternative in alternatives:
+                    first, nullable = self.first_of(alternative)
+                    if not first <= self.first[name]:
+                        self.first[name] |= first
+                        changed = True
+                    if nullable and name not in self.nullable:
+                        self.nullable.add(name)
+                        changed = True
+
+    def compute_follow(self):
+        self.follow = {name: set() for name in self.rules}
+        changed = True
+        while changed:
+            changed = False
+            for name, alternatives in self.rules.items():
+                for alternative in alternatives:
+                    for i, symbol in enumerate(alternative):
+                        if is_terminal(symbol):
+                            continue
+                        first, nullable = self.first_of(alternative[i+1:])
+                        if nullable:
+                            first = first | self.follow[name]
+                        if not first <= self.follow[symbol]:
+                            self.follow[symbol] |= first
+                            changed = True
+
+    def predict(self, name, alternative):
+        """The tokens that tell the parser to pick the alternative"""
+        first, nullable = self.first_of(alternative)
+        if nullable:
+            first = first | self.follow[name]
+        return first
+
+    def conflicts(self):
+        """Returns (rule, alternative, alternative, tokens) for every pair
+        of alternatives of a rule that start with the same tokens"""
+        conflicts = []
+        for name, alternatives in self.rules.items():
+            for i, one in enumerate(alternatives):
+                for other in alternatives[i+1:]:
+                    common = (self.predict(name, one) &
+                                self.predict(name, other))
+                    if common:
+                        conflicts.append((name, one, other, common))
+        return conflicts
+
+    def describe(self, name):
+        """Where a rule comes from, for the reports"""
+        if name in self.origin:
+            return "{}, in {}".format(*self.origin[name])
+        return name
+
+    def alternative_text(self, alternative):
+        if not alternative:
+            return "nothing"
+        return " ".join(self.origin[symbol][1] if symbol in self.origin
+                                    else symbol for symbol in alternative)
+
+    def report(self):
+        """Returns the FIRST and FOLLOW sets and the conflicts as text"""
+        lines = []
+        for name in self.names:
+            lines.append(name)
+            lines.append("    FIRST:  " + " ".join(sorted(self.first[name])))
+            lines.append("    FOLLOW: " + " ".join(sorted(self.follow[name])))
+        conflicts = self.conflicts()
+        lines.append("")
+        lines.append("{} LL(1) conflicts".format(len(conflicts)))
+        for name, one, other, common in conflicts:
+            lines.append("  {}: {} | {} both start with {}".format(
+                        self.describe(name), self.alternative_text(one),
+                        self.alternative_text(other),
+                        " ".join(sorted(common))))
+        return "\n".join(lines)
+
+    ### The table
+
+    def types(self, terminals):
+        return sorted({typ for terminal in terminals
+                                for typ in token_types(terminal)})
+
+    def table(self, source):
+        """Returns the source code of the module with the sets and the
+        predictive table of the rules with alternatives"""
+        out = ["### Generated by grammar/ll1Grammar.py from {}; do not edit"
+                                                                .format(source),
+            "",
+            "## FIRST and FOLLOW have the Token types that can start and",
+            "# follow each rule; PREDICT has the alternatives of the rules",
+            "# that have some, by the Token type that starts them; a type",
+            "# with more than one alternative is an LL(1) conflict",
+            ""]
+        for title, sets in [("FIRST", self.first), ("FOLLOW", self.follow)]:
+            out.append(title + " = {")
+            for name in self.names:
+                out.append("    {!r}: {!r},".format(name,
+                                        tuple(self.types(sets[name]))))
+            out.append("}")
+            out.append("")
+        out.append("PREDICT = {")
+        for name in self.names:
+            alternatives = self.rules[name]
+            if len(alternatives) < 2:
+                continue
+            entries = {}
+            for alternative in alternatives:
+                text = self.alternative_text(alternative)
+                for typ in self.types(self.predict(name, alternative)):
+                    entries.setdefault(typ, []).append(text)
+            out.append("    {!r}: {{".format(name))
+            for typ in sorted(entries):
+                out.append("        {!r}: {!r},".format(typ,
+                                                    tuple(entries[typ])))
+            out.append("    },")
+        out.append("}")
+        return "\n".join(out) + "\n"
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+                description="FIRST/FOLLOW sets and LL(1) conflicts")
+    arg_parser.add_argument("grammar", nargs="?", default=GRAMMAR)
+    arg_parser.add_argument("--table", default=None,
+                help="write the parse table module to this file")
+    args = arg_parser.parse_args()
+
+    with open(args.grammar, "r") as f:
+        grammar = Grammar(f.read())
+    print(grammar.report())
+    if args.table is not None:
+        with open(args.table, "w") as f:
+            f.write(grammar.table("grammar/" +
+                                        os.path.basename(args.grammar)))
+        print("table written to {}".format(args.table))
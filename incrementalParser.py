@@ -0,0 +1,450 @@
+### Keeps the tree of a program up to date as its text is edited, relexing
+### and reparsing only the part of the program the edit touches
+
+## IncrementalParser(text).get_program() parses the program like the Parser
+# does (but the tree is not optimized, so that its statements are the ones
+# in the text); edit(offset, removed, inserted) changes the text and returns
+# the new tree, or raises the errors the Parser would raise on the new text
+## Relexing starts at the last token before the edit and stops as soon as a
+# token starts after the edit where an old token did: from there on the
+# text, and so the tokens, are the same. The new tokens are spliced into
+# the arrays of the TokenBuffer; the offsets of the tokens after the edit
+# are shifted lazily (see offset()), so an edit costs about the distance
+# to the previous edit and not the length of the program
+## Every statement knows how many tokens it has (node.size) and so does
+# every suite (node.suite_size); the sizes do not change when tokens are
+# added before them, so the parser finds the innermost suite with the
+# changed tokens by adding them up, and parses it again from the statement
+# the change starts in, until the parse reaches the start of an old
+# statement after the change: the old statements from there on are kept.
+# If the suite no longer ends where it did, the statement it is in is
+# parsed again, in its own suite
+## A successful statement never looks past the token that follows it, so
+# parsing it again from its start gives what a full parse would give.
+# python incrementalParser.py checks that on random programs and edits
+## An edit that leaves the program with errors keeps the last tree and the
+# tokens it changed; the next edit is reparsed together with it
+
+import sys
+from time import perf_counter
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate, chain, count, repeat
+from operator import add
+from ASTParser import Parser, Literal, CompStmt, Block
+from lexer import Lexer, MASTER_PATTERN
+from tokenizer import Token
+from tokenBuffer import Kind, KIND
+from resolver import statements
+from errorSystem import *
+
+def merge(pending, start, old_end, new_end):
+    """Combines a pending change, (start, old_end, new_end) from the old
+    to the current positions, with one made to the current positions"""
+    if pending is None:
+        return start, old_end, new_end
+    p_start, p_old, p_new = pending
+    if old_end <= p_new:
+        old = p_old
+    else:
+        old = old_end - (p_new - p_old)
+    return (min(p_start, start), old,
+                max(p_new, old_end) + (new_end - old_end))
+
+def starts(stmts, start):
+    """Returns the positions of the statements of a suite that starts at
+    start; the missing first statement of a suite and the Null after its
+    last ';' have no tokens"""
+    # with a ';' after every statement, all done by the builtins as a
+    # suite may have lots of statements
+    sizes = map(getattr, stmts, repeat("size"), repeat(0))
+    positions = list(map(add, accumulate(chain([start], sizes)), count()))
+    positions.pop()
+    return positions
+
+class IncrementalParser(Parser):
+    """Parser that keeps the tree up to date as the text is edited; its
+    only argument is the text of the program"""
+    def __init__(self, text):
+        Parser.__init__(self, text, optimize=False)
+        self.text = text
+        # the tokens from shift_from on start shift characters after what
+        # tokens.offsets says
+        self.shift_from = 0
+        self.shift = 0
+        # changes not lexed (text_damage) or parsed (damage) yet, as
+        # (start, old end, new end) character and token positions
+        self.text_damage = None
+        self.damage = None
+        # the tree of the last text that parsed; self.root is None if
+        # the current text does not parse
+        self.tree = None
+
+    def get_program(self):
+        """Parse the whole program again"""
+        if self.text_damage is not None:
+            self.relex()
+        self.root = None
+        Parser.get_program(self)
+        self.tree = self.root
+        self.damage = None
+
+    def get_suite(self):
+        start = self.pos
+        subtree = Parser.get_suite(self)
+        if subtree is not None:
+            subtree.suite_size = self.pos - start
+        return subtree
+
+    def get_stmt(self):
+        start = self.pos
+        subtree = Parser.get_stmt(self)
+        if subtree is not None:
+            subtree.size = self.pos - start
+        return subtree
+
+    def edit(self, offset, removed, inserted):
+        """Replace the removed characters at offset with the inserted text
+        and return the tree of the new program"""
+        if not 0 <= offset <= offset + removed <= len(self.text):
+            raise ValueError("the edit is out of the text")
+        self.text = (self.text[:offset] + inserted +
+                                    self.text[offset + removed:])
+        self.lexer = Lexer(self.text)
+        self.text_damage = merge(self.text_damage, offset,
+                                offset + removed, offset + len(inserted))
+        self.root = None
+        start = perf_counter()
+        self.relex()
+        self.timings["lex"] = perf_counter() - start
+
+        start = perf_counter()
+        if self.tree is None:
+            self.get_program()
+        elif self.damage is not None:
+            self.reparse()
+        self.root = self.tree
+        self.timings["parse"] = perf_counter() - start
+        return self.root
+
+    ### Tokens
+
+    def offset(self, i):
+        """Returns the offset of the i-th token in the text"""
+        if i >= self.shift_from:
+            return self.tokens.offsets[i] + self.shift
+        return self.tokens.offsets[i]
+
+    def token_at(self, offset):
+        """Returns the index of the first token that starts at or after
+        the offset"""
+        offsets = self.tokens.offsets
+        split = self.shift_from
+        if split < len(offsets) and offsets[split] + self.shift < offset:
+            return bisect_left(offsets, offset - self.shift, split)
+        return bisect_left(offsets, offset, 0, split)
+
+    def relex(self):
+        """Lex the text changed since the tokens were made again and put
+        the new tokens in place of the old ones"""
+        start, old_end, new_end = self.text_damage
+        delta = new_end - old_end
+        text = self.text
+        tokens = self.tokens
+        n = len(tokens)
+        # the token before the change may run into it
+        first = self.token_at(start) - 1
+        if first < 0:
+            first, pos = 0, 0
+        else:
+            pos = self.offset(first)
+        match = MASTER_PATTERN.match
+        build = self.lexer.build
+        new = []
+        while True:
+            m = match(text, pos)
+            if m is None:
+                self.lexer.unknown(text, pos, 0)
+            kind = m.lastgroup
+            begin = m.start(kind)
+            pos = m.end()
+            if kind == "EOF":
+                last = n - 1
+                break
+            if begin >= new_end:
+                # the same text as after the old token starting there
+                last = self.token_at(begin - delta)
+                if last < n and self.offset(last) == begin - delta:
+                    break
+            tok = build(kind, m.group(kind), begin)
+            if tok is not None:
+                new.append((KIND[tok[0]], tokens.intern(tok[1]), begin))
+        self.splice(first, last, new, delta)
+        self.text_damage = None
+
+    def splice(self, first, last, new, delta):
+        """Put the new (kind, value index, offset) tokens in place of the
+        tokens first to last (excluded), where the text after the change
+        moved by delta characters"""
+        tokens = self.tokens
+        kinds, values, offsets = tokens.kinds, tokens.values, tokens.offsets
+        # the tokens that did not change, at both ends, are not damage
+        same = 0
+        while (same < len(new) and first + same < last and
+                    new[same][0] == kinds[first + same] and
+                    new[same][1] == values[first + same]):
+            same += 1
+        end = 0
+        while (end < len(new) - same and last - end > first + same and
+                    new[-1 - end][0] == kinds[last - 1 - end] and
+                    new[-1 - end][1] == values[last - 1 - end]):
+            end += 1
+        if same + end < max(len(new), last - first):
+            self.damage = merge(self.damage, first + same, last - end,
+                                            first + len(new) - end)
+
+        # the tokens from first on are moved by the new shift; the ones
+        # between the old and the new shift_from take it now
+        if self.shift == 0:
+            self.shift_from = last
+        split, shift = self.shift_from, self.shift
+        if split < first:
+            offsets[split:first] = array("I", [o + shift for o in
+                                                offsets[split:first]])
+            split = first + len(new)
+        elif split <= last:
+            split = first + len(new)
+        else:
+            offsets[last:split] = array("I", [o + delta for o in
+                                                offsets[last:split]])
+            split += len(new) - (last - first)
+        kinds[first:last] = array("B", [tok[0] for tok in new])
+        values[first:last] = array("I", [tok[1] for tok in new])
+        offsets[first:last] = array("I", [tok[2] for tok in new])
+        self.shift_from = split
+        self.shift = shift + delta
+
+    ### Statements
+
+    def reparse(self):
+        """Parse the statements the damage is in again, in the innermost
+        suite that still ends where it did"""
+        lo, old_hi, new_hi = self.damage
+        shift = new_hi - old_hi
+        path = self.locate(lo, old_hi)
+        # the program suite is parsed to its end or raises
+        level = len(path) - 1
+        while not self.resync(*path[level], old_hi, shift):
+            level -= 1
+        # the suites and statements around it grew by the change
+        for holder, attr, suite, positions, i in path[:level]:
+            suite.suite_size += shift
+            statements(suite)[i].size += shift
+        self.damage = None
+
+    def locate(self, lo, old_hi):
+        """Returns the suites, outermost first, with the tokens lo to old_hi
+        (excluded) of the tree, as (holder, attribute, suite, starts of its
+        statements, statement the tokens start in)"""
+        holder, attr, start = self.tree, "left", 0
+        path = []
+        while True:
+            suite = getattr(holder, attr)
+            stmts = statements(suite)
+            positions = starts(stmts, start)
+            i = bisect_right(positions, lo) - 1
+            path.append((holder, attr, suite, positions, i))
+            stmt = stmts[i]
+            # the token after the statement must stay as it is
+            if (type(stmt) is not CompStmt or
+                                old_hi > positions[i] + stmt.size):
+                return path
+            inner = self.inner_suite(stmt, positions[i], lo, old_hi)
+            if inner is None:
+                return path
+            holder, attr, start = inner
+
+    def inner_suite(self, stmt, start, lo, old_hi):
+        """Returns the holder, attribute and start of the suite of the
+        compound statement with the tokens lo to old_hi, if any"""
+        end = start + stmt.size - 1
+        if stmt.token.get_type() is Token.WHILE:
+            suites = [(stmt, "right", end)]
+        elif stmt.right.right is None:
+            suites = [(stmt.right, "left", end)]
+        else:
+            # if c do suite end else do suite end
+            else_start = end - stmt.right.right.suite_size
+            suites = [(stmt.right, "right", end),
+                        (stmt.right, "left", else_start - 3)]
+        for holder, attr, end in suites:
+            start = end - getattr(holder, attr).suite_size
+            if start <= lo and old_hi <= end:
+                return holder, attr, start
+        return None
+
+    def resync(self, holder, attr, suite, positions, i, old_hi, shift):
+        """Parse the suite again from its i-th statement, as get_suite
+        does, until the parse reaches an old statement after the change;
+        returns False if the suite does not end where it did"""
+        kinds = self.kinds
+        old = statements(suite)
+        new = []
+        separator = suite.token if i > 0 else None
+        # the index of the first old statement kept
+        rest = len(old)
+        self.pos = positions[i]
+        if i == 0:
+            new.append(self.get_stmt())
+        else:
+            # on the ';' before the statement
+            self.pos -= 1
+        while kinds[self.pos] == Kind.SEPARATOR:
+            if separator is None:
+                separator = self.tokens[self.pos]
+            self.pos += 1
+            old_pos = self.pos - shift
+            if old_pos >= old_hi:
+                j = bisect_left(positions, old_pos)
+                if j < len(positions) and positions[j] == old_pos:
+                    rest = j
+                    break
+            if kinds[self.pos] == Kind.EOF:
+                stmt = Literal(Token(Token.NULL, "Null"), parent=None)
+            else:
+                stmt = self.get_stmt()
+            if stmt is None:
+                break
+            new.append(stmt)
+
+        stmts = old[:i] + new + old[rest:]
+        if len(stmts) == 1 and stmts[0] is None:
+            if holder is self.tree:
+                raise ParserException("Could not parse the program correctly")
+            return False
+        if (rest == len(old) and
+                    self.pos != positions[0] + suite.suite_size + shift):
+            if holder is self.tree:
+                raise ParserException("Could not parse the program")
+            return False
+        if len(stmts) == 1:
+            node = stmts[0]
+        elif type(suite) is Block:
+            # changed in place, as a long suite has lots of statements
+            node = suite
+            node.token = separator
+            node.statements[i:rest] = new
+            for stmt in new:
+                if stmt is not None:
+                    stmt.parent = node
+        else:
+            node = Block(separator, parent=None, statements=stmts)
+        node.suite_size = suite.suite_size + shift
+        node.parent = holder
+        setattr(holder, attr, node)
+        return True
+
+### Self-check: random edits of random programs, compared with a full parse
+
+def dump(root):
+    """Returns the tree as nested tuples, checking the parent of every node"""
+    if root is None:
+        return None
+    for child in root.children():
+        if child.parent is not root:
+            raise AssertionError("wrong parent for {}".format(child))
+    return (type(root).__name__, root.token.get_type(), root.token.value,
+                    [dump(child) for child in root.children()])
+
+def outcome(parse):
+    """The tree a parse gives, or its error"""
+    try:
+        return dump(parse())
+    except RojException as e:
+        return (e.name, str(e))
+
+def full_parse(text):
+    parser = Parser(text, optimize=False)
+    parser.get_program()
+    return parser
+
+def random_program(rng, depth=0):
+    atoms = ["x", "y", "z", "1", "2.5", "\"s\"", "True", "Null", "(x + 1)",
+            "[1, x]", "x[0]", "sum(y)"]
+    def expression():
+        e = rng.choice(atoms)
+        for _ in range(rng.randrange(3)):
+            e += " {} {}".format(rng.choice(["+", "-", "*", "/", "^", "==",
+                                        "<", "and", "or"]), rng.choice(atoms))
+        return e
+    stmts = []
+    for _ in range(rng.randrange(1, 6)):
+        r = rng.random()
+        if r < 0.35:
+            stmts.append("{} = {}".format(rng.choice("xyz"), expression()))
+        elif r < 0.5 and depth < 3:
+            stmts.append("while {} do {} end".format(expression(),
+                                        random_program(rng, depth + 1)))
+        elif r < 0.65 and depth < 3:
+            stmt = "if {} do {} end".format(expression(),
+                                        random_program(rng, depth + 1))
+            if rng.random() < 0.5:
+                stmt += " else do {} end".format(
+                                        random_program(rng, depth + 1))
+            stmts.append(stmt)
+        elif r < 0.75:
+            stmts.append(rng.choice(["out ", "return ", "halt "]) +
+                                                            expression())
+        elif r < 0.85:
+            stmts.append(rng.choice(["stop", "jumpover", "read x",
+                                        "$ note $ y"]))
+        else:
+            stmts.append(expression())
+    sep = rng.choice([";", "; ", ";\n", " ;\n  "])
+    return sep.join(stmts) + rng.choice(["", ";"])
+
+# the text random edits insert
+PIECES = ["x", " ", ";", "1", "+", "=", "(", ")", "do", " end", "while ",
+        "if ", " else do ", "$", "\"", "out ", "\n", "y = 2; ", "!", "and",
+        "[", "]", ",", "len"]
+
+def check(seed, programs, edits):
+    """Apply random edits to random programs; returns the number of edits
+    whose tree, or error, is not the one of a full parse"""
+    import random
+    rng = random.Random(seed)
+    failures = 0
+    for _ in range(programs):
+        text = random_program(rng)
+        parser = IncrementalParser(text)
+        outcome(lambda: (parser.get_program(), parser.root)[1])
+        for _ in range(edits):
+            offset = rng.randrange(len(text) + 1)
+            removed = rng.randrange(min(4, len(text) - offset) + 1)
+            inserted = "".join(rng.choice(PIECES)
+                                for _ in range(rng.randrange(3)))
+            text = text[:offset] + inserted + text[offset + removed:]
+            got = outcome(lambda: parser.edit(offset, removed, inserted))
+            expected = outcome(lambda: full_parse(text).root)
+            if got == expected and parser.text_damage is None:
+                # the tokens must be the ones of the new text too
+                tokens = Lexer(text).tokenize()
+                got = [(parser.tokens.type(i), parser.tokens.value(i),
+                        parser.offset(i)) for i in range(len(parser.tokens))]
+                expected = [(tokens.type(i), tokens.value(i),
+                        tokens.offsets[i]) for i in range(len(tokens))]
+            if got != expected:
+                failures += 1
+                print("mismatch after the edit ({}, {}, {!r}) of:".format(
+                                                offset, removed, inserted))
+                print(text)
+    return failures
+
+if __name__ == "__main__":
+    # python incrementalParser.py [seed] [programs] [edits per program]
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+    programs = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    edits = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    failures = check(seed, programs, edits)
+    print("{} edits, {} mismatches".format(programs * edits, failures))
+    sys.exit(1 if failures else 0)
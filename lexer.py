@@ -0,0 +1,287 @@
+### Tokenizes a whole Roj program with one precompiled regular expression
+### instead of going through the Scanner and the Tokenizer
+
+## The master pattern has one named group per kind of token; every match
+# skips the whitespace before the token and the name of the group that
+# matched tells what the token is
+## The tokens are stored in a TokenBuffer (see tokenBuffer.py) as their
+# kind, value and offset in the source; the line and column are only
+# computed when an error message needs them, from a table with the offsets
+# of the newlines, built on first use
+## The StreamLexer reads the program from a file or an mmap in chunks and
+# yields Token objects lazily; a token that reaches the end of the chunk may
+# continue in the next one, so it is only matched once more text is read
+
+import codecs
+import re
+from bisect import bisect_right
+from scanner import Char
+from tokenizer import Token
+from tokenBuffer import TokenBuffer, KIND
+from errorSystem import *
+
+MASTER_PATTERN = re.compile(r"""
+    [ \t\r\n]*                      # whitespace is skipped
+    (?:
+        (?P<NUM>[0-9.]+)
+      | (?P<WORD>[A-Za-z][A-Za-z0-9_]*)
+      | (?P<STRING>"[^"]*"?)        # the closing " may be missing
+      | (?P<COMMENT>\$[^$]*\$?)     # the closing $ may be missing
+      | (?P<OP>==|!=|>=|<=|[-+*/^=<>])
+      | (?P<SEPARATOR>;)
+      | (?P<LGROUP>\()
+      | (?P<RGROUP>\))
+      | (?P<LBRACKET>\[)
+      | (?P<RBRACKET>\])
+      | (?P<COMMA>,)
+      | (?P<EOF>$)
+    )
+""", re.VERBOSE)
+
+OPERATORS = {"+": Token.PLUS,
+            "-": Token.MINUS,
+            "*": Token.PRODUCT,
+            "/": Token.DIVISION,
+            "^": Token.POWER,
+            "=": Token.ASSIGNMENT,
+            "==": Token.EQUALITY,
+            "!=": Token.INEQUALITY,
+            ">": Token.GREATER,
+            "<": Token.LESSER,
+            ">=": Token.GREATEREQUAL,
+            "<=": Token.LESSEREQUAL}
+
+def keyword_type(word):
+    """Token type and value of a keyword, as Tokenizer.get_keyword does"""
+    if word == "True":
+        return Token.BOOL, True
+    elif word == "False":
+        return Token.BOOL, False
+    return getattr(Token, word.upper(), Token.KEYWORD), word
+
+KEYWORDS = {word: keyword_type(word) for word in Token.KEYWORDS}
+
+# token types of the groups that match a single kind of token
+GROUP_TYPES = {"SEPARATOR": Token.SEPARATOR,
+                "LGROUP": Token.LGROUP,
+                "RGROUP": Token.RGROUP,
+                "LBRACKET": Token.LBRACKET,
+                "RBRACKET": Token.RBRACKET,
+                "COMMA": Token.COMMA}
+
+# at most this many distinct Tokens are shared by the StreamLexer, so that
+# programs with lots of different literals do not fill the memory with them
+SHARED_LIMIT = 4096
+
+WHITESPACE = " \t\r\n"
+
+# characters read at a time by the StreamLexer
+CHUNK_SIZE = 1 << 16
+
+class Lexer(object):
+    """Builds the token sequence of the given program in a single pass"""
+    def __init__(self, text):
+        self.text = text
+        self.newlines = None
+
+    def tokenize(self):
+        """Returns the TokenBuffer with the tokens of the program, the
+        last one being the EOF token"""
+        text = self.text
+        match = MASTER_PATTERN.match
+        build = self.build
+        tokens = TokenBuffer()
+        # TokenBuffer.append, inlined
+        add_kind = tokens.kinds.append
+        add_value = tokens.values.append
+        add_offset = tokens.offsets.append
+        index = tokens.index
+        intern = tokens.intern
+        pos = 0
+
+        while True:
+            m = match(text, pos)
+            if m is None:
+                self.unknown(text, pos, 0)
+            kind = m.lastgroup
+            start = m.start(kind)
+            pos = m.end()
+            tok = build(kind, m.group(kind), start)
+            if tok is not None:
+                typ, value = tok
+                i = index.get((type(value), value))
+                add_kind(KIND[typ])
+                add_value(intern(value) if i is None else i)
+                add_offset(start)
+                if kind == "EOF":
+                    return tokens
+
+    def build(self, kind, value, offset):
+        """Returns the type and value of the token for the text matched
+        by the given group of the master pattern, or None for comments"""
+        if kind == "WORD":
+            if value in KEYWORDS:
+                return KEYWORDS[value]
+            return Token.USER_VAR, value
+        elif kind == "OP":
+            return OPERATORS[value], value
+        elif kind == "NUM":
+            return self.number(value, offset)
+        elif kind == "STRING":
+            if len(value) == 1 or value[-1] != "\"":
+                self.error("Unterminated string", offset)
+            return Token.STRING, value[1:-1]
+        elif kind == "COMMENT":
+            if len(value) == 1 or value[-1] != "$":
+                self.error("Unterminated comment", offset)
+            return None
+        elif kind == "EOF":
+            return Token.EOF, Char.cEOF
+        return GROUP_TYPES[kind], value
+
+    def unknown(self, text, pos, base):
+        """Reports the character at which the master pattern failed;
+        base is the offset of text in the whole program"""
+        # skip the whitespace to point at the offending character
+        pos = len(text) - len(text[pos:].lstrip(WHITESPACE))
+        self.error("Unknown Token starting with '{}'".format(text[pos]),
+                                                                base + pos)
+
+    def number(self, s, offset):
+        """Type and value of a number; a float if it has a dot"""
+        if "." in s:
+            try:
+                return Token.FLOAT, float(s)
+            except ValueError:
+                self.error("Unrecognized float {}".format(s), offset)
+        else:
+            return Token.INTEGER, int(s)
+
+    def position(self, offset):
+        """Returns the line (starting at 1) and the column (starting at 0)
+        of the given offset in the text"""
+        if self.newlines is None:
+            self.newlines = [m.start() for m in
+                                re.finditer("\n", self.text)]
+        line = bisect_right(self.newlines, offset - 1)
+        if line == 0:
+            return 1, offset
+        return line + 1, offset - self.newlines[line - 1] - 1
+
+    def error(self, msg, offset):
+        """Raise an error with a custom message and the position"""
+        line, col = self.position(offset)
+        raise SyntaticException("{} @ line {} col {}".format(msg, line, col))
+
+class StreamLexer(Lexer):
+    """Tokenizes a program read from a file object or an mmap, in chunks;
+    the tokens() generator yields the Tokens as they are found.
+    Only the text of the current chunk and of the token being read is
+    kept in memory, so huge files can be tokenized"""
+    def __init__(self, source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+        Lexer.__init__(self, "")
+        self.source = source
+        self.chunk_size = chunk_size
+        # used if the source gives bytes, as binary files and mmaps do
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        # offset in the program of the first character of self.text
+        self.base = 0
+        # line of self.base and offset of the first character of that line
+        self.line = 1
+        self.line_start = 0
+        self.offset = None
+        self.shared = {}
+
+    def make_token(self, typ, value):
+        """Returns a Token with the given type and value, reusing the one
+        built before if possible"""
+        key = (typ, type(value), value)
+        tok = self.shared.get(key)
+        if tok is None:
+            tok = Token(typ, value)
+            if len(self.shared) < SHARED_LIMIT:
+                self.shared[key] = tok
+        return tok
+
+    def read(self):
+        """Appends the next chunk of the source to the text; returns False
+        if the source has been exhausted"""
+        chunk = self.source.read(self.chunk_size)
+        at_end = not chunk
+        if isinstance(chunk, bytes):
+            chunk = self.decoder.decode(chunk, final=at_end)
+        self.text += chunk
+        return not at_end
+
+    def discard(self, pos):
+        """Forgets the text before pos and the whitespace after it"""
+        text = self.text
+        pos = len(text) - len(text[pos:].lstrip(WHITESPACE))
+        dropped = text[:pos]
+        newlines = dropped.count("\n")
+        if newlines:
+            self.line += newlines
+            self.line_start = self.base + dropped.rindex("\n") + 1
+        self.base += pos
+        self.text = text[pos:]
+
+    def matches(self):
+        """Generates the type, value and offset of each token of the
+        program, the last one being the EOF token"""
+        match = MASTER_PATTERN.match
+        build = self.build
+        more = True
+        pos = 0
+
+        while True:
+            text = self.text
+            m = match(text, pos)
+            # a match that reaches the end of the text may go on in the
+            # next chunk; so may a failed match on the last character
+            if more and (m.end() == len(text) if m is not None else
+                    len(text[pos:].lstrip(WHITESPACE)) <= 1):
+                self.discard(pos)
+                pos = 0
+                more = self.read()
+                continue
+            if m is None:
+                self.unknown(text, pos, self.base)
+            kind = m.lastgroup
+            start = self.base + m.start(kind)
+            pos = m.end()
+            tok = build(kind, m.group(kind), start)
+            if tok is not None:
+                yield tok[0], tok[1], start
+                if kind == "EOF":
+                    return
+
+    def tokens(self):
+        """Generates the Tokens of the program, the last one being the
+        EOF Token; self.offset is the offset of the last Token yielded"""
+        make_token = self.make_token
+        for typ, value, offset in self.matches():
+            self.offset = offset
+            yield make_token(typ, value)
+
+    def tokenize(self):
+        """Returns the TokenBuffer with all the tokens of the program"""
+        tokens = TokenBuffer()
+        append = tokens.append
+        for typ, value, offset in self.matches():
+            append(typ, value, offset)
+        return tokens
+
+    def position(self, offset):
+        """Returns the line and column of an offset in the text in memory"""
+        before = self.text[:offset - self.base]
+        newlines = before.count("\n")
+        if newlines:
+            return (self.line + newlines,
+                        offset - self.base - before.rindex("\n") - 1)
+        return self.line, offset - self.line_start
+
+if __name__ == "__main__":
+    while True:
+        text = input(">> ")
+        for token in Lexer(text).tokenize():
+            print(token)
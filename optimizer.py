@@ -0,0 +1,175 @@
+### Simplifies the AST built by ASTParser.Parser before it is evaluated
+
+## Operators whose operands are all Literals are evaluated once, here, and
+# replaced by a Literal with their value; an operator whose evaluation
+# fails is left untouched, so the error is still raised if, and when, the
+# program reaches it
+## 'if' statements with a Literal condition are replaced by the suite that
+# would run; 'while' loops whose condition is a false Literal never run
+# their body, so it is dropped. Statements that can have no effect are
+# removed from the suites, unless the suite evaluates to their value
+## The tree is walked iteratively, children before parents, so long
+# programs do not hit the recursion limit
+
+from ASTParser import (UnOp, BoolBinOp, CompBinOp, ArithBinOp, Literal,
+                        CompStmt, Block, ArrayLiteral, Call)
+from tokenizer import Token
+import runtime
+
+# Token type of the Literal holding a folded value, by type of the value
+LITERAL_TYPES = {int: Token.INTEGER,
+                float: Token.FLOAT,
+                str: Token.STRING,
+                bool: Token.BOOL}
+
+# integer powers are only folded if the result has at most this many
+# bits, so that the optimizer does not spend its time on huge numbers
+MAX_BITS = 4096
+
+def count_nodes(node):
+    """Returns the number of nodes in the tree rooted at node"""
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if node is not None:
+            count += 1
+            stack.extend(node.children())
+    return count
+
+def null_literal():
+    return Literal(Token(Token.NULL, "Null"))
+
+class Optimizer(object):
+    """Folds constant expressions and removes dead branches from the tree
+    of a program; keeps count of what it did for report()"""
+    def __init__(self):
+        self.folded = 0
+        self.pruned = 0
+        self.removed = 0
+
+    def optimize(self, root):
+        """Optimize, in place, the tree whose root is the EOF node"""
+        before = count_nodes(root)
+        # the second time a node is popped its children were optimized
+        stack = [(root, False)]
+        while stack:
+            node, done = stack.pop()
+            if done and type(node) is Block:
+                node.statements = [self.rewrite(stmt)
+                                        for stmt in node.statements]
+            elif done and type(node) in [ArrayLiteral, Call]:
+                node.items = [self.rewrite(item) for item in node.items]
+            elif done:
+                node.left = self.rewrite(node.left)
+                node.right = self.rewrite(node.right)
+            else:
+                stack.append((node, True))
+                for child in node.children():
+                    stack.append((child, False))
+        self.removed += before - count_nodes(root)
+        return root
+
+    def report(self):
+        """Returns a summary of the changes made to the tree"""
+        return ("{} expressions folded, {} branches pruned, "
+                "{} nodes removed".format(self.folded, self.pruned,
+                                            self.removed))
+
+    def rewrite(self, node):
+        """Returns the node that replaces node, whose children have
+        already been optimized"""
+        typ = None if node is None else node.token.get_type()
+        if type(node) in [ArithBinOp, CompBinOp, BoolBinOp]:
+            if type(node.left) is Literal and type(node.right) is Literal:
+                return self.fold(node)
+        elif type(node) is UnOp and typ is not Token.EOF:
+            if type(node.left) is Literal:
+                return self.fold(node)
+        elif type(node) is CompStmt and typ is Token.IF:
+            if type(node.left) is Literal:
+                return self.prune_if(node)
+        elif type(node) is CompStmt and typ is Token.WHILE:
+            if type(node.left) is Literal and not node.left.token.value:
+                if not is_null(node.right):
+                    node.right = null_literal()
+                    self.pruned += 1
+        elif type(node) is Block:
+            return self.simplify_block(node)
+        return node
+
+    def fold(self, node):
+        """Returns a Literal with the value of the operator node, or the
+        node itself if evaluating it fails"""
+        tok = node.token
+        typ = tok.get_type()
+        try:
+            if type(node) is UnOp:
+                value = runtime.unary(tok, node.left.token.value)
+            else:
+                left = node.left.token.value
+                right = node.right.token.value
+                if (typ is Token.POWER and type(left) is int and
+                        type(right) is int and
+                        left.bit_length() * right > MAX_BITS):
+                    return node
+                if type(node) is ArithBinOp:
+                    value = runtime.arith(tok, left, right)
+                elif type(node) is CompBinOp:
+                    value = runtime.compare(tok, left, right)
+                else:
+                    value = runtime.boolean(tok, left, right)
+        except Exception:
+            # the error is raised when the program runs
+            return node
+        # e.g. a negative number to a fractional power is complex
+        if type(value) not in LITERAL_TYPES:
+            return node
+        self.folded += 1
+        return Literal(Token(LITERAL_TYPES[type(value)], value))
+
+    def simplify_block(self, node):
+        """Returns what replaces a Block whose statements were optimized;
+        the Blocks in it, left by pruned 'if' statements, are merged into
+        it and the value of the statements before the last one is not
+        used, so the inert ones are removed"""
+        stmts = []
+        for stmt in node.statements:
+            if type(stmt) is Block:
+                stmts.extend(stmt.statements)
+            else:
+                stmts.append(stmt)
+        last = stmts.pop()
+        stmts = [stmt for stmt in stmts if not is_inert(stmt)]
+        stmts.append(last)
+        if len(stmts) == 1:
+            return last
+        node.statements = stmts
+        return node
+
+    def prune_if(self, node):
+        """Returns what replaces an 'if' statement with a Literal
+        condition"""
+        self.pruned += 1
+        if node.left.token.value:
+            return node.right.left
+        elif node.right.right is not None:
+            return node.right.right
+        # evaluates to None; keep the statement, without its body
+        node.right.left = null_literal()
+        return node
+
+def is_null(node):
+    return type(node) is Literal and node.token.get_type() is Token.NULL
+
+def is_inert(node):
+    """Tells if the statement node can have no effect and can not alter
+    the flow of the program"""
+    if type(node) is Literal:
+        return True
+    elif type(node) is CompStmt and type(node.left) is Literal:
+        # 'while' and 'if' statements left with nothing to run
+        return not node.left.token.value and (
+                    node.token.get_type() is Token.WHILE or
+                    node.right.right is None)
+    return False
@@ -0,0 +1,149 @@
+### Generated by grammar/ll1Grammar.py from grammar/grammar.txt; do not edit
+
+## FIRST and FOLLOW have the Token types that can start and
+# follow each rule; PREDICT has the alternatives of the rules
+# that have some, by the Token type that starts them; a type
+# with more than one alternative is an LL(1) conflict
+
+FIRST = {
+    'program': ('BOOL', 'FLOAT', 'HALT', 'IF', 'INTEGER', 'JUMPOVER', 'KEYWORD', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'OUT', 'PLUS', 'READ', 'READBOOL', 'READFLOAT', 'READINT', 'RETURN', 'STOP', 'STRING', 'USER_VAR', 'WHILE'),
+    'suite': ('BOOL', 'FLOAT', 'HALT', 'IF', 'INTEGER', 'JUMPOVER', 'KEYWORD', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'OUT', 'PLUS', 'READ', 'READBOOL', 'READFLOAT', 'READINT', 'RETURN', 'STOP', 'STRING', 'USER_VAR', 'WHILE'),
+    'comp_op': ('EQUALITY', 'GREATER', 'GREATEREQUAL', 'INEQUALITY', 'LESSER', 'LESSEREQUAL'),
+    'stmt': ('BOOL', 'FLOAT', 'HALT', 'IF', 'INTEGER', 'JUMPOVER', 'KEYWORD', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'OUT', 'PLUS', 'READ', 'READBOOL', 'READFLOAT', 'READINT', 'RETURN', 'STOP', 'STRING', 'USER_VAR', 'WHILE'),
+    'control': ('HALT', 'JUMPOVER', 'RETURN', 'STOP'),
+    'assignment': ('USER_VAR',),
+    'compound': ('IF', 'WHILE'),
+    'while_stmt': ('WHILE',),
+    'if_stmt': ('IF',),
+    'io_stmt': ('OUT', 'READ', 'READBOOL', 'READFLOAT', 'READINT'),
+    'in_stmt': ('READ', 'READBOOL', 'READFLOAT', 'READINT'),
+    'out_stmt': ('OUT',),
+    'expression': ('BOOL', 'FLOAT', 'INTEGER', 'KEYWORD', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'PLUS', 'STRING', 'USER_VAR'),
+    'or_test': ('BOOL', 'FLOAT', 'INTEGER', 'KEYWORD', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'PLUS', 'STRING', 'USER_VAR'),
+    'and_test': ('BOOL', 'FLOAT', 'INTEGER', 'KEYWORD', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'PLUS', 'STRING', 'USER_VAR'),
+    'not_test': ('BOOL', 'FLOAT', 'INTEGER', 'KEYWORD', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'PLUS', 'STRING', 'USER_VAR'),
+    'comparison': ('BOOL', 'FLOAT', 'INTEGER', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'PLUS', 'STRING', 'USER_VAR'),
+    'arith_expr': ('BOOL', 'FLOAT', 'INTEGER', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'PLUS', 'STRING', 'USER_VAR'),
+    'term': ('BOOL', 'FLOAT', 'INTEGER', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'PLUS', 'STRING', 'USER_VAR'),
+    'factor': ('BOOL', 'FLOAT', 'INTEGER', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'PLUS', 'STRING', 'USER_VAR'),
+    'atom': ('BOOL', 'FLOAT', 'INTEGER', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'PLUS', 'STRING', 'USER_VAR'),
+    'primary': ('BOOL', 'FLOAT', 'INTEGER', 'LBRACKET', 'LGROUP', 'NULL', 'STRING', 'USER_VAR'),
+    'array': ('LBRACKET',),
+    'call': ('USER_VAR',),
+    'items': ('BOOL', 'FLOAT', 'INTEGER', 'KEYWORD', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'PLUS', 'STRING', 'USER_VAR'),
+}
+
+FOLLOW = {
+    'program': (),
+    'suite': ('END', 'EOF'),
+    'comp_op': ('BOOL', 'FLOAT', 'INTEGER', 'LBRACKET', 'LGROUP', 'MINUS', 'NULL', 'PLUS', 'STRING', 'USER_VAR'),
+    'stmt': ('END', 'EOF', 'SEPARATOR'),
+    'control': ('END', 'EOF', 'SEPARATOR'),
+    'assignment': ('END', 'EOF', 'SEPARATOR'),
+    'compound': ('END', 'EOF', 'SEPARATOR'),
+    'while_stmt': ('END', 'EOF', 'SEPARATOR'),
+    'if_stmt': ('END', 'EOF', 'SEPARATOR'),
+    'io_stmt': ('END', 'EOF', 'SEPARATOR'),
+    'in_stmt': ('END', 'EOF', 'SEPARATOR'),
+    'out_stmt': ('END', 'EOF', 'SEPARATOR'),
+    'expression': ('COMMA', 'DO', 'END', 'EOF', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'or_test': ('COMMA', 'DO', 'END', 'EOF', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'and_test': ('COMMA', 'DO', 'END', 'EOF', 'OR', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'not_test': ('AND', 'COMMA', 'DO', 'END', 'EOF', 'OR', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'comparison': ('AND', 'COMMA', 'DO', 'END', 'EOF', 'OR', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'arith_expr': ('AND', 'COMMA', 'DO', 'END', 'EOF', 'EQUALITY', 'GREATER', 'GREATEREQUAL', 'INEQUALITY', 'LESSER', 'LESSEREQUAL', 'OR', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'term': ('AND', 'COMMA', 'DO', 'END', 'EOF', 'EQUALITY', 'GREATER', 'GREATEREQUAL', 'INEQUALITY', 'LESSER', 'LESSEREQUAL', 'MINUS', 'OR', 'PLUS', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'factor': ('AND', 'COMMA', 'DIVISION', 'DO', 'END', 'EOF', 'EQUALITY', 'GREATER', 'GREATEREQUAL', 'INEQUALITY', 'LESSER', 'LESSEREQUAL', 'MINUS', 'OR', 'PLUS', 'PRODUCT', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'atom': ('AND', 'COMMA', 'DIVISION', 'DO', 'END', 'EOF', 'EQUALITY', 'GREATER', 'GREATEREQUAL', 'INEQUALITY', 'LESSER', 'LESSEREQUAL', 'MINUS', 'OR', 'PLUS', 'POWER', 'PRODUCT', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'primary': ('AND', 'COMMA', 'DIVISION', 'DO', 'END', 'EOF', 'EQUALITY', 'GREATER', 'GREATEREQUAL', 'INEQUALITY', 'LBRACKET', 'LESSER', 'LESSEREQUAL', 'MINUS', 'OR', 'PLUS', 'POWER', 'PRODUCT', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'array': ('AND', 'COMMA', 'DIVISION', 'DO', 'END', 'EOF', 'EQUALITY', 'GREATER', 'GREATEREQUAL', 'INEQUALITY', 'LBRACKET', 'LESSER', 'LESSEREQUAL', 'MINUS', 'OR', 'PLUS', 'POWER', 'PRODUCT', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'call': ('AND', 'COMMA', 'DIVISION', 'DO', 'END', 'EOF', 'EQUALITY', 'GREATER', 'GREATEREQUAL', 'INEQUALITY', 'LBRACKET', 'LESSER', 'LESSEREQUAL', 'MINUS', 'OR', 'PLUS', 'POWER', 'PRODUCT', 'RBRACKET', 'RGROUP', 'SEPARATOR'),
+    'items': ('RBRACKET', 'RGROUP'),
+}
+
+PREDICT = {
+    'comp_op': {
+        'EQUALITY': ("'=='",),
+        'GREATER': ("'>'",),
+        'GREATEREQUAL': ("'>='",),
+        'INEQUALITY': ("'!='",),
+        'LESSER': ("'<'",),
+        'LESSEREQUAL': ("'<='",),
+    },
+    'stmt': {
+        'BOOL': ('expression',),
+        'FLOAT': ('expression',),
+        'HALT': ('control',),
+        'IF': ('compound',),
+        'INTEGER': ('expression',),
+        'JUMPOVER': ('control',),
+        'KEYWORD': ('expression',),
+        'LBRACKET': ('expression',),
+        'LGROUP': ('expression',),
+        'MINUS': ('expression',),
+        'NULL': ('expression',),
+        'OUT': ('io_stmt',),
+        'PLUS': ('expression',),
+        'READ': ('io_stmt',),
+        'READBOOL': ('io_stmt',),
+        'READFLOAT': ('io_stmt',),
+        'READINT': ('io_stmt',),
+        'RETURN': ('control',),
+        'STOP': ('control',),
+        'STRING': ('expression',),
+        'USER_VAR': ('expression', 'assignment'),
+        'WHILE': ('compound',),
+    },
+    'control': {
+        'HALT': ("('return' | 'halt') expression?",),
+        'JUMPOVER': ("'jumpover'",),
+        'RETURN': ("('return' | 'halt') expression?",),
+        'STOP': ("'stop'",),
+    },
+    'compound': {
+        'IF': ('if_stmt',),
+        'WHILE': ('while_stmt',),
+    },
+    'io_stmt': {
+        'OUT': ('out_stmt',),
+        'READ': ('in_stmt',),
+        'READBOOL': ('in_stmt',),
+        'READFLOAT': ('in_stmt',),
+        'READINT': ('in_stmt',),
+    },
+    'not_test': {
+        'BOOL': ('comparison',),
+        'FLOAT': ('comparison',),
+        'INTEGER': ('comparison',),
+        'KEYWORD': ("'not' not_test",),
+        'LBRACKET': ('comparison',),
+        'LGROUP': ('comparison',),
+        'MINUS': ('comparison',),
+        'NULL': ('comparison',),
+        'PLUS': ('comparison',),
+        'STRING': ('comparison',),
+        'USER_VAR': ('comparison',),
+    },
+    'atom': {
+        'BOOL': ("primary ('[' expression ']')*",),
+        'FLOAT': ("primary ('[' expression ']')*",),
+        'INTEGER': ("primary ('[' expression ']')*",),
+        'LBRACKET': ("primary ('[' expression ']')*",),
+        'LGROUP': ("primary ('[' expression ']')*",),
+        'MINUS': ("('+' | '-') atom",),
+        'NULL': ("primary ('[' expression ']')*",),
+        'PLUS': ("('+' | '-') atom",),
+        'STRING': ("primary ('[' expression ']')*",),
+        'USER_VAR': ("primary ('[' expression ']')*",),
+    },
+    'primary': {
+        'BOOL': ('BOOL',),
+        'FLOAT': ('NUM',),
+        'INTEGER': ('NUM',),
+        'LBRACKET': ('array',),
+        'LGROUP': ("'(' expression ')'",),
+        'NULL': ("'Null'",),
+        'STRING': ('STRING',),
+        'USER_VAR': ('USER_VAR', 'call'),
+    },
+}
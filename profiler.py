@@ -0,0 +1,91 @@
+### Profiles a Roj program line by line
+
+## The Parser is asked to give every statement the number of the source
+# line it starts on (Parser(..., positions=True)); the ProfilingInterpreter
+# times every statement it visits and adds it to the totals of its line:
+#   - hits: number of times a statement of the line was executed
+#   - cumulative: time spent in the statements of the line, including the
+#     statements they run, e.g. the body of a while loop; a line that is
+#     running already (a loop body on the same line as the loop) is not
+#     counted twice
+#   - self: the time spent in the statements of the line minus the time
+#     spent in the statements they run, which count for their own lines
+## The plain Interpreter is untouched, so profiling costs nothing when it
+# is not used
+
+from time import perf_counter
+from ASTParser import Parser, Interpreter
+
+class LineStats(object):
+    """The totals of one source line"""
+    __slots__ = ("hits", "cumulative", "self_time", "active")
+
+    def __init__(self):
+        self.hits = 0
+        self.cumulative = 0.0
+        self.self_time = 0.0
+        # number of statements of the line currently running
+        self.active = 0
+
+class ProfilingInterpreter(Interpreter):
+    """Interpreter that records the time spent on each source line; the
+    parser must have been created with positions=True"""
+    def __init__(self, parser, reader=None, writer=None):
+        Interpreter.__init__(self, parser, reader, writer)
+        self.lines = {}
+        # time spent in the statements run by each running statement
+        self.children = []
+
+    def visit(self, node):
+        line = getattr(node, "line", None)
+        if line is None:
+            return Interpreter.visit(self, node)
+
+        stats = self.lines.get(line)
+        if stats is None:
+            stats = self.lines[line] = LineStats()
+        stats.hits += 1
+        stats.active += 1
+        self.children.append(0.0)
+        start = perf_counter()
+        try:
+            return Interpreter.visit(self, node)
+        finally:
+            elapsed = perf_counter() - start
+            children = self.children.pop()
+            stats.active -= 1
+            if not stats.active:
+                stats.cumulative += elapsed
+            stats.self_time += elapsed - children
+            if self.children:
+                self.children[-1] += elapsed
+
+    def report(self, limit=None):
+        """Returns the source listing of the lines that ran, the most
+        expensive first"""
+        source = self.parser.lexer.text.split("\n")
+        total = sum(stats.self_time for stats in self.lines.values())
+        rows = sorted(self.lines.items(),
+                        key=lambda item: item[1].cumulative, reverse=True)
+        if limit is not None:
+            rows = rows[:limit]
+
+        out = ["{:>6} {:>9} {:>12} {:>12} {:>6}  {}".format(
+                "line", "hits", "cumulative", "self", "self%", "source")]
+        for line, stats in rows:
+            text = source[line - 1].strip() if line <= len(source) else ""
+            share = 100 * stats.self_time / total if total else 0
+            out.append("{:>6} {:>9} {:>11.6f}s {:>11.6f}s {:>5.1f}%  {}".format(
+                    line, stats.hits, stats.cumulative, stats.self_time,
+                    share, text))
+        return "\n".join(out)
+
+if __name__ == "__main__":
+    import sys
+    with open(sys.argv[1], "r") as f:
+        text = f.read()
+    interpreter = ProfilingInterpreter(Parser(text, positions=True))
+    try:
+        interpreter.evaluate()
+    finally:
+        print(interpreter.report())
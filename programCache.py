@@ -0,0 +1,246 @@
+### Caches the parsed (and optimized) trees of Roj programs on disk
+
+## Like Python's .pyc files: after a program is parsed its tree is written
+# to the cache directory, in a file named after a hash of the source, the
+# parser options and FORMAT_VERSION; running the same source again loads
+# the tree from that file and skips the lexer, the parser and the optimizer
+## Changing the source changes its hash, so the entry of the old source is
+# simply never used again; the least recently used entries are deleted
+# when the cache grows past its size limit
+## The tree is stored with marshal, as a flat list of nodes in post-order:
+#   (node class, token kind, token value, index of left, index of right)
+# where a Block has the tuple of the indices of its statements as left,
+# so that it is written and rebuilt without recursion, whatever its depth;
+# so do an ArrayLiteral and a Call, with their items
+## Entries are written to a temporary file that is then renamed, so that a
+# reader never sees half of an entry; an entry that can not be read is
+# deleted and counted as a miss
+
+import hashlib
+import marshal
+import os
+import tempfile
+from time import perf_counter
+from ASTParser import (UnOp, IOOp, Control, BinOp, BoolBinOp, CompBinOp,
+                        ArithBinOp, Literal, Variable, CompStmt, Block,
+                        ArrayLiteral, Call, Index)
+from tokenizer import Token
+from tokenBuffer import KINDS, KIND
+
+# bump whenever the trees built by the parser or the optimizer change
+FORMAT_VERSION = 3
+
+SUFFIX = ".rojc"
+
+NODE_CLASSES = [UnOp, IOOp, Control, BinOp, BoolBinOp, CompBinOp,
+                ArithBinOp, Literal, Variable, CompStmt, Block,
+                ArrayLiteral, Call, Index]
+NODE_CLASS = {cls: i for i, cls in enumerate(NODE_CLASSES)}
+# number of children each class takes in its constructor, None for a list
+ARITY = {cls: 2 if issubclass(cls, (BinOp, CompStmt)) else
+                1 if issubclass(cls, UnOp) else 0 for cls in NODE_CLASSES}
+ARITY[Block] = ARITY[ArrayLiteral] = ARITY[Call] = None
+
+def dump_tree(root):
+    """Returns the tree whose root is root as a list of records"""
+    records = []
+    # index of each node already in records, by id
+    index = {}
+    stack = [(root, False)]
+    while stack:
+        node, done = stack.pop()
+        if done:
+            cls = getattr(type(node), "generic", type(node))
+            if cls is Block:
+                left = tuple(-1 if stmt is None else index[id(stmt)]
+                                            for stmt in node.statements)
+            elif ARITY[cls] is None:
+                left = tuple(index[id(item)] for item in node.items)
+            else:
+                left = -1 if node.left is None else index[id(node.left)]
+            right = -1 if node.right is None else index[id(node.right)]
+            index[id(node)] = len(records)
+            records.append((NODE_CLASS[cls], KIND[node.token.get_type()],
+                                            node.token.value, left, right))
+        else:
+            stack.append((node, True))
+            for child in reversed(node.children()):
+                stack.append((child, False))
+    return records
+
+def load_tree(records):
+    """Rebuilds the tree from its records and returns its root"""
+    nodes = []
+    append = nodes.append
+    tokens = {}
+    for cls, kind, value, left, right in records:
+        typ = KINDS[kind]
+        key = (kind, type(value), value)
+        token = tokens.get(key)
+        if token is None:
+            token = tokens[key] = Token(typ, value)
+
+        cls = NODE_CLASSES[cls]
+        arity = ARITY[cls]
+        if arity == 2:
+            append(cls(token, None, None if left < 0 else nodes[left],
+                                    None if right < 0 else nodes[right]))
+        elif arity == 1:
+            append(cls(token, None, None if left < 0 else nodes[left]))
+        elif arity is None:
+            append(cls(token, None, [None if i < 0 else nodes[i]
+                                                        for i in left]))
+        else:
+            append(cls(token))
+    return nodes[-1]
+
+class CachedProgram(object):
+    """Stands for the Parser of a program loaded from the cache; it has
+    the tree of the program in self.root, as the engines expect"""
+    def __init__(self, root, token_count, timings):
+        self.root = root
+        self.token_count = token_count
+        self.tokens = None
+        self.optimizer = None
+        self.timings = timings
+
+    def get_program(self):
+        """The tree is built already"""
+        pass
+
+class ProgramCache(object):
+    """A directory with the trees of the programs run recently, of at most
+    max_bytes bytes in total"""
+    def __init__(self, directory, max_bytes=64*1024*1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, source, optimize):
+        """Returns the name of the entry of the source code"""
+        digest = hashlib.sha256()
+        digest.update("{}:{}:{}\n".format(FORMAT_VERSION, marshal.version,
+                                            int(bool(optimize))).encode())
+        digest.update(source.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def path(self, source, optimize):
+        return os.path.join(self.directory,
+                                self.key(source, optimize) + SUFFIX)
+
+    def load(self, source, optimize=True):
+        """Returns the CachedProgram of the source, or None if it is not
+        in the cache"""
+        path = self.path(source, optimize)
+        start = perf_counter()
+        try:
+            with open(path, "rb") as f:
+                # much faster than marshal.load(f), which reads the file
+                # in small pieces
+                data = f.read()
+            version, token_count, records = marshal.loads(data)
+            if version != FORMAT_VERSION:
+                raise ValueError("entry of another version")
+            root = load_tree(records)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (EOFError, ValueError, TypeError, IndexError, KeyError):
+            # a corrupted entry; it is replaced when the program is parsed
+            self.misses += 1
+            self.remove(path)
+            return None
+        self.hits += 1
+        # the last use of the entry is its modification time
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return CachedProgram(root, token_count,
+                                {"load": perf_counter() - start})
+
+    def store(self, source, parser, optimize=True):
+        """Write the tree of the parser, that parsed source, to the cache;
+        the program must not have run yet"""
+        if parser.root is None:
+            parser.get_program()
+        data = marshal.dumps((FORMAT_VERSION, len(parser.tokens),
+                                                    dump_tree(parser.root)))
+        path = self.path(source, optimize)
+        tmp = None
+        try:
+            # fails too if the directory was removed since the cache was
+            # created; the cache is then only skipped
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            if tmp is not None:
+                self.remove(tmp)
+            return
+        self.stores += 1
+        self.evict()
+
+    def entries(self):
+        """Returns (last use, size, path) for every entry in the cache"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def evict(self):
+        """Delete the least recently used entries until the cache fits in
+        max_bytes"""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if self.remove(path):
+                self.evictions += 1
+            total -= size
+
+    def remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def clear(self):
+        """Delete every entry"""
+        for _, _, path in self.entries():
+            self.remove(path)
+
+    def report(self):
+        """Returns the counters of the cache"""
+        return ("cache: {} hits, {} misses, {} stored, {} evicted".format(
+                    self.hits, self.misses, self.stores, self.evictions))
+
+if __name__ == "__main__":
+    import sys
+    from ASTParser import Parser
+    cache = ProgramCache(sys.argv[2] if len(sys.argv) > 2 else ".rojcache")
+    with open(sys.argv[1], "r") as f:
+        text = f.read()
+    program = cache.load(text)
+    if program is None:
+        parser = Parser(text)
+        cache.store(text, parser)
+        print("parsed and stored in the cache")
+    else:
+        print("loaded from the cache in {:.6f}s".format(
+                                                program.timings["load"]))
+    print(cache.report())
@@ -0,0 +1,502 @@
+### Translates the AST built by ASTParser.Parser into Python source code,
+### which is compiled with the built-in compile() and run
+
+## The program becomes one Python function; Roj variables are its local
+# variables (prefixed with v_), 'while'/'if' become their Python
+# counterparts, 'stop' is break and 'jumpover' is continue
+## Roj rejects some operations Python would happily perform, like True + 1
+# or "a" < "b". A flow-insensitive type inference finds the operations
+# whose operands can only be numbers (or only booleans) and those are
+# emitted as plain Python operators; all the others call the generic
+# functions in runtime.py
+## Expressions have no side effects, so when the generated code fails
+# the failing expression is evaluated again by ASTParser.Interpreter with
+# the current values of the variables; that reports the exact error the
+# Interpreter would have reported for the program
+
+from ASTParser import (Parser, Interpreter, UnOp, IOOp, Control, BinOp,
+                        BoolBinOp, CompBinOp, ArithBinOp, Literal, Variable,
+                        CompStmt, Block, ArrayLiteral, Call, Index)
+from resolver import statements
+from tokenizer import Token
+from errorSystem import *
+from channels import ConsoleReader, ConsoleWriter
+import runtime
+import arrays
+import math
+
+NUMERIC = frozenset([int, float])
+BOOLEAN = frozenset([bool])
+ARRAYS = frozenset(arrays.ARRAYS)
+ANY = frozenset([int, float, str, bool]) | ARRAYS
+
+# precedence of the generated Python expressions, to add parenthesis
+# only where they are needed
+ATOM = 100
+POWER = 90
+UNARY = 80
+PRODUCT = 70
+SUM = 60
+BITAND = 50
+BITOR = 40
+COMPARISON = 30
+
+PY_ARITH = {Token.PLUS: ("+", SUM), Token.MINUS: ("-", SUM),
+            Token.PRODUCT: ("*", PRODUCT), Token.DIVISION: ("/", PRODUCT)}
+PY_COMP = {Token.EQUALITY: "==", Token.INEQUALITY: "!=",
+            Token.GREATER: ">", Token.LESSER: "<",
+            Token.GREATEREQUAL: ">=", Token.LESSEREQUAL: "<="}
+PY_BOOL = {Token.AND: ("&", BITAND), Token.OR: ("|", BITOR)}
+
+FILENAME = "<roj>"
+FUNCTION = "_roj_program"
+
+# generated source -> code object, so programs seen before are not
+# compiled again
+_code_cache = {}
+CODE_CACHE_SIZE = 64
+
+def get_code(source):
+    """Compile the generated source, or reuse the code object compiled
+    for it before"""
+    code = _code_cache.get(source)
+    if code is None:
+        code = compile(source, FILENAME, "exec")
+        if len(_code_cache) >= CODE_CACHE_SIZE:
+            del _code_cache[next(iter(_code_cache))]
+        _code_cache[source] = code
+    return code
+
+class Transpiler(object):
+    """Generates the Python source for the AST of a program"""
+    def __init__(self):
+        self.lines = []
+        # the expression node evaluated by each generated line, if any
+        self.line_nodes = []
+        self.indent = 0
+        self.loop_depth = 0
+        self.tokens = []
+        self.consts = []
+        self.var_types = {}
+
+    def transpile(self, root):
+        """Returns the Python source for the tree whose root is the EOF
+        node; the source defines one function returning the value of the
+        last statement"""
+        self.infer_types(root)
+        self.emit("def {}():".format(FUNCTION))
+        self.indent += 1
+        self.emit("_result = None")
+        self.gen_suite(root.left, True)
+        self.emit("return _result, locals()")
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, line, node=None):
+        self.lines.append("    " * self.indent + line)
+        self.line_nodes.append(node)
+
+    def token(self, tok):
+        self.tokens.append(tok)
+        return "_tok[{}]".format(len(self.tokens) - 1)
+
+    ### Type inference
+
+    def infer_types(self, root):
+        """Find the types each variable may hold, from all the
+        assignments and read statements in the program"""
+        assignments = []
+        nodes = [root]
+        while nodes:
+            node = nodes.pop()
+            if node is None:
+                continue
+            typ = node.token.get_type()
+            if type(node) is BinOp and typ is Token.ASSIGNMENT:
+                assignments.append((node.left.token.value, node.right))
+            elif type(node) is IOOp and typ is not Token.OUT:
+                read_types = {Token.READ: str, Token.READINT: int,
+                        Token.READFLOAT: float, Token.READBOOL: bool}
+                name = node.left.token.value
+                self.var_types[name] = self.var_types.get(name,
+                                    frozenset()) | {read_types[typ]}
+            nodes.extend(node.children())
+
+        changed = True
+        while changed:
+            changed = False
+            for name, expr in assignments:
+                types = self.var_types.get(name, frozenset())
+                new_types = types | self.type_of(expr)
+                if new_types != types:
+                    self.var_types[name] = new_types
+                    changed = True
+
+    def type_of(self, node):
+        """The set of types the expression node may evaluate to"""
+        typ = None if node is None else node.token.get_type()
+        if type(node) is Literal:
+            return frozenset([type(node.token.value)])
+        elif type(node) is Variable:
+            return self.var_types.get(node.token.value, frozenset())
+        elif type(node) is ArithBinOp:
+            left = self.type_of(node.left)
+            right = self.type_of(node.right)
+            if left <= NUMERIC and right <= NUMERIC:
+                if typ is Token.DIVISION:
+                    return frozenset([float])
+                elif typ is Token.POWER:
+                    return NUMERIC
+                return left | right
+            elif typ is Token.PLUS and left | right <= frozenset([str]):
+                return frozenset([str])
+            return ANY
+        elif type(node) is CompBinOp:
+            # comparing arrays compares their items
+            if (self.type_of(node.left) | self.type_of(node.right)) & ARRAYS:
+                return ANY
+            return BOOLEAN
+        elif type(node) is BoolBinOp:
+            return BOOLEAN
+        elif type(node) is UnOp:
+            if typ is Token.NEGATION:
+                return BOOLEAN
+            child = self.type_of(node.left)
+            return child if child <= NUMERIC else ANY
+        elif type(node) is BinOp and typ is Token.ASSIGNMENT:
+            return self.type_of(node.right)
+        return ANY
+
+    ### Statements
+
+    def gen_suite(self, node, tail):
+        """Generate the statements of a suite; if tail is set, the value
+        of the last one is stored in _result"""
+        stmts = statements(node)
+        for stmt in stmts[:-1]:
+            self.gen_stmt(stmt, False)
+        self.gen_stmt(stmts[-1], tail)
+
+    def gen_stmt(self, node, tail):
+        typ = None if node is None else node.token.get_type()
+        target = "_result = " if tail else ""
+        if type(node) is Block:
+            self.gen_suite(node, tail)
+        elif type(node) is BinOp and typ is Token.ASSIGNMENT:
+            targets, expr = self.assignment(node)
+            self.emit(target + targets + self.expr(expr)[0], expr)
+        elif type(node) is IOOp and typ is Token.OUT:
+            self.emit(target + "_write({})".format(self.expr(node.left)[0]),
+                                                                node.left)
+        elif type(node) is IOOp:
+            self.emit("{}v_{} = _read({})".format(target,
+                            node.left.token.value, self.token(node.token)))
+        elif type(node) is Control:
+            self.gen_control(node, tail)
+        elif type(node) is CompStmt and typ is Token.WHILE:
+            self.emit("while {}:".format(self.expr(node.left)[0]), node.left)
+            self.indent += 1
+            self.loop_depth += 1
+            self.gen_suite(node.right, False)
+            self.loop_depth -= 1
+            self.indent -= 1
+            # a while statement always evaluates to None
+            if tail:
+                self.emit("_result = None")
+        elif type(node) is CompStmt and typ is Token.IF:
+            self.emit("if {}:".format(self.expr(node.left)[0]), node.left)
+            self.indent += 1
+            self.gen_suite(node.right.left, tail)
+            self.indent -= 1
+            if node.right.right is not None or tail:
+                self.emit("else:")
+                self.indent += 1
+                if node.right.right is not None:
+                    self.gen_suite(node.right.right, tail)
+                else:
+                    self.emit("_result = None")
+                self.indent -= 1
+        elif node is None or isinstance(node, (Literal, Variable, UnOp,
+                                                BinOp, ArrayLiteral)):
+            # expression statement; evaluated for its errors, at least
+            self.emit(target + self.expr(node)[0], node)
+        else:
+            self.gen_fault("There is no visit_ method for " + str(node))
+
+    def assignment(self, node):
+        """Returns the 'v_a = v_b = ' prefix of a chain of assignments
+        and the expression assigned"""
+        targets = ""
+        while type(node) is BinOp and node.token.get_type() is \
+                                                        Token.ASSIGNMENT:
+            targets += "v_{} = ".format(node.left.token.value)
+            node = node.right
+        return targets, node
+
+    def gen_control(self, node, tail):
+        tok = node.token
+        typ = tok.get_type()
+        if typ in [Token.STOP, Token.JUMPOVER]:
+            if not self.loop_depth:
+                # it would travel all the way up to the end of the program
+                self.gen_fault("{} used out of scope".format(tok.value))
+            elif typ is Token.STOP:
+                self.emit("break")
+            else:
+                self.emit("continue")
+        elif typ is Token.HALT:
+            self.emit("_halt({})".format(self.expr(node.left)[0]), node.left)
+        elif typ is Token.RETURN:
+            expr = self.expr(node.left)[0]
+            if tail:
+                self.emit("_result = _ReturnValue({})".format(expr),
+                                                            node.left)
+            else:
+                self.emit(expr, node.left)
+        else:
+            self.gen_fault("Unknown control operator{}".format(tok))
+
+    def gen_fault(self, msg):
+        self.emit("_fault({!r})".format(msg))
+
+    ### Expressions
+    ## return the source of the expression and its precedence
+
+    def expr(self, node):
+        typ = None if node is None else node.token.get_type()
+        if type(node) is Literal:
+            value = node.token.value
+            if type(value) is float and not math.isfinite(value):
+                self.consts.append(value)
+                return "_const[{}]".format(len(self.consts) - 1), ATOM
+            # the optimizer folds -2 into a Literal, which is -2 ** x in
+            # Python if it is not parenthesized
+            source = repr(value)
+            return source, UNARY if source.startswith("-") else ATOM
+        elif type(node) is Variable:
+            return "v_" + node.token.value, ATOM
+        elif type(node) is ArithBinOp:
+            return self.arith(node)
+        elif type(node) is CompBinOp:
+            return self.comparison(node)
+        elif type(node) is BoolBinOp:
+            return self.boolean(node)
+        elif type(node) is UnOp:
+            return self.unary(node)
+        elif type(node) is BinOp and typ is Token.ASSIGNMENT:
+            return "(v_{} := {})".format(node.left.token.value,
+                                        self.expr(node.right)[0]), ATOM
+        elif type(node) is ArrayLiteral:
+            return "_array([{}])".format(", ".join(self.expr(item)[0]
+                                            for item in node.items)), ATOM
+        elif type(node) is Index:
+            return "_index({}, {})".format(self.expr(node.left)[0],
+                                        self.expr(node.right)[0]), ATOM
+        elif type(node) is Call:
+            return "_functions[{!r}]({})".format(node.token.value,
+                                ", ".join(self.expr(item)[0]
+                                            for item in node.items)), ATOM
+        else:
+            return "_fault({!r})".format(
+                        "There is no visit_ method for " + str(node)), ATOM
+
+    def operand(self, node, min_prec):
+        source, prec = self.expr(node)
+        if prec < min_prec:
+            return "(" + source + ")"
+        return source
+
+    def numeric(self, node):
+        return self.type_of(node.left) <= NUMERIC and \
+                self.type_of(node.right) <= NUMERIC
+
+    def call(self, function, node):
+        return "{}({}, {}, {})".format(function, self.token(node.token),
+                self.expr(node.left)[0], self.expr(node.right)[0]), ATOM
+
+    def arith(self, node):
+        typ = node.token.get_type()
+        if not self.numeric(node):
+            return self.call("_arith", node)
+        if typ is Token.POWER:
+            # Roj's ^ is left associative and binds looser than unary -
+            return "{} ** {}".format(self.operand(node.left, ATOM),
+                                self.operand(node.right, UNARY)), POWER
+        op, prec = PY_ARITH[typ]
+        return "{} {} {}".format(self.operand(node.left, prec), op,
+                                self.operand(node.right, prec + 1)), prec
+
+    def comparison(self, node):
+        typ = node.token.get_type()
+        if typ not in [Token.EQUALITY, Token.INEQUALITY] and \
+                                            not self.numeric(node):
+            return self.call("_compare", node)
+        # Roj chains comparisons as (a < b) < c, Python does not
+        return "{} {} {}".format(self.operand(node.left, COMPARISON + 1),
+                                PY_COMP[typ],
+                                self.operand(node.right, COMPARISON + 1)), \
+                COMPARISON
+
+    def boolean(self, node):
+        if not (self.type_of(node.left) <= BOOLEAN and
+                        self.type_of(node.right) <= BOOLEAN):
+            return self.call("_boolean", node)
+        # & and | evaluate both sides, like the Interpreter does
+        op, prec = PY_BOOL[node.token.get_type()]
+        return "{} {} {}".format(self.operand(node.left, prec), op,
+                                self.operand(node.right, prec + 1)), prec
+
+    def unary(self, node):
+        typ = node.token.get_type()
+        if typ in [Token.MINUS, Token.PLUS] and \
+                                    self.type_of(node.left) <= NUMERIC:
+            op = "-" if typ is Token.MINUS else "+"
+            return op + self.operand(node.left, UNARY), UNARY
+        return "_unary({}, {})".format(self.token(node.token),
+                                        self.expr(node.left)[0]), ATOM
+
+def _halt(value):
+    raise runtime.Halt(value)
+
+def _fault(msg):
+    raise runtime.Fault(msg)
+
+class PythonInterpreter(object):
+    """Drop-in replacement for ASTParser.Interpreter that translates the
+    tree to Python and runs the compiled code"""
+    def __init__(self, parser, reader=None, writer=None):
+        self.parser = parser
+        self.reader = reader if reader is not None else ConsoleReader()
+        self.writer = writer if writer is not None else ConsoleWriter()
+        self.transpiler = None
+        self.source = None
+        self.function = None
+        self.variables = {}
+
+    def get_source(self):
+        """Returns the generated Python source, for inspection"""
+        # ensure we have generated a tree
+        if self.parser.root is None:
+            self.parser.get_program()
+        if self.source is None:
+            self.transpiler = Transpiler()
+            self.source = self.transpiler.transpile(self.parser.root)
+        return self.source
+
+    def compile(self):
+        """Build the Python function that runs the program, only once"""
+        if self.function is None:
+            source = self.get_source()
+            try:
+                code = get_code(source)
+            except RecursionError:
+                raise InterpreterException(
+                        "Program is too deeply nested to compile to Python")
+            reader, write = self.reader, self.writer.write
+            def _write(value):
+                write(value)
+                return value
+            namespace = {"_tok": self.transpiler.tokens,
+                        "_const": self.transpiler.consts,
+                        "_arith": runtime.arith,
+                        "_compare": runtime.compare,
+                        "_boolean": runtime.boolean,
+                        "_unary": runtime.unary,
+                        "_read": lambda tok: runtime.read(tok.get_type(),
+                                                                    reader),
+                        "_write": _write,
+                        "_halt": _halt,
+                        "_fault": _fault,
+                        "_ReturnValue": runtime.ReturnValue,
+                        "_array": arrays.build,
+                        "_index": arrays.index,
+                        "_functions": {name: function for name,
+                                (function, _, _) in arrays.FUNCTIONS.items()}}
+            exec(code, namespace)
+            self.function = namespace[FUNCTION]
+        return self.function
+
+    def execute(self):
+        """Run the program and return the value of its last statement;
+        errors are raised"""
+        function = self.compile()
+        try:
+            value, local_vars = function()
+        except Exception as e:
+            self.explain(e)
+            raise
+        finally:
+            self.writer.flush()
+        self.variables = {name[2:]: value for name, value in
+                    local_vars.items() if name.startswith("v_")}
+        return runtime.result(value)
+
+    def evaluate(self):
+        """Entry point to the execution of the program"""
+        try:
+            value = self.execute()
+        except runtime.Fault as e:
+            runtime.error(e.msg)
+        runtime.finish(value)
+
+    def explain(self, exception):
+        """Evaluate the expression that raised the exception with the
+        Interpreter, to report the error it would report"""
+        tb = exception.__traceback__
+        frame = None
+        while tb is not None:
+            if tb.tb_frame.f_code.co_filename == FILENAME:
+                frame, lineno = tb.tb_frame, tb.tb_lineno
+            tb = tb.tb_next
+        if frame is None:
+            return
+        self.variables = {name[2:]: value for name, value in
+                            frame.f_locals.items() if name.startswith("v_")}
+        node = self.transpiler.line_nodes[lineno - 1]
+        if node is not None:
+            interpreter = Interpreter(self.parser, self.reader, self.writer)
+            interpreter.variables = dict(self.variables)
+            interpreter.visit(node)
+
+# programs whose Python source is easy to get wrong, for check()
+CHECKS = ["i = 0; out -2 ^ i;",
+        "i = 0.5; out -0.5 ^ i;",
+        "i = 0; out -0.0 ^ i;",
+        "i = 2; out -3 ^ i * 2; out 1 - -2 ^ i; out -(2) ^ i;",
+        "x = 2; out x ^ 3 ^ 2; out -x ^ 2; out 2 ^ -x;",
+        "x = 1; out x < 2 < 3; out x == 1 == True;",
+        "x = 7; out x / 2; out x - (1 - 2); out -(x - 1) * 2;"]
+
+def check():
+    """Runs CHECKS with the tree Interpreter and the PythonInterpreter,
+    with and without the optimizer; returns the number of differences"""
+    from channels import ListWriter
+    failures = 0
+    for text in CHECKS:
+        for optimize in (True, False):
+            outputs = []
+            for Engine in (Interpreter, PythonInterpreter):
+                writer = ListWriter()
+                try:
+                    Engine(Parser(text, optimize=optimize), None,
+                                                        writer).execute()
+                except RojException as e:
+                    writer.values.append(e.name)
+                outputs.append(list(map(str, writer.values)))
+            if outputs[0] != outputs[1]:
+                print("{!r}: {} instead of {}".format(text, outputs[1],
+                                                            outputs[0]))
+                failures += 1
+    return failures
+
+if __name__ == "__main__":
+    # python pyTranspiler.py [file]: prints the Python source of the file,
+    # or checks the engine against the Interpreter if no file is given
+    import sys
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r") as f:
+            text = f.read()
+        print(PythonInterpreter(Parser(text)).get_source())
+    else:
+        failures = check()
+        print("{} differences".format(failures))
+        sys.exit(1 if failures else 0)
@@ -0,0 +1,148 @@
+### Resolves the variables of a program to slots in a list-backed frame
+
+## Every distinct user variable gets an integer slot; the Variable nodes
+# of the tree are annotated with it (node.slot) so the Interpreter reads
+# and writes frame[node.slot] instead of looking the name up in a dict
+## The resolver also follows the flow of the program to tell, for every
+# variable read, if the variable
+#   - is assigned on every path to the read: the read can not fail and
+#     needs no check (node.checked is False)
+#   - is assigned on no path to the read: the read always fails if it is
+#     reached; it is listed in self.undefined
+#   - may or may not be assigned: the read is checked when it happens
+## A read that did not fail means the variable is assigned from then on
+## Blocks and while loops are marked with node.signals, False when no
+# stop, jumpover or halt can run inside them; the Interpreter only checks
+# for those after the statements of the ones marked True
+
+from ASTParser import (IOOp, Control, BinOp, Literal, Variable, CompStmt,
+                        Block, ArrayLiteral, Call)
+from tokenizer import Token
+
+def statements(node):
+    """Returns the list of statements in a suite"""
+    if type(node) is Block:
+        return node.statements
+    return [node]
+
+class Resolver(object):
+    """Assigns the frame slots of the variables of a program"""
+    def __init__(self):
+        # name of the variable of each slot
+        self.names = []
+        self.slots = {}
+        # Variable nodes whose read always fails
+        self.undefined = []
+
+    def slot(self, name):
+        """Returns the slot of the variable name, assigning a new one if
+        it is the first time the variable is seen"""
+        if name not in self.slots:
+            self.slots[name] = len(self.names)
+            self.names.append(name)
+        return self.slots[name]
+
+    def resolve(self, root):
+        """Resolve the variables of the tree whose root is the EOF node"""
+        # the slots assigned on every path and on some path, so far
+        self.suite(root.left, set(), set())
+
+    def warnings(self, defined=()):
+        """Returns a message for every read that always fails, but for
+        the variables in defined, which have a value when the program
+        starts"""
+        return ["variable '{}' is read before it is assigned".format(
+                            node.token.value) for node in self.undefined
+                                    if node.token.value not in defined]
+
+    ### The flow of the program
+    ## the methods take the sets of the slots that are assigned on every
+    # path and on some path up to the node; they update them in place
+    # to what they are after the node. suite and stmt return True if a
+    # stop, jumpover or halt may run in the node
+
+    def suite(self, node, must, may):
+        signals = False
+        for stmt in statements(node):
+            if self.stmt(stmt, must, may):
+                signals = True
+        if type(node) is Block:
+            node.signals = signals
+        return signals
+
+    def stmt(self, node, must, may):
+        typ = None if node is None else node.token.get_type()
+        if type(node) is Block:
+            return self.suite(node, must, may)
+        elif type(node) is IOOp and typ is not Token.OUT:
+            self.assign(node.left, must, may)
+        elif type(node) is CompStmt and typ is Token.WHILE:
+            # reads in the loop see the assignments of previous iterations
+            may |= self.assigned(node)
+            self.expr(node.left, must, may)
+            # the body may not run at all
+            node.signals = self.suite(node.right, set(must), may)
+            return node.signals
+        elif type(node) is CompStmt and typ is Token.IF:
+            self.expr(node.left, must, may)
+            then_must = set(must)
+            signals = self.suite(node.right.left, then_must, may)
+            if node.right.right is not None:
+                if self.suite(node.right.right, must, may):
+                    signals = True
+            must &= then_must
+            return signals
+        elif type(node) is Control:
+            self.expr(node.left, must, may)
+            return typ is not Token.RETURN
+        else:
+            self.expr(node, must, may)
+        return False
+
+    def expr(self, node, must, may):
+        # walked with a stack, expressions can be nested very deep; the
+        # second item tells if the node is the variable of an assignment
+        stack = [(node, False)]
+        while stack:
+            node, target = stack.pop()
+            if target:
+                self.assign(node, must, may)
+            elif type(node) is Variable:
+                slot = node.slot = self.slot(node.token.value)
+                node.checked = slot not in must
+                if slot not in may:
+                    self.undefined.append(node)
+                must.add(slot)
+                may.add(slot)
+            elif (type(node) is BinOp and
+                            node.token.get_type() is Token.ASSIGNMENT):
+                stack.append((node.left, True))
+                stack.append((node.right, False))
+            elif type(node) is ArrayLiteral or type(node) is Call:
+                # the items are evaluated from left to right
+                for item in reversed(node.items):
+                    stack.append((item, False))
+            elif node is not None and type(node) is not Literal:
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+
+    def assign(self, node, must, may):
+        """Resolve the Variable node that is assigned to"""
+        slot = node.slot = self.slot(node.token.value)
+        must.add(slot)
+        may.add(slot)
+
+    def assigned(self, node):
+        """Returns the slots of the variables assigned in the subtree"""
+        slots = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            typ = node.token.get_type()
+            if ((type(node) is BinOp and typ is Token.ASSIGNMENT) or
+                    (type(node) is IOOp and typ is not Token.OUT)):
+                slots.add(self.slot(node.left.token.value))
+            stack.extend(node.children())
+        return slots
@@ -0,0 +1,165 @@
+### Runs a Roj program and collects statistics about the run
+
+## run() returns a RunStats with the wall time of every phase (lexing,
+# which scans and tokenizes in one pass, parsing, optimizing and
+# evaluating) and a few counts: tokens, AST nodes, depth of the tree and,
+# for the tree walking Interpreter, the number of statements executed
+## RunStats.report() formats them as the block RojInterpreter.py --stats
+# prints; RunStats.as_dict() gives them as a dict, e.g. to log as JSON
+
+from time import perf_counter
+from ASTParser import Parser, Interpreter, CompStmt, Block
+from optimizer import count_nodes
+from resolver import statements
+from tokenizer import Token
+
+PHASES = ["load", "lex", "parse", "optimize", "evaluate"]
+
+def tree_depth(root):
+    """Returns the number of nodes on the longest path from the root"""
+    depth = 0
+    stack = [(root, 1)]
+    while stack:
+        node, level = stack.pop()
+        depth = max(depth, level)
+        for child in node.children():
+            stack.append((child, level + 1))
+    return depth
+
+def statement_nodes(root):
+    """Returns the set of the ids of the nodes that are statements"""
+    ids = set()
+    suites = [root.left]
+    while suites:
+        for stmt in statements(suites.pop()):
+            if stmt is None:
+                continue
+            elif type(stmt) is Block:
+                # a suite inlined by the optimizer
+                suites.append(stmt)
+                continue
+            ids.add(id(stmt))
+            if type(stmt) is CompStmt and stmt.token.get_type() is Token.WHILE:
+                suites.append(stmt.right)
+            elif type(stmt) is CompStmt:
+                suites.append(stmt.right.left)
+                if stmt.right.right is not None:
+                    suites.append(stmt.right.right)
+    return ids
+
+class CountingInterpreter(Interpreter):
+    """Interpreter that counts the statements it executes"""
+    def __init__(self, parser, reader=None, writer=None):
+        Interpreter.__init__(self, parser, reader, writer)
+        self.statements = 0
+        self.statement_ids = None
+
+    def execute(self, variables=None):
+        self.resolve()
+        self.statement_ids = statement_nodes(self.parser.root)
+        return Interpreter.execute(self, variables)
+
+    def visit(self, node):
+        if id(node) in self.statement_ids:
+            self.statements += 1
+        return Interpreter.visit(self, node)
+
+class RunStats(object):
+    """Timings (in seconds) and counts of one run of a program; counts
+    that are not known are None"""
+    def __init__(self):
+        self.times = {}
+        self.tokens = None
+        self.nodes = None
+        self.removed = None
+        self.depth = None
+        self.statements = None
+        self.quickened = None
+        self.deoptimized = None
+
+    def record_parser(self, parser):
+        """Record the phases and counts of a parser whose program was
+        built already, or of a programCache.CachedProgram"""
+        self.times.update(parser.timings)
+        if parser.tokens is None:
+            # a program loaded from the cache
+            self.tokens = parser.token_count
+        else:
+            self.tokens = len(parser.tokens)
+        self.nodes = count_nodes(parser.root)
+        if parser.optimizer is not None:
+            self.removed = parser.optimizer.removed
+        self.depth = tree_depth(parser.root)
+
+    def record_interpreter(self, interpreter, elapsed):
+        """Record the evaluation of the program by an interpreter; only
+        the tree walking interpreters have counters"""
+        self.times["evaluate"] = elapsed
+        self.statements = getattr(interpreter, "statements", None)
+        self.quickened = getattr(interpreter, "quickened", None)
+        self.deoptimized = getattr(interpreter, "deoptimized", None)
+
+    def as_dict(self):
+        return {"times": dict(self.times),
+                "total_time": sum(self.times.values()),
+                "tokens": self.tokens,
+                "nodes": self.nodes,
+                "removed_nodes": self.removed,
+                "depth": self.depth,
+                "statements": self.statements,
+                "quickened": self.quickened,
+                "deoptimized": self.deoptimized}
+
+    def report(self):
+        """Returns the statistics as a block of text"""
+        def show(value):
+            return "n/a" if value is None else str(value)
+        lines = ["--- stats ---"]
+        for phase in PHASES:
+            if phase in self.times:
+                lines.append("{:<22}{:.6f}s".format(phase,
+                                                    self.times[phase]))
+        lines.append("{:<22}{:.6f}s".format("total",
+                                                sum(self.times.values())))
+        lines.append("{:<22}{}".format("tokens", show(self.tokens)))
+        nodes = show(self.nodes)
+        if self.removed:
+            nodes += " ({} removed by the optimizer)".format(self.removed)
+        lines.append("{:<22}{}".format("AST nodes", nodes))
+        lines.append("{:<22}{}".format("tree depth", show(self.depth)))
+        lines.append("{:<22}{}".format("statements executed",
+                                                    show(self.statements)))
+        if self.quickened is not None:
+            lines.append("{:<22}{} ({} deoptimized)".format(
+                        "nodes quickened", self.quickened, self.deoptimized))
+        return "\n".join(lines)
+
+def run(source, Engine=Interpreter, optimize=True, stats=None):
+    """Run the Roj program in source with the given engine and return its
+    RunStats; if the program ends with an error, or exits, the times and
+    counts known so far are still in stats (when given)"""
+    if stats is None:
+        stats = RunStats()
+    parser = Parser(source, optimize=optimize)
+    parser.get_program()
+    stats.record_parser(parser)
+
+    if Engine is Interpreter:
+        Engine = CountingInterpreter
+    interpreter = Engine(parser)
+    start = perf_counter()
+    try:
+        interpreter.evaluate()
+    finally:
+        stats.record_interpreter(interpreter, perf_counter() - start)
+    return stats
+
+if __name__ == "__main__":
+    import sys
+    with open(sys.argv[1], "r") as f:
+        text = f.read()
+    stats = RunStats()
+    try:
+        run(text, stats=stats)
+    finally:
+        print(stats.report())
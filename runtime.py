@@ -0,0 +1,183 @@
+### Operator semantics shared by the compiled execution engines
+## The engines built on top of the AST (the bytecode VM, ...) handle the
+# common int/int case inline and fall back on the functions of this file
+# for everything else; the functions mirror the visit_ methods of
+# ASTParser.Interpreter so every engine raises the same errors
+## Runtime errors are raised as a Fault (a 'halt' as a Halt); the
+# execute() method of every engine lets them through, evaluate() reports
+# them by printing them and exiting, with error()
+
+from tokenizer import Token
+from errorSystem import *
+from arrays import Array
+from sys import exit
+
+# the operators of the Arrays (arrays.py) apply to every item
+ARITH_TYPES = (int, float, str, Array)
+NUM_TYPES = (int, float, Array)
+
+class Fault(InterpreterException):
+    """A runtime error of a program, reported with the message msg"""
+    def __init__(self, msg):
+        InterpreterException.__init__(self, msg)
+        self.msg = msg
+
+class Halt(Fault):
+    """Raised by a 'halt' statement, with the value it was given"""
+    def __init__(self, value):
+        Fault.__init__(self, "program halted: {}".format(value))
+        self.value = value
+
+def error(msg):
+    """Report a runtime error the same way ASTParser.Interpreter does"""
+    print(msg)
+    exit()
+
+def arith(tok, left, right):
+    """Evaluate the arithmetic binary operator tok; same type checking
+    as Interpreter.visit_ArithBinOp"""
+    if type(left) not in ARITH_TYPES:
+        raise TypeException("LHS of {} operator cannot be of type {}".format(
+                    tok.value, type(left).__name__))
+    if type(right) not in ARITH_TYPES:
+        raise TypeException("RHS of {} operator cannot be of type {}".format(
+                    tok.value, type(right).__name__))
+    typ = tok.get_type()
+    if typ is Token.PLUS:
+        return left + right
+
+    # Token.PLUS is the only one to handle anything beyond numbers
+    if type(left) not in NUM_TYPES:
+        raise TypeException("LHS of {} operator cannot be of type {}".format(
+                    tok.value, type(left).__name__))
+    if type(right) not in NUM_TYPES:
+        raise TypeException("RHS of {} operator cannot be of type {}".format(
+                    tok.value, type(right).__name__))
+    if typ is Token.MINUS:
+        return left - right
+    elif typ is Token.PRODUCT:
+        return left * right
+    elif typ is Token.DIVISION:
+        return left / right
+    elif typ is Token.POWER:
+        return pow(left, right)
+    else:
+        raise Fault("Unknown arithmetic binary operator{}".format(tok))
+
+def compare(tok, left, right):
+    """Evaluate the comparison operator tok; same type checking as
+    Interpreter.visit_CompBinOp"""
+    typ = tok.get_type()
+    # does not need type checking
+    if typ is Token.EQUALITY:
+        return left == right
+    elif typ is Token.INEQUALITY:
+        return left != right
+
+    # cannot compare strings or booleans with these operators
+    if type(left) not in NUM_TYPES:
+        raise TypeException("LHS of {} operator cannot be of type {}".format(
+                    tok.value, type(left).__name__))
+    if type(right) not in NUM_TYPES:
+        raise TypeException("RHS of {} operator cannot be of type {}".format(
+                    tok.value, type(right).__name__))
+    if typ is Token.GREATER:
+        return left > right
+    elif typ is Token.LESSER:
+        return left < right
+    elif typ is Token.GREATEREQUAL:
+        return left >= right
+    elif typ is Token.LESSEREQUAL:
+        return left <= right
+    else:
+        raise Fault("Unknown comparison binary operator{}".format(tok))
+
+def boolean(tok, left, right):
+    """Evaluate the boolean operator tok; same type checking as
+    Interpreter.visit_BoolBinOp"""
+    if type(left) != bool:
+        raise TypeException("LHS of {} should be a boolean".format(tok))
+    if type(right) != bool:
+        raise TypeException("RHS of {} should be a boolean".format(tok))
+
+    typ = tok.get_type()
+    if typ is Token.AND:
+        return left and right
+    elif typ is Token.OR:
+        return left or right
+    else:
+        raise InterpreterException(
+                "Unknown boolean binary operator{}".format(tok))
+
+def unary(tok, value):
+    """Evaluate the unary operator tok; same checks as
+    Interpreter.visit_UnOp"""
+    typ = tok.get_type()
+    if typ is Token.MINUS:
+        if type(value) not in NUM_TYPES:
+            raise Fault("- did not expect value of type {}".format(
+                                                type(value).__name__))
+        return -1 * (value)
+    elif typ is Token.PLUS:
+        if type(value) not in NUM_TYPES:
+            raise Fault("+ did not expect value of type {}".format(
+                                                type(value).__name__))
+        return value
+    elif typ is Token.NEGATION:
+        if type(value) != bool:
+            raise Fault("'not' expected a boolean, not a {}".format(
+                                                type(value).__name__))
+        return not value
+    else:
+        raise Fault("Could not evaluate {}".format(tok))
+
+def read(typ, reader):
+    """Read a value for a read statement of type typ from the reader (see
+    channels.py); readint, readfloat and readbool convert what was read"""
+    inp = reader.read()
+    if typ is Token.READINT:
+        try:
+            inp = int(inp)
+        except Exception:
+            raise Fault("Could not read an integer")
+    elif typ is Token.READFLOAT:
+        try:
+            inp = float(inp)
+        except Exception:
+            raise Fault("Could not read a float")
+    elif typ is Token.READBOOL:
+        if inp in ["True", "False"]:
+            inp = eval(inp)
+        else:
+            raise Fault("Could not read a boolean")
+    return inp
+
+class ReturnValue(object):
+    """Value of a 'return' statement; it only means something if it
+    reaches the end of the program, where it is reported as misused"""
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+def check_left(tok, left):
+    """Type check the LHS of the arithmetic or boolean operator tok;
+    the Interpreter does it before evaluating the RHS, so an error in the
+    RHS must be preceded by this check"""
+    if tok.get_type() in [Token.AND, Token.OR]:
+        if type(left) != bool:
+            raise TypeException("LHS of {} should be a boolean".format(tok))
+    elif type(left) not in ARITH_TYPES:
+        raise TypeException("LHS of {} operator cannot be of type {}".format(
+                    tok.value, type(left).__name__))
+
+def result(value):
+    """Returns the value the program terminated with; a 'return' that got
+    all the way here was used out of scope"""
+    if isinstance(value, ReturnValue):
+        raise Fault("{} used out of scope".format(value.value))
+    return value
+
+def finish(value):
+    """Report the value the program terminated with"""
+    print("program terminated; return value <{}>".format(value))
@@ -0,0 +1,153 @@
+### Evaluates the expressions of a Roj program with an explicit work stack
+
+## The tree walking Interpreter evaluates an expression by recursion, a
+# visit_ call (and a couple of Python frames) per operator, so machine
+# generated expressions with thousands of chained or nested operators
+# overflow the Python stack. The StackInterpreter evaluates every
+# expression in a single loop instead: the nodes still to be visited go
+# on a work stack and the values of the operands on a value stack, in
+# post-order; the statements are still visited by the Interpreter
+## The operands are type checked at the same points as in the visit_
+# methods of the Interpreter (the LHS of arithmetic and boolean operators
+# before the RHS is evaluated), so the same errors are raised in the same
+# order, and the nodes are quickened and deoptimized the same way
+
+from ASTParser import (Interpreter, UnOp, BoolBinOp, CompBinOp, ArithBinOp,
+                    IntArithBinOp, FloatArithBinOp, IntCompBinOp,
+                    FloatCompBinOp, Literal, Variable, UNDEFINED)
+from tokenizer import Token
+from runtime import check_left, boolean, unary
+
+# what the evaluation loop does with each kind of node
+LITERAL, VARIABLE, UNARY, BOOL, COMP, QUICK_COMP, ARITH, QUICK_ARITH = range(8)
+KINDS = {Literal: LITERAL,
+        Variable: VARIABLE,
+        UnOp: UNARY,
+        BoolBinOp: BOOL,
+        CompBinOp: COMP,
+        IntCompBinOp: QUICK_COMP,
+        FloatCompBinOp: QUICK_COMP,
+        ArithBinOp: ARITH,
+        IntArithBinOp: QUICK_ARITH,
+        FloatArithBinOp: QUICK_ARITH}
+
+# the steps of a node on the work stack
+ENTER, LEFT_DONE, DONE = range(3)
+
+class StackInterpreter(Interpreter):
+    """Interpreter that evaluates expressions without recursion, whatever
+    their depth; same arguments as the Interpreter"""
+    def visit_UnOp(self, node):
+        """The EOF node of the program is a UnOp too"""
+        if node.token.get_type() is Token.EOF:
+            return Interpreter.visit_UnOp(self, node)
+        return self.expression(node)
+
+    def expression(self, root):
+        """Evaluate the expression whose root is root"""
+        values = []
+        push = values.append
+        work = [(root, ENTER)]
+        pop = work.pop
+        schedule = work.append
+        frame = self.frame
+        while work:
+            node, step = pop()
+            kind = KINDS.get(type(node))
+            if step is ENTER:
+                if kind is LITERAL:
+                    push(node.token.value)
+                elif kind is VARIABLE:
+                    value = frame[node.slot]
+                    if node.checked and value is UNDEFINED:
+                        self.error("Undefined variable '{}'".format(
+                                                        node.token.value))
+                    push(value)
+                elif kind is None:
+                    # not an expression node; let the Interpreter have it
+                    push(self.visit(node))
+                elif kind is UNARY:
+                    schedule((node, DONE))
+                    schedule((node.left, ENTER))
+                else:
+                    schedule((node, LEFT_DONE))
+                    schedule((node.left, ENTER))
+
+            elif step is LEFT_DONE:
+                # the LHS is evaluated, check it before the RHS
+                left = values[-1]
+                if kind is QUICK_ARITH:
+                    if type(left) is not node.operand:
+                        self.deoptimize(node)
+                        check_left(node.token, left)
+                elif kind is ARITH or kind is BOOL:
+                    check_left(node.token, left)
+                schedule((node, DONE))
+                schedule((node.right, ENTER))
+
+            elif kind is UNARY:
+                values[-1] = unary(node.token, values[-1])
+
+            else:
+                right = values.pop()
+                left = values[-1]
+                if kind is QUICK_ARITH:
+                    if type(right) is node.operand:
+                        values[-1] = node.operation(left, right)
+                    else:
+                        self.deoptimize(node)
+                        values[-1] = self.arith(node, left, right)
+                elif kind is ARITH:
+                    values[-1] = self.arith(node, left, right)
+                elif kind is QUICK_COMP:
+                    if (type(left) is node.operand and
+                                        type(right) is node.operand):
+                        values[-1] = node.operation(left, right)
+                    else:
+                        self.deoptimize(node)
+                        values[-1] = self.compare(node, left, right)
+                elif kind is COMP:
+                    values[-1] = self.compare(node, left, right)
+                else:
+                    values[-1] = boolean(node.token, left, right)
+        return values[0]
+
+    visit_BoolBinOp = visit_CompBinOp = visit_ArithBinOp = expression
+    visit_IntCompBinOp = visit_FloatCompBinOp = expression
+    visit_IntArithBinOp = visit_FloatArithBinOp = expression
+
+def check(depth):
+    """Parses and evaluates expressions nested depth levels deep, at the
+    default recursion limit; returns the number of wrong results"""
+    from ASTParser import Parser
+    from channels import ListWriter
+    # expression: its value for x = 1
+    cases = {"(x - " * depth + "1" + ")" * depth: (depth + 1) % 2,
+            "-(" * depth + "x" + ")" * depth: (-1) ** depth,
+            "(x * (x + " * depth + "1" + "))" * depth: depth + 1,
+            "x" + " + 2 * x" * depth: 2 * depth + 1}
+    failures = 0
+    for expression, value in cases.items():
+        writer = ListWriter()
+        for optimize in (True, False):
+            parser = Parser("x = 1; out {};".format(expression),
+                                                        optimize=optimize)
+            StackInterpreter(parser, None, writer).execute()
+        if writer.values != [value, value]:
+            print("{}...: {} instead of {}".format(expression[:20],
+                                                    writer.values, value))
+            failures += 1
+    return failures
+
+if __name__ == "__main__":
+    # python stackEvaluator.py [file]; checks deep expressions if no file
+    # is given
+    import sys
+    from ASTParser import Parser
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r") as f:
+            StackInterpreter(Parser(f.read())).evaluate()
+    else:
+        failures = check(5000)
+        print("{} wrong results".format(failures))
+        sys.exit(1 if failures else 0)
@@ -0,0 +1,102 @@
+### Stores the token sequence of a program in parallel arrays instead of
+### a list of Token objects
+
+## Every token is three numbers: its kind, a small int standing for its
+# Token type; the index of its value in a table of the distinct values of
+# the program; and the offset of the token in the source code
+## The Parser looks at the kinds array directly; Token objects are only
+# built when a node of the AST needs one, or when a debugging tool asks
+# for them, and equal tokens are shared
+
+from array import array
+from tokenizer import Token
+
+# the Token types, in kind order
+KINDS = tuple(sorted(Token.get_types()))
+KIND = {typ: kind for kind, typ in enumerate(KINDS)}
+
+class Kind(object):
+    """The kind of each Token type, as Kind.<TYPE>, to compare with the
+    entries of TokenBuffer.kinds"""
+    pass
+
+for typ, kind in KIND.items():
+    setattr(Kind, typ, kind)
+
+class TokenBuffer(object):
+    """The token sequence of a program; indexing it returns Token views,
+    the kinds, values and offsets arrays give the raw data"""
+    def __init__(self):
+        self.kinds = array("B")
+        self.values = array("I")
+        self.offsets = array("I")
+        # the distinct values, indexed by TokenBuffer.values
+        self.table = []
+        self.index = {}
+        # Token views already built, by kind and value index
+        self.views = {}
+
+    def intern(self, value):
+        """Returns the index of the value in the table, adding it if new"""
+        # True == 1, so the type of the value is part of the key
+        key = (type(value), value)
+        i = self.index.get(key)
+        if i is None:
+            i = self.index[key] = len(self.table)
+            self.table.append(value)
+        return i
+
+    def append(self, typ, value, offset):
+        """Adds a token with the given type, value and source offset"""
+        self.kinds.append(KIND[typ])
+        self.values.append(self.intern(value))
+        self.offsets.append(offset)
+
+    def type(self, i):
+        """Returns the Token type of the i-th token"""
+        return KINDS[self.kinds[i]]
+
+    def value(self, i):
+        """Returns the value of the i-th token"""
+        return self.table[self.values[i]]
+
+    def token(self, i):
+        """Returns a Token object for the i-th token"""
+        kind = self.kinds[i]
+        key = (kind, self.values[i])
+        tok = self.views.get(key)
+        if tok is None:
+            tok = self.views[key] = Token(KINDS[kind], self.table[key[1]])
+        return tok
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.token(j) for j in range(len(self))[i]]
+        if i < 0:
+            i += len(self)
+        return self.token(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.token(i)
+
+if __name__ == "__main__":
+    # compare the memory used by a TokenBuffer and a list of Tokens
+    import sys
+    from lexer import Lexer
+
+    with open(sys.argv[1]) as f:
+        text = f.read()
+    buffer = Lexer(text).tokenize()
+    n = len(buffer)
+    tokens = [Token(buffer.type(i), buffer.value(i)) for i in range(n)]
+    as_objects = sys.getsizeof(tokens) + sum(sys.getsizeof(tok)
+                                                for tok in tokens)
+    as_arrays = sum(sys.getsizeof(a) for a in [buffer.kinds,
+                                            buffer.values, buffer.offsets])
+    print("{} tokens".format(n))
+    print("Token objects: {:.1f} bytes per token".format(as_objects / n))
+    print("TokenBuffer: {:.1f} bytes per token".format(as_arrays / n))
@@ -36,6 +36,9 @@ class Token(object):
     SEPARATOR = "SEPARATOR"
     LGROUP = "LGROUP"
     RGROUP = "RGROUP"
+    LBRACKET = "LBRACKET"
+    RBRACKET = "RBRACKET"
+    COMMA = "COMMA"
     ASSIGNMENT = "ASSIGNMENT"
     COMMENT = "COMMENT"
     NULL = "NULL"
@@ -109,9 +112,11 @@ class Token(object):
         ]
         return MOPERATORS
 
+    __slots__ = ("typ", "value")
+
     def __init__(self, typ, value):
         """Initialize the token; store its type and value"""
-        if typ not in Token.get_types():
+        if typ not in TYPES:
             raise Exception("Unknown token type {}".format(typ))
         self.typ = typ
         self.value = value
@@ -131,6 +136,9 @@ class Token(object):
     def __repr__(self):
         return self.__str__()
 
+# the known Token types, computed once instead of on every Token creation
+TYPES = frozenset(Token.get_types())
+
 class Tokenizer(object):
     """Implements an object to build Tokens from the given input.
     Needs a Scanner object as input and reads characters from there"""
@@ -185,6 +193,13 @@ class Tokenizer(object):
             return Token(Token.LGROUP, c.char)
         if c.char == ")":
             return Token(Token.RGROUP, c.char)
+        # arrays
+        if c.char == "[":
+            return Token(Token.LBRACKET, c.char)
+        if c.char == "]":
+            return Token(Token.RBRACKET, c.char)
+        if c.char == ",":
+            return Token(Token.COMMA, c.char)
         # operator
         if c.char in "".join(Token.get_operators()):
             return self.get_operator(c)
@@ -250,6 +265,8 @@ class Tokenizer(object):
         flag = c.char
         next_char = self.scanner.get_next_char()
         while next_char.char != flag:
+            if next_char.is_eof():
+                self.error("Unterminated comment")
             next_char = self.scanner.get_next_char()
         
     def get_string(self, c):
@@ -257,6 +274,8 @@ class Tokenizer(object):
         s = ""
         next_char = self.scanner.get_next_char()
         while next_char.char != "\"":
+            if next_char.is_eof():
+                self.error("Unterminated string")
             s += next_char.char
             next_char = self.scanner.get_next_char()
         return Token(Token.STRING, s)